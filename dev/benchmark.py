@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Benchmarks building the API from synthetic content.
+
+    python dev/benchmark.py run --shows 1000 --shows 10000
+    python dev/benchmark.py compare .benchmark/results/abc1234-1000.json \\
+        .benchmark/results/def5678-1000.json
+
+Content trees are generated once for each number of shows and reused. For each,
+nthp load, nthp dump and nthp build are timed end to end with the phase report from
+--profile, and the results are saved named after the commit so runs on different
+commits can be compared.
+"""
+
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import click
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(REPO_DIR))
+# Settings are read on import, the content root is set for each command run
+os.environ.setdefault("CONTENT_ROOT", "does-not-matter")
+
+from nthp_api.nthp_build import synthetic  # noqa: E402
+from nthp_api.nthp_build.version import get_version  # noqa: E402
+
+DEFAULT_WORK_DIR = REPO_DIR / ".benchmark"
+# Content from SmugMug isn't part of what's being measured
+COMMAND_ENV = {"SMUGMUG_FETCH": "false"}
+
+
+def get_commit() -> tuple[str, bool]:
+    """The current commit, and if there are uncommitted changes"""
+    commit = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+    status = subprocess.run(
+        ["git", "status", "--porcelain", "--untracked-files=no"],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return commit, bool(status.strip())
+
+
+def get_content(work_dir: Path, shows: int, seed: int) -> Path:
+    content_dir = work_dir / f"content-{shows}-{seed}"
+    if not content_dir.exists():
+        click.echo(f"Generating content with {shows} shows")
+        partial_dir = content_dir.with_name(content_dir.name + ".partial")
+        shutil.rmtree(partial_dir, ignore_errors=True)
+        synthetic.generate_content(partial_dir, shows, seed)
+        partial_dir.rename(content_dir)
+    return content_dir
+
+
+def run_command(run_dir: Path, name: str, args: list[str]) -> dict:
+    """Run an nthp command, returning how long it took and its phases"""
+    profile_dir = run_dir / "profile" / name
+    shutil.rmtree(profile_dir, ignore_errors=True)
+    log_path = run_dir / f"{name}.log"
+    tick = time.perf_counter()
+    with log_path.open("w") as log_file:
+        result = subprocess.run(
+            [sys.executable, str(REPO_DIR / "nthp"), *args, "--profile", profile_dir],
+            cwd=run_dir,
+            env={**os.environ, **COMMAND_ENV},
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            check=False,
+        )
+    wall_time = time.perf_counter() - tick
+    if result.returncode != 0:
+        raise click.ClickException(f"nthp {name} failed, see {log_path}")
+    report = json.loads((profile_dir / "report.json").read_text())
+    click.echo(f"  {name}: {wall_time:.2f} seconds")
+    return {"wall_time": wall_time, "phases": report["phases"]}
+
+
+def run_scale(work_dir: Path, shows: int, seed: int, repeat: int) -> dict:
+    content_dir = get_content(work_dir, shows, seed)
+    run_dir = work_dir / f"run-{shows}-{seed}"
+    commands: dict[str, list[dict]] = {"load": [], "dump": [], "build": []}
+    for _ in range(repeat):
+        shutil.rmtree(run_dir, ignore_errors=True)
+        run_dir.mkdir(parents=True)
+        commands["load"].append(run_command(run_dir, "load", ["load", content_dir]))
+        # Dump everything, rather than only what changed since the last dump
+        commands["dump"].append(run_command(run_dir, "dump", ["dump", "--clean"]))
+        commands["build"].append(
+            run_command(run_dir, "build", ["build", content_dir, "--clean"])
+        )
+    return {name: {"runs": runs} for name, runs in commands.items()}
+
+
+def get_fastest_run(command: dict) -> dict:
+    return min(command["runs"], key=lambda run: run["wall_time"])
+
+
+def get_phase_times(run: dict) -> dict[str, float]:
+    return {
+        f"{phase['group']} {phase['name']}": phase["wall_time"]
+        for phase in run["phases"]
+    }
+
+
+def format_change(before: float | None, after: float | None) -> str:
+    if not before or after is None:
+        return ""
+    return f"{(after - before) / before:+.1%}"
+
+
+def format_time(seconds: float | None) -> str:
+    return "-" if seconds is None else f"{seconds:.3f}"
+
+
+@click.group()
+def cli():
+    pass
+
+
+@click.option(
+    "--shows",
+    type=int,
+    multiple=True,
+    default=[1000],
+    show_default=True,
+    help="Number of shows to benchmark with, can be given more than once.",
+)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option(
+    "--repeat",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Times to run each command, the fastest run is compared.",
+)
+@click.option(
+    "--work-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=DEFAULT_WORK_DIR,
+    help="Where content is generated and results are saved.",
+)
+@cli.command()
+def run(shows, seed, repeat, work_dir):
+    commit, dirty = get_commit()
+    results_dir = work_dir / "results"
+    results_dir.mkdir(parents=True, exist_ok=True)
+    for show_count in shows:
+        click.echo(f"Benchmarking {show_count} shows at {commit}")
+        result = {
+            "commit": commit,
+            "dirty": dirty,
+            "version": get_version(),
+            "created": datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "shows": show_count,
+            "seed": seed,
+            "commands": run_scale(work_dir, show_count, seed, repeat),
+        }
+        suffix = "-dirty" if dirty else ""
+        result_path = results_dir / f"{commit}{suffix}-{show_count}.json"
+        result_path.write_text(json.dumps(result, indent=2))
+        click.echo(f"Saved results to {result_path}")
+
+
+@click.argument("after", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument("before", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@cli.command()
+def compare(before, after):
+    before_result = json.loads(before.read_text())
+    after_result = json.loads(after.read_text())
+    click.echo(
+        f"{before_result['commit']} -> {after_result['commit']}, "
+        f"{before_result['shows']} -> {after_result['shows']} shows"
+    )
+    for name, after_command in after_result["commands"].items():
+        after_run = get_fastest_run(after_command)
+        before_command = before_result["commands"].get(name)
+        before_run = get_fastest_run(before_command) if before_command else None
+        before_wall = before_run["wall_time"] if before_run else None
+        click.echo(
+            f"\nnthp {name}: {format_time(before_wall)} -> "
+            f"{format_time(after_run['wall_time'])} seconds "
+            f"{format_change(before_wall, after_run['wall_time'])}"
+        )
+        before_phases = get_phase_times(before_run) if before_run else {}
+        after_phases = get_phase_times(after_run)
+        removed_phases = [phase for phase in before_phases if phase not in after_phases]
+        for phase in [*after_phases, *removed_phases]:
+            phase_before = before_phases.get(phase)
+            phase_after = after_phases.get(phase)
+            click.echo(
+                f"  {phase:<40} {format_time(phase_before):>10} "
+                f"{format_time(phase_after):>10} "
+                f"{format_change(phase_before, phase_after):>8}"
+            )
+
+
+if __name__ == "__main__":
+    cli()
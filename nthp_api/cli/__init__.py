@@ -1,5 +1,6 @@
 import logging
 from os import environ
+from pathlib import Path
 
 import click
 
@@ -22,15 +23,40 @@ def version():
     print(f"nthp-api {get_version()}")  # noqa T201
 
 
+def profile_option(func):
+    return click.option(
+        "--profile",
+        type=click.Path(file_okay=False),
+        help="Write a report of how long each phase took, and cProfile stats of "
+        "each phase, to this directory.",
+    )(func)
+
+
+def set_profile_dir(profile):
+    if profile:
+        environ["PROFILE_DIR"] = str(profile)
+
+
 @click.argument("path", type=click.Path(exists=True))
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Only reload documents that have changed since the last load.",
+)
+@profile_option
 @cli.command()
-def load(path):
+def load(path, incremental, profile):
     environ["CONTENT_ROOT"] = str(path)
+    environ["INCREMENTAL"] = str(incremental)
+    set_profile_dir(profile)
 
-    from nthp_api.nthp_build import database, loader
+    from nthp_api.nthp_build import database, loader, profiling
 
-    database.init_db(create=True)
-    loader.run_loaders()
+    database.init_db(create=not incremental or not database.is_schema_current())
+    database.use_pragma_profile("load")
+    with profiling.phase("total", "load", use_cprofile=False):
+        loader.run_loaders()
+    profiling.write_report()
 
 
 @cli.command()
@@ -43,9 +69,17 @@ def stats():
     database.show_stats()
 
 
+@click.option(
+    "--record",
+    type=click.Path(dir_okay=False),
+    help="Record SmugMug responses to this archive, adding to it if it exists. "
+    "Every album is fetched, even if it's cached.",
+)
 @cli.command()
-def smug():
+def smug(record):
     environ["CONTENT_ROOT"] = "does-not-matter"
+    if record:
+        environ["SMUGMUG_RECORD_PATH"] = str(record)
 
     import nthp_api.smugmugger.database
     from nthp_api.nthp_build import database, smugmug
@@ -55,34 +89,118 @@ def smug():
     smugmug.run()
 
 
+def clean_option(func):
+    return click.option(
+        "--clean",
+        is_flag=True,
+        help="Clear the output directory and write every file, rather than only "
+        "rewriting files that have changed and removing files no longer output.",
+    )(func)
+
+
+@clean_option
+@profile_option
 @cli.command()
-def dump():
+def dump(clean, profile):
     environ["CONTENT_ROOT"] = "does-not-matter"
+    environ["CLEAN_OUTPUT"] = str(clean)
+    set_profile_dir(profile)
 
-    from nthp_api.nthp_build import database, dumper
+    from nthp_api.nthp_build import database, dumper, profiling
 
     database.init_db()
-    dumper.delete_output_dir()
-    dumper.dump_all()
+    database.use_pragma_profile("dump")
+    if clean:
+        dumper.delete_output_dir()
+    with profiling.phase("total", "dump", use_cprofile=False):
+        dumper.dump_all()
+    profiling.write_report()
+
+
+@click.option(
+    "--directory",
+    type=click.Path(exists=True, file_okay=False),
+    default="dist",
+    show_default=True,
+    help="Directory of a dumped API to serve.",
+)
+@click.option("--host", default="0.0.0.0", show_default=True)
+@click.option("--port", type=int, default=8000, show_default=True)
+@cli.command()
+def serve(directory, host, port):
+    environ["SERVER_DIRECTORY"] = str(directory)
+    environ["SERVER_HOST"] = host
+    environ["SERVER_PORT"] = str(port)
+
+    from nthp_api.server import make_server
+
+    with make_server() as server:
+        log.info(f"Serving {directory} on {host}:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            log.info("Stopping server")
+
+
+@click.argument("archive", type=click.Path(exists=True, dir_okay=False))
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8001, show_default=True)
+@click.option(
+    "--latency",
+    type=float,
+    default=0,
+    show_default=True,
+    help="Seconds to wait before each response, to simulate the network.",
+)
+@cli.command()
+def smug_replay(archive, host, port, latency):
+    from nthp_api.smugmugger.replay import ReplayServer, ResponseArchive
+
+    server = ReplayServer((host, port), ResponseArchive.load(Path(archive)), latency)
+    with server:
+        log.info(f"Replaying {archive}, use SMUGMUG_API_BASE={server.api_base}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            log.info("Stopping server")
 
 
 @click.argument("path", type=click.Path(exists=True))
+@clean_option
+@profile_option
+@click.option(
+    "--db",
+    type=click.Path(dir_okay=False),
+    help="Keep the database in this file between builds, only reloading documents "
+    "that have changed since the last build. Uses an in-memory database if not set.",
+)
 @cli.command()
-def build(path):
+def build(path, clean, profile, db):
     # Set settings using environment variables as workers and threads will recreate
     # the settings object and not pick up the values if set here.
-    environ["DB_URI"] = ":memory:"
+    environ["DB_URI"] = str(db) if db else ":memory:"
+    environ["INCREMENTAL"] = str(bool(db))
     environ["CONTENT_ROOT"] = str(path)
+    environ["CLEAN_OUTPUT"] = str(clean)
+    set_profile_dir(profile)
 
-    log.info(f"Building from {path} using in-memory database")
+    log.info(f"Building from {path} using {db or 'in-memory'} database")
 
     import nthp_api.smugmugger.database
-    from nthp_api.nthp_build import database, dumper, loader, smugmug
-
-    database.init_db(create=True)
-    loader.run_loaders()
+    from nthp_api.nthp_build import database, dumper, loader, profiling, smugmug
+
+    # A database from another version of the models is started again
+    database.init_db(create=not db or not database.is_schema_current())
+    database.use_pragma_profile("load")
+    # The loaders and dumpers within are profiled on their own
+    with profiling.phase("total", "load", use_cprofile=False):
+        loader.run_loaders()
     database.show_stats()
     nthp_api.smugmugger.database.init_db()
     smugmug.run()
-    dumper.delete_output_dir()
-    dumper.dump_all()
+    database.use_pragma_profile("dump")
+    if clean:
+        dumper.delete_output_dir()
+    with profiling.phase("total", "dump", use_cprofile=False):
+        dumper.dump_all()
+    profiling.write_report()
@@ -6,6 +6,7 @@ from enum import Enum
 
 from nthp_api.nthp_build import database, models, schema
 from nthp_api.nthp_build.documents import DocumentPath
+from nthp_api.nthp_build.writer import RowWriter, insert_rows
 from nthp_api.smugmugger import SmugMugImage
 
 log = logging.getLogger(__name__)
@@ -72,18 +73,27 @@ def save_asset(  # noqa: PLR0913
     category: AssetCategory | str | None = None,
     title: str | None = None,
     page: int | None = None,
-) -> database.Asset:
-    return database.Asset.create(
-        target_id=target_id,
-        target_type=target_type,
-        asset_source=source,
-        asset_type=type,
-        asset_mime_type=get_mime_type(source, type, id),
-        asset_id=id,
-        asset_category=category,
-        title=title,
-        page=page,
-    )
+    writer: RowWriter | None = None,
+) -> None:
+    row = {
+        "target_id": target_id,
+        "target_type": target_type,
+        "asset_source": source,
+        "asset_type": type,
+        "asset_mime_type": get_mime_type(source, type, id),
+        "asset_id": id,
+        "asset_category": category,
+        "asset_title": title,
+        "asset_page": page,
+    }
+    insert_rows(database.Asset, [row], writer)
+
+
+def delete_assets(target_id: str, target_type: AssetTarget) -> None:
+    database.Asset.delete().where(
+        database.Asset.target_id == target_id,
+        database.Asset.target_type == target_type,
+    ).execute()
 
 
 def assets_from_show_model(
@@ -132,10 +142,12 @@ def assets_from_show_model(
 
 
 def save_show_assets(
-    path: DocumentPath, show_assets: Iterable[schema.Asset]
-) -> list[database.Asset]:
+    path: DocumentPath,
+    show_assets: Iterable[schema.Asset],
+    writer: RowWriter | None = None,
+) -> None:
     """Write assets to the database"""
-    return [
+    for asset in show_assets:
         save_asset(
             target_id=path.id,
             target_type=AssetTarget.SHOW,
@@ -145,28 +157,24 @@ def save_show_assets(
             category=asset.category,
             title=asset.title,
             page=asset.page,
+            writer=writer,
         )
-        for asset in show_assets
-    ]
 
 
 def save_person_assets(
-    path: DocumentPath, person: models.Person
-) -> list[database.Asset]:
-    assets = []
+    path: DocumentPath, person: models.Person, writer: RowWriter | None = None
+) -> None:
     if person.headshot:
-        assets.append(
-            save_asset(
-                target_id=path.id,
-                target_type=AssetTarget.PERSON,
-                source=AssetSource.SMUGMUG,
-                type=AssetType.IMAGE,
-                id=person.headshot,
-                category=AssetCategory.HEADSHOT,
-                title=person.title,
-            )
+        save_asset(
+            target_id=path.id,
+            target_type=AssetTarget.PERSON,
+            source=AssetSource.SMUGMUG,
+            type=AssetType.IMAGE,
+            id=person.headshot,
+            category=AssetCategory.HEADSHOT,
+            title=person.title,
+            writer=writer,
         )
-    return assets
 
 
 def filter_assets_by_type(assets, type):
@@ -206,23 +214,23 @@ def smugmug_asset_to_asset(smugmug_asset: SmugMugImage) -> schema.Asset:
 
 
 def get_asset_collection_from_album(
-    album: database.Asset,
+    source: str, album_id: str, images: str | None
 ) -> schema.AssetCollection | None:
     """
-    Get AssetCollection from an asset album.
+    Get AssetCollection from an asset album and its images as JSON.
     Currently, we only support SmugMug albums.
     If the SmugMug data isn't present or fails to parse, we return None.
     """
-    if album.asset_source != AssetSource.SMUGMUG.value:
-        raise ValueError(f"Album source '{album.asset_source}' unsupported")
-    if not album.asset_smugmug_data:
-        log.warning(f"No smugmug data for album {album.asset_id}")
+    if source != AssetSource.SMUGMUG.value:
+        raise ValueError(f"Album source '{source}' unsupported")
+    if not images:
+        log.warning(f"No smugmug data for album {album_id}")
         return None
     try:
-        smugmug_album_images = json.loads(album.asset_smugmug_data)
+        smugmug_album_images = json.loads(images)
         smugmug_assets = [SmugMugImage(**asset) for asset in smugmug_album_images]
     except json.JSONDecodeError:
-        log.warning(f"Could not decode smugmug data for album {album.asset_id}")
+        log.warning(f"Could not decode smugmug data for album {album_id}")
         return None
     return schema.AssetCollection(
         [smugmug_asset_to_asset(asset) for asset in smugmug_assets]
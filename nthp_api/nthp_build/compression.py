@@ -0,0 +1,77 @@
+"""
+Precompressed siblings of output files, so a server can send them as they are rather
+than compressing per request. Brotli is only used if the brotli package is installed.
+"""
+
+import gzip
+import logging
+import shutil
+from collections.abc import Callable
+from pathlib import Path
+from typing import BinaryIO, NamedTuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover, depends on the environment
+    brotli = None
+
+log = logging.getLogger(__name__)
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+class Encoding(NamedTuple):
+    # As used in Accept-Encoding and Content-Encoding headers
+    name: str
+    suffix: str
+    compress: Callable[[BinaryIO, BinaryIO], None]
+
+
+def gzip_compress(source: BinaryIO, target: BinaryIO) -> None:
+    # No filename or mtime in the header, so the same content compresses the same
+    with gzip.GzipFile(
+        filename="", mode="wb", fileobj=target, compresslevel=GZIP_LEVEL, mtime=0
+    ) as gzip_file:
+        shutil.copyfileobj(source, gzip_file, COPY_CHUNK_SIZE)
+
+
+def brotli_compress(source: BinaryIO, target: BinaryIO) -> None:
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    while chunk := source.read(COPY_CHUNK_SIZE):
+        target.write(compressor.process(chunk))
+    target.write(compressor.finish())
+
+
+def get_encodings() -> list[Encoding]:
+    encodings = [Encoding("gzip", ".gz", gzip_compress)]
+    if brotli is not None:
+        encodings.insert(0, Encoding("br", ".br", brotli_compress))
+    return encodings
+
+
+def get_sibling_path(path: Path, encoding: Encoding) -> Path:
+    return path.with_name(path.name + encoding.suffix)
+
+
+def compress_file(path: Path, *, overwrite: bool = True) -> list[Path]:
+    """
+    Write a compressed sibling of path for each encoding. A sibling is only kept if
+    it's smaller than the original. Existing siblings are left alone unless
+    overwrite is set, for when the original hasn't changed.
+    """
+    sibling_paths = []
+    size = path.stat().st_size
+    for encoding in get_encodings():
+        sibling_path = get_sibling_path(path, encoding)
+        if not overwrite and sibling_path.exists():
+            sibling_paths.append(sibling_path)
+            continue
+        with path.open("rb") as source, sibling_path.open("wb") as target:
+            encoding.compress(source, target)
+        if sibling_path.stat().st_size >= size:
+            sibling_path.unlink()
+            continue
+        sibling_paths.append(sibling_path)
+    return sibling_paths
@@ -8,6 +8,28 @@ class Settings(BaseSettings):
     db_uri: str = "nthp.db"
     branch: str = "master"
     content_root: Path
+    # SQLite pragmas to set on top of the profile for each command, given as JSON
+    db_pragmas: dict[str, int | str] = {}
+    # Only reload source documents that have changed since the last load.
+    incremental: bool = False
+    # Clear the output directory and write every file when dumping, rather than
+    # leaving files whose content hasn't changed alone and removing orphaned ones.
+    clean_output: bool = False
+    # How many processes to use for CPU heavy work, defaults to the number of CPUs.
+    cpu_workers: int | None = None
+    # Where to keep rendered markdown between builds, disabled if not set.
+    content_cache_dir: Path | None = None
+    content_cache_max_entries: int = 100_000
+    # How many shows, people etc. each dumper task outputs, smaller chunks spread the
+    # work more evenly between processes.
+    dump_chunk_size: int = 250
+    # Write gzip, and brotli if installed, compressed copies of each output file.
+    compress_output: bool = False
+    # Also output every person's collaborators in a single compact document.
+    dump_collaborator_adjacency: bool = False
+    # Write a JSON report of the time and resources each phase of a build took, and
+    # cProfile stats of each phase, to this directory.
+    profile_dir: Path | None = None
 
     year_start: int = 1940
     year_end: int = datetime.datetime.now().year
@@ -1,8 +1,14 @@
+from collections.abc import Callable
 from io import StringIO
 
 import markdown
 from markdown import Markdown
 
+from nthp_api.nthp_build import content_cache
+
+# Bump when changing how content is rendered, to invalidate cached content
+RENDERER_VERSION = "1"
+
 
 def unmark_element(element, stream=None):
     if stream is None:
@@ -22,13 +28,37 @@ Markdown.output_formats["plain"] = unmark_element  # type: ignore
 _markdown_unmarker = Markdown(output_format="plain")  # type: ignore
 _markdown_unmarker.stripTopLevelTags = False  # type: ignore
 
+_markdown_html = Markdown()
+
+
+def render_cached(format: str, render: Callable[[str], str], markdown_text: str) -> str:
+    if not content_cache.is_enabled():
+        return render(markdown_text)
+    key = content_cache.get_cache_key(
+        RENDERER_VERSION, markdown.__version__, format, markdown_text
+    )
+    if (cached := content_cache.get(key)) is not None:
+        return cached
+    rendered = render(markdown_text)
+    content_cache.put(key, rendered)
+    return rendered
+
+
+def render_html(markdown_text: str) -> str:
+    # Markdown instances keep state between conversions, so must be reset
+    return _markdown_html.reset().convert(markdown_text)
+
+
+def render_plaintext(markdown_text: str) -> str:
+    return _markdown_unmarker.reset().convert(markdown_text)
+
 
 def markdown_to_html(markdown_text: str | None) -> str | None:
     if not markdown_text:
         return None
     if not markdown_text.strip():
         return None
-    return markdown.markdown(markdown_text)
+    return render_cached("html", render_html, markdown_text)
 
 
 def markdown_to_plaintext(markdown_text: str | None) -> str | None:
@@ -36,4 +66,4 @@ def markdown_to_plaintext(markdown_text: str | None) -> str | None:
         return None
     if not markdown_text.strip():
         return None
-    return _markdown_unmarker.convert(markdown_text)
+    return render_cached("plaintext", render_plaintext, markdown_text)
@@ -0,0 +1,77 @@
+"""
+An on-disk cache of rendered content, shared between builds and worker processes.
+Each entry is a file named after the hash of its inputs, written atomically so
+processes can safely share the cache without locking.
+"""
+
+import contextlib
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from nthp_api.nthp_build.config import settings
+
+log = logging.getLogger(__name__)
+
+
+def is_enabled() -> bool:
+    return settings.content_cache_dir is not None
+
+
+def get_cache_key(*parts: str) -> str:
+    sha256 = hashlib.sha256()
+    for part in parts:
+        sha256.update(part.encode())
+        sha256.update(b"\0")
+    return sha256.hexdigest()
+
+
+def get_entry_path(key: str) -> Path:
+    assert settings.content_cache_dir is not None, "Content cache is not enabled"
+    return settings.content_cache_dir / key[:2] / key
+
+
+def get(key: str) -> str | None:
+    path = get_entry_path(key)
+    try:
+        value = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    # Mark as recently used, so it survives pruning. Unlike touch, this won't create
+    # an empty entry if it's been pruned since being read.
+    with contextlib.suppress(FileNotFoundError):
+        os.utime(path)
+    return value
+
+
+def put(key: str, value: str) -> None:
+    path = get_entry_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(value)
+    Path(temp_path).replace(path)
+
+
+def prune(max_entries: int | None = None) -> int:
+    """Delete the least recently used entries beyond max_entries"""
+    if not is_enabled():
+        return 0
+    assert settings.content_cache_dir is not None
+    if max_entries is None:
+        max_entries = settings.content_cache_max_entries
+    entries = [
+        (path.stat().st_mtime_ns, path)
+        for path in settings.content_cache_dir.glob("*/*")
+        if not path.name.startswith(".tmp-")
+    ]
+    if len(entries) <= max_entries:
+        return 0
+    entries.sort(reverse=True)
+    for _, path in entries[max_entries:]:
+        path.unlink(missing_ok=True)
+    pruned = len(entries) - max_entries
+    log.info(f"Pruned {pruned} entries from the content cache")
+    return pruned
@@ -1,4 +1,6 @@
 import logging
+import time
+from pathlib import Path
 
 import peewee
 
@@ -6,6 +8,26 @@ from nthp_api.nthp_build.config import settings
 
 log = logging.getLogger(__name__)
 db = peewee.SqliteDatabase(settings.db_uri)
+# Stored as the database's user_version, bump when the models change so databases
+# kept between builds are recreated rather than reused
+SCHEMA_VERSION = 2
+# Pragmas for how each command uses the database, settings.db_pragmas are applied
+# on top. See https://www.sqlite.org/pragma.html
+PRAGMA_PROFILES: dict[str, dict[str, int | str]] = {
+    # Many writes. The database can always be loaded again, so isn't synced to disk
+    "load": {
+        "synchronous": "off",
+        "cache_size": -256 * 1024,
+        "temp_store": "memory",
+    },
+    # Only reads. Memory mapping the file lets worker processes share its pages
+    "dump": {
+        "query_only": 1,
+        "mmap_size": 1024 * 1024 * 1024,
+        "cache_size": -32 * 1024,
+        "temp_store": "memory",
+    },
+}
 
 
 class NthpDbModel(peewee.Model):
@@ -29,17 +51,26 @@ class PersonRoleType:
 
 
 class PersonRole(NthpDbModel):
-    target_id = peewee.CharField(index=True)
-    target_type = peewee.CharField(index=True)
+    target_id = peewee.CharField()
+    target_type = peewee.CharField()
     # Uses YYYY, not YY_YY, 2000 means 2000-2001
-    target_year = peewee.IntegerField(index=True)
+    target_year = peewee.IntegerField()
 
-    person_id = peewee.CharField(index=True, null=True)
+    person_id = peewee.CharField(null=True)
     person_name = peewee.CharField(null=True)
-    role = peewee.CharField(null=True, index=True)
-    is_person = peewee.BooleanField(index=True)
+    role = peewee.CharField(null=True)
+    is_person = peewee.BooleanField()
     data = peewee.TextField()
 
+    class Meta:
+        # Roles are found by person, by what they're for or by role name, always
+        # along with the type of role
+        indexes = (
+            (("person_id", "target_type"), False),
+            (("target_type", "target_id"), False),
+            (("target_type", "role"), False),
+        )
+
 
 class Show(NthpDbModel):
     id = peewee.CharField(primary_key=True)
@@ -59,12 +90,12 @@ class Show(NthpDbModel):
 
 
 class PlaywrightShow(NthpDbModel):
-    play_id = peewee.CharField(index=True)
+    play_id = peewee.CharField()
     play_name = peewee.CharField()
-    playwright_id = peewee.CharField(index=True)
+    playwright_id = peewee.CharField()
     playwright_name = peewee.CharField()
     show_id = peewee.CharField(index=True)
-    person_id = peewee.CharField(null=True, index=True)
+    person_id = peewee.CharField(null=True)
 
 
 class Venue(NthpDbModel):
@@ -77,6 +108,7 @@ class Venue(NthpDbModel):
 
 class Person(NthpDbModel):
     id = peewee.CharField(primary_key=True)
+    source_path = peewee.CharField(null=True)
     title = peewee.CharField()
     graduated = peewee.IntegerField(index=True, null=True)
     headshot = peewee.CharField(null=True)
@@ -86,21 +118,28 @@ class Person(NthpDbModel):
 
 
 class Trivia(NthpDbModel):
-    target_id = peewee.CharField(index=True)
-    target_type = peewee.CharField(index=True)
+    target_id = peewee.CharField()
+    target_type = peewee.CharField()
     target_name = peewee.CharField()
     target_image_id = peewee.CharField(null=True)
     # Uses YYYY, not YY_YY, 2000 means 2000-2001
-    target_year = peewee.IntegerField(index=True, null=True)
+    target_year = peewee.IntegerField(null=True)
 
-    person_id = peewee.CharField(index=True, null=True)
+    person_id = peewee.CharField(null=True)
     person_name = peewee.CharField(null=True)
 
     quote = peewee.TextField()
-    submitted = peewee.DateField(null=True, index=True)
+    submitted = peewee.DateField(null=True)
 
     data = peewee.TextField()
 
+    class Meta:
+        # A person's trivia is listed in year order
+        indexes = (
+            (("target_type", "target_id"), False),
+            (("person_id", "target_year"), False),
+        )
+
 
 class HistoryRecord(NthpDbModel):
     year = peewee.CharField()
@@ -110,31 +149,130 @@ class HistoryRecord(NthpDbModel):
 
 
 class Asset(NthpDbModel):
-    target_id = peewee.CharField(index=True)
-    target_type = peewee.CharField(index=True)
+    target_id = peewee.CharField()
+    target_type = peewee.CharField()
 
-    asset_source = peewee.CharField(index=True)
-    asset_type = peewee.CharField(index=True)
+    asset_source = peewee.CharField()
+    asset_type = peewee.CharField()
     asset_mime_type = peewee.CharField(null=True)
-    asset_id = peewee.CharField(index=True)
+    asset_id = peewee.CharField()
 
     asset_category = peewee.CharField(null=True)
     asset_title = peewee.CharField(null=True)
     asset_page = peewee.IntegerField(null=True)
 
-    asset_smugmug_data = peewee.CharField(null=True)
+    class Meta:
+        # Albums are found by type and source, and covered by the index
+        indexes = (
+            (("target_type", "target_id"), False),
+            (("asset_type", "asset_source", "asset_id"), False),
+        )
+
+
+class SmugMugAlbum(NthpDbModel):
+    """
+    Images of a SmugMug album, stored once however many assets refer to the album by
+    their asset_id
+    """
+
+    id = peewee.CharField(primary_key=True)
+    images = peewee.TextField()
+
+
+class SourceDocument(NthpDbModel):
+    """A source file that has been loaded, used to detect changes between loads"""
+
+    content_path = peewee.CharField(primary_key=True)
+    loader = peewee.CharField(index=True)
+    document_id = peewee.CharField()
+    sha256 = peewee.CharField()
+    mtime_ns = peewee.IntegerField()
+    size = peewee.IntegerField()
+
+
+MODELS = [
+    Show,
+    PlaywrightShow,
+    Venue,
+    PersonRole,
+    Person,
+    Trivia,
+    HistoryRecord,
+    Asset,
+    SmugMugAlbum,
+    SourceDocument,
+]
+
+
+def is_file_db() -> bool:
+    return settings.db_uri not in (":memory:", "")
 
 
-MODELS = [Show, PlaywrightShow, Venue, PersonRole, Person, Trivia, HistoryRecord, Asset]
+def is_schema_current() -> bool:
+    """If the database was created with the current models, so can be reused"""
+    return db.pragma("user_version") == SCHEMA_VERSION
 
 
 def init_db(create: bool = False):
     log.info(f"Initializing database: {db.database}")
 
-    db.connect()
-    if create:
+    db.connect(reuse_if_open=True)
+    if is_file_db():
+        # Readers don't block the writer, or each other
+        db.pragma("journal_mode", "wal")
+    if create or not db.get_tables():
         db.drop_tables(MODELS)
-    db.create_tables(MODELS)
+        # Indexes are created once everything is loaded, see create_indexes
+        with db.atomic():
+            for model in MODELS:
+                model._schema.create_table()  # noqa: SLF001
+        db.pragma("user_version", SCHEMA_VERSION)
+    else:
+        db.create_tables(MODELS)
+
+
+def create_indexes():
+    """
+    Create any missing indexes, then ANALYZE so the query planner knows which are
+    worth using. Building an index from loaded rows in one go is much quicker than
+    updating it with every insert.
+    """
+    tick = time.perf_counter()
+    with db.atomic():
+        for model in MODELS:
+            model._schema.create_indexes()  # noqa: SLF001
+    db.execute_sql("ANALYZE")
+    log.info(f"Created indexes in {time.perf_counter() - tick:.4f} seconds")
+
+
+def use_pragma_profile(name: str):
+    """Set pragmas for this connection and any opened later, including by workers"""
+    pragmas = {**PRAGMA_PROFILES[name], **settings.db_pragmas}
+    for key, value in pragmas.items():
+        db.pragma(key, value, permanent=True)
+    log.info(
+        f"Using {name} database profile: "
+        + ", ".join(f"{key}={value}" for key, value in pragmas.items())
+    )
+
+
+def close_before_fork():
+    """
+    Connections to a database file mustn't be used by forked processes, so close it
+    before starting workers. An in-memory database can't be reopened, so stays open
+    and each worker uses its copy.
+    """
+    if is_file_db():
+        db.close()
+
+
+def open_read_only():
+    """
+    Run in worker processes, which only read. Their connections share the file
+    through the OS page cache and the WAL, rather than each holding a copy.
+    """
+    if is_file_db():
+        db.init(f"{Path(settings.db_uri).resolve().as_uri()}?mode=ro", uri=True)
 
 
 def show_stats():
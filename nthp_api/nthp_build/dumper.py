@@ -1,23 +1,31 @@
 import datetime
+import filecmp
 import functools
 import json
 import logging
 import shutil
+import tempfile
 import time
-from multiprocessing import Manager
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
 from typing import NamedTuple, Protocol
 
+import peewee
 import pydantic
+from pydantic_collections import BaseCollectionModel
 
 from nthp_api.nthp_build import (
     assets,
+    compression,
     database,
     history,
+    manifest,
     models,
     parallel,
     people,
     playwrights,
+    profiling,
     roles,
     schema,
     search,
@@ -29,30 +37,144 @@ from nthp_api.nthp_build import (
 )
 from nthp_api.nthp_build.assets import AssetType
 from nthp_api.nthp_build.config import settings
-from nthp_api.nthp_build.parallel import DumperSharedState, make_dumper_state
+from nthp_api.nthp_build.parallel import DumperSharedState
 
 log = logging.getLogger(__name__)
 OUTPUT_DIR = Path("dist")
 
+# Files output by the dumper running in this process with their hashes, for the
+# manifest and to find orphaned files
+_outputs: dict[Path, manifest.FileHash] = {}
+# Files output by the previous dump, read before the dumper processes are started
+_previous_outputs: dict[Path, manifest.FileHash] = {}
+
 
 def delete_output_dir():
     shutil.rmtree(OUTPUT_DIR, ignore_errors=True)
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def delete_orphaned_files(output_paths: set[Path]) -> None:
+    """Delete files left in the output directory by a previous dump"""
+    orphaned_paths = [
+        path
+        for path in OUTPUT_DIR.rglob("*")
+        if path.is_file() and path not in output_paths
+    ]
+    for path in orphaned_paths:
+        path.unlink()
+    for directory in sorted(OUTPUT_DIR.rglob("*"), reverse=True):
+        if directory.is_dir() and not any(directory.iterdir()):
+            directory.rmdir()
+    log.info(f"Deleted {len(orphaned_paths)} orphaned files")
+
+
 def make_out_path(directory: Path, file: str) -> Path:
     path = OUTPUT_DIR / directory / Path(file + ".json")
     path.parent.mkdir(parents=True, exist_ok=True)
     return path
 
 
+def is_file_unchanged(path: Path, content: bytes) -> bool:
+    if not path.exists():
+        return False
+    if path.stat().st_size != len(content):
+        return False
+    return path.read_bytes() == content
+
+
+def is_output_unchanged(path: Path, file_hash: manifest.FileHash) -> bool | None:
+    """
+    Compare with the previous dump's manifest, rather than reading the file. None if
+    the file isn't in the manifest, so has to be compared another way.
+    """
+    previous_hash = _previous_outputs.get(path)
+    if previous_hash is None:
+        return None
+    if previous_hash != file_hash:
+        return False
+    # In case the file has been changed or deleted since
+    try:
+        return path.stat().st_size == file_hash.size
+    except FileNotFoundError:
+        return False
+
+
+def record_output(
+    path: Path, file_hash: manifest.FileHash, *, changed: bool = True
+) -> None:
+    """Note a file has been output, compressing it if enabled"""
+    _outputs[path] = file_hash
+    if settings.compress_output:
+        for sibling_path in compression.compress_file(path, overwrite=changed):
+            previous_hash = None if changed else _previous_outputs.get(sibling_path)
+            _outputs[sibling_path] = previous_hash or manifest.hash_file(sibling_path)
+
+
+def write_content(path: Path, content: bytes) -> None:
+    file_hash = manifest.hash_bytes(content)
+    # Leave identical files alone, so their mtime only changes when their content does
+    if not settings.clean_output:
+        unchanged = is_output_unchanged(path, file_hash)
+        if unchanged or (unchanged is None and is_file_unchanged(path, content)):
+            record_output(path, file_hash, changed=False)
+            return
+    path.write_bytes(content)
+    record_output(path, file_hash)
+
+
 def write_file(path: Path, obj: pydantic.BaseModel) -> None:
-    with path.open("w") as f:
-        f.write(obj.json(by_alias=True, exclude_none=True, exclude_unset=True))
+    if isinstance(obj, BaseCollectionModel):
+        write_collection(path, obj)
+        return
+    write_content(path, schema.to_json(obj).encode())
+
+
+def write_chunks(path: Path, chunks: Iterable[str]) -> None:
+    """Write content as it's produced, rather than holding all of it in memory"""
+    if settings.clean_output:
+        with path.open("wb") as f:
+            file_hash = manifest.write_hashed(f, chunks)
+        record_output(path, file_hash)
+        return
+    # Write alongside, so an identical file can be left alone
+    temp_path = path.with_name(path.name + ".tmp")
+    with temp_path.open("wb") as f:
+        file_hash = manifest.write_hashed(f, chunks)
+    unchanged = is_output_unchanged(path, file_hash)
+    if unchanged or (
+        unchanged is None
+        and path.exists()
+        and filecmp.cmp(temp_path, path, shallow=False)
+    ):
+        temp_path.unlink()
+        record_output(path, file_hash, changed=False)
+        return
+    temp_path.replace(path)
+    record_output(path, file_hash)
+
+
+def write_collection(path: Path, items: Iterable[pydantic.BaseModel]) -> None:
+    """
+    Write a collection one item at a time, the output is the same as writing a
+    BaseCollectionModel of the items.
+    """
+    write_chunks(path, join_json_array(schema.to_json(item) for item in items))
+
+
+def join_json_array(items: Iterable[str]) -> Iterator[str]:
+    """Yield a JSON array of already serialised items, a piece at a time"""
+    yield "["
+    for index, item in enumerate(items):
+        if index:
+            yield ","
+        yield item
+    yield "]"
 
 
 def dump_specs(state: DumperSharedState):
-    spec.write_spec(OUTPUT_DIR / "openapi.json")
+    path = OUTPUT_DIR / "openapi.json"
+    write_content(path, spec.get_spec_json().encode())
 
 
 def dump_show(inst: database.Show, state: DumperSharedState) -> schema.ShowDetail:
@@ -73,8 +195,20 @@ def dump_show(inst: database.Show, state: DumperSharedState) -> schema.ShowDetai
     return show
 
 
-def dump_shows(state: DumperSharedState):
-    for show_inst in database.Show.select():
+# Keys and the rows for them are ordered, as the query plan shouldn't change the order
+# of search documents
+def get_show_keys() -> list[str]:
+    query = database.Show.select(database.Show.id).order_by(database.Show.id)
+    return [show_id for (show_id,) in query.tuples()]
+
+
+def dump_shows(state: DumperSharedState, keys: list[str]):
+    query = (
+        database.Show.select()
+        .where(database.Show.id.in_(keys))
+        .order_by(database.Show.id)
+    )
+    for show_inst in query:
         dump_show(show_inst, state)
 
 
@@ -109,22 +243,38 @@ def dump_year(year: int, state: DumperSharedState) -> schema.YearDetail:
     return year_detail
 
 
-def dump_year_index(year_details: list[schema.YearDetail]):
+def get_year_keys() -> list[str]:
+    return [str(year) for year in range(settings.year_start, settings.year_end)]
+
+
+def dump_years(state: DumperSharedState, keys: list[str]):
+    for year in keys:
+        dump_year(int(year), state)
+
+
+def dump_year_index(state: DumperSharedState):
     path = make_out_path(Path("years"), "index")
+    show_counts = dict(
+        database.Show.select(database.Show.year_id, peewee.fn.COUNT(database.Show.id))
+        .group_by(database.Show.year_id)
+        .tuples()
+    )
     year_collection = schema.YearListCollection(
-        [schema.YearList(**year_detail.dict()) for year_detail in year_details]
+        [
+            schema.YearList(
+                title=years.get_year_title(year),
+                decade=years.get_year_decade(year),
+                year_id=years.get_year_id(year),
+                start_year=year,
+                grad_year=year + 1,
+                show_count=show_counts.get(years.get_year_id(year), 0),
+            )
+            for year in range(settings.year_start, settings.year_end)
+        ]
     )
     write_file(path, year_collection)
 
 
-def dump_years(state: DumperSharedState):
-    years_detail = [
-        dump_year(year, state) for year in range(settings.year_start, settings.year_end)
-    ]
-
-    dump_year_index(years_detail)
-
-
 def dump_venue(
     inst: database.Venue, shows: list[database.Show], state: DumperSharedState
 ) -> schema.VenueDetail:
@@ -146,18 +296,21 @@ def dump_venue_index(query, show_venue_map: venues.ShowVenueMap):
 
 
 def dump_venues(state: DumperSharedState):
-    venue_query = database.Venue.select()
+    # Ordered, as a reloaded venue's row moves to the end of the table
+    venue_query = database.Venue.select().order_by(database.Venue.id)
     show_venue_map = venues.get_show_venue_map(venue_query)
     [dump_venue(venue, show_venue_map[venue.id], state) for venue in venue_query]
     dump_venue_index(venue_query, show_venue_map)
 
 
 def dump_real_person(
-    inst: database.Person, state: DumperSharedState
+    inst: database.Person,
+    state: DumperSharedState,
+    index: people.PersonDetailIndex | None = None,
 ) -> schema.PersonDetail:
     path = make_out_path(Path("people"), inst.id)
     source_data = models.Person(**json.loads(inst.data))
-    person_detail = people.make_person_detail(source_data, inst.content)
+    person_detail = people.make_person_detail(source_data, inst.content, index)
     search.add_document(
         state=state,
         type=schema.SearchDocumentType.PERSON,
@@ -169,14 +322,29 @@ def dump_real_person(
     return person_detail
 
 
-def dump_real_people(state: DumperSharedState):
-    for person_inst in people.get_real_people():
-        dump_real_person(person_inst, state)
+def get_real_people_keys() -> list[str]:
+    query = database.Person.select(database.Person.id).order_by(database.Person.id)
+    return [person_id for (person_id,) in query.tuples()]
 
 
-def dump_virtual_person(ref, state: DumperSharedState) -> schema.PersonDetail:
+def dump_real_people(state: DumperSharedState, keys: list[str]):
+    index = people.get_person_detail_index(person_ids=keys)
+    query = (
+        people.get_real_people()
+        .where(database.Person.id.in_(keys))
+        .order_by(database.Person.id)
+    )
+    for person_inst in query:
+        dump_real_person(person_inst, state, index)
+
+
+def dump_virtual_person(
+    ref, state: DumperSharedState, index: people.PersonDetailIndex | None = None
+) -> schema.PersonDetail:
     path = make_out_path(Path("people"), ref.person_id)
-    person_detail = people.make_person_detail(people.make_virtual_person_model(ref))
+    person_detail = people.make_person_detail(
+        people.make_virtual_person_model(ref), index=index
+    )
     search.add_document(
         state=state,
         type=schema.SearchDocumentType.PERSON,
@@ -187,24 +355,53 @@ def dump_virtual_person(ref, state: DumperSharedState) -> schema.PersonDetail:
     return person_detail
 
 
-def dump_virtual_people(state: DumperSharedState):
+def get_virtual_people_keys() -> list[str]:
     real_people_ids = [x.id for x in database.Person.select(database.Person.id)]
     virtual_people_query = people.get_people_from_roles(excluded_ids=real_people_ids)
+    return [ref.person_id for ref in virtual_people_query]
+
+
+def dump_virtual_people(state: DumperSharedState, keys: list[str]):
+    virtual_people_query = people.get_people_from_roles().where(
+        database.PersonRole.person_id.in_(keys)
+    )
+    index = people.get_person_detail_index(person_ids=keys)
     for ref in virtual_people_query:
-        dump_virtual_person(ref, state)
+        dump_virtual_person(ref, state, index)
 
 
-def dump_collaborators_for_person(ref, state: DumperSharedState):
+def dump_collaborators_for_person(
+    ref, graph: people.CollaboratorGraph, state: DumperSharedState
+):
     path = make_out_path(Path("collaborators"), ref.person_id)
-    collaborators = people.get_person_collaborators(ref.person_id)
-    collection = schema.PersonCollaboratorCollection(list(collaborators))
+    collaborators = people.get_graph_collaborators(graph, ref.person_id)
+    collection = schema.PersonCollaboratorCollection(collaborators)
     write_file(path, collection)
 
 
-def dump_collaborators(state: DumperSharedState):
-    people_query = people.get_people_from_roles()
+def get_collaborators_keys() -> list[str]:
+    return [ref.person_id for ref in people.get_people_from_roles()]
+
+
+def dump_collaborators(state: DumperSharedState, keys: list[str]):
+    graph = people.get_collaborator_graph(person_ids=keys)
+    people_query = people.get_people_from_roles().where(
+        database.PersonRole.person_id.in_(keys)
+    )
     for ref in people_query:
-        dump_collaborators_for_person(ref, state)
+        dump_collaborators_for_person(ref, graph, state)
+
+
+def dump_collaborator_adjacency(state: DumperSharedState):
+    if not settings.dump_collaborator_adjacency:
+        return
+    person_refs = [
+        (ref.person_id, ref.person_name) for ref in people.get_people_from_roles()
+    ]
+    write_file(
+        OUTPUT_DIR / "collaborators.json",
+        people.get_collaborator_adjacency(people.get_collaborator_graph(), person_refs),
+    )
 
 
 def dump_people_by_committee_role(role_name: str):
@@ -220,7 +417,7 @@ def dump_crew_roles():
         path=make_out_path(Path("roles/crew"), "index"),
         obj=schema.RoleCollection(
             [
-                schema.Role(role=role.name, aliases=list(role.aliases))
+                schema.Role(role=role.name, aliases=sorted(role.aliases))
                 for role in roles.CREW_ROLE_DEFINITIONS
             ]
         ),
@@ -254,13 +451,17 @@ def dump_show_trivia(show_id: str):
     write_file(path, schema.TargetedTriviaCollection(trivia_show))
 
 
-def dump_targeted_trivia(state: DumperSharedState):
+def get_targeted_trivia_keys() -> list[str]:
     show_trivia_query = (
         database.Trivia.select(database.Trivia.target_id)
         .where(database.Trivia.target_type == database.TargetType.SHOW)
         .group_by(database.Trivia.target_id)
     )
-    [dump_show_trivia(result.target_id) for result in show_trivia_query]
+    return [result.target_id for result in show_trivia_query]
+
+
+def dump_targeted_trivia(state: DumperSharedState, keys: list[str]):
+    [dump_show_trivia(show_id) for show_id in keys]
 
 
 def dump_person_trivia(person_id: str):
@@ -269,13 +470,17 @@ def dump_person_trivia(person_id: str):
     write_file(path, schema.PersonTriviaCollection(trivia_show))
 
 
-def dump_people_trivia(state: DumperSharedState):
+def get_people_trivia_keys() -> list[str]:
     people_trivia_query = (
         database.Trivia.select(database.Trivia.person_id)
         .where(database.Trivia.person_id.is_null(False))
         .group_by(database.Trivia.person_id)
     )
-    [dump_person_trivia(result.person_id) for result in people_trivia_query]
+    return [result.person_id for result in people_trivia_query]
+
+
+def dump_people_trivia(state: DumperSharedState, keys: list[str]):
+    [dump_person_trivia(person_id) for person_id in keys]
 
 
 def dump_playwrights(state: DumperSharedState):
@@ -300,18 +505,32 @@ def dump_history_records(state: DumperSharedState):
     write_file(path, collection)
 
 
-def dump_album(album: database.Asset):
-    path = make_out_path(Path("assets/album"), album.asset_id)
-    asset_collection = assets.get_asset_collection_from_album(album)
+def dump_album(source: str, album_id: str, images: str | None):
+    path = make_out_path(Path("assets/album"), album_id)
+    asset_collection = assets.get_asset_collection_from_album(source, album_id, images)
     if asset_collection:
         write_file(path, asset_collection)
 
 
 def dump_albums(state: DumperSharedState):
-    albums_query = database.Asset.select().where(
-        database.Asset.asset_type == AssetType.ALBUM
+    # Each album once, however many assets refer to it
+    albums_query = (
+        database.Asset.select(
+            database.Asset.asset_source,
+            database.Asset.asset_id,
+            database.SmugMugAlbum.images,
+        )
+        .join(
+            database.SmugMugAlbum,
+            peewee.JOIN.LEFT_OUTER,
+            on=(database.Asset.asset_id == database.SmugMugAlbum.id),
+        )
+        .where(database.Asset.asset_type == AssetType.ALBUM)
+        .group_by(database.Asset.asset_source, database.Asset.asset_id)
+        .tuples()
     )
-    [dump_album(album) for album in albums_query]
+    for source, album_id, images in albums_query:
+        dump_album(source, album_id, images)
 
 
 def dump_site_stats(state: DumperSharedState) -> None:
@@ -332,8 +551,17 @@ def dump_site_stats(state: DumperSharedState) -> None:
 
 def dump_search_documents(state: DumperSharedState):
     path = make_out_path(Path("search"), "documents")
-    collection = schema.SearchDocumentCollection(list(state.search_documents))
-    write_file(path, collection)
+    write_chunks(path, join_json_array(search.read_shards(state.search_shards)))
+
+
+def dump_manifest(outputs: dict[Path, manifest.FileHash]) -> list[Path]:
+    """Write the manifest of outputs, returning the paths written for it"""
+    _outputs.clear()
+    write_file(
+        OUTPUT_DIR / manifest.MANIFEST_FILE,
+        manifest.make_manifest(outputs, OUTPUT_DIR),
+    )
+    return list(_outputs)
 
 
 class DumperFunc(Protocol):
@@ -341,22 +569,37 @@ class DumperFunc(Protocol):
         pass
 
 
+class ChunkedDumperFunc(Protocol):
+    def __call__(self, state: DumperSharedState, keys: list[str]) -> None:
+        pass
+
+
 class Dumper(NamedTuple):
     name: str
     dumper: DumperFunc
 
 
-DUMPERS: list[Dumper] = [
+class ChunkedDumper(NamedTuple):
+    """A dumper that can be split up to run in parallel, by the keys it dumps"""
+
+    name: str
+    dumper: ChunkedDumperFunc
+    get_keys: Callable[[], list[str]]
+
+
+DUMPERS: list[Dumper | ChunkedDumper] = [
     Dumper("spec", dump_specs),
-    Dumper("shows", dump_shows),
-    Dumper("years", dump_years),
+    ChunkedDumper("shows", dump_shows, get_show_keys),
+    ChunkedDumper("years", dump_years, get_year_keys),
+    Dumper("year index", dump_year_index),
     Dumper("venues", dump_venues),
-    Dumper("real people", dump_real_people),
-    Dumper("virtual people", dump_virtual_people),
-    Dumper("collaborators", dump_collaborators),
+    ChunkedDumper("real people", dump_real_people, get_real_people_keys),
+    ChunkedDumper("virtual people", dump_virtual_people, get_virtual_people_keys),
+    ChunkedDumper("collaborators", dump_collaborators, get_collaborators_keys),
+    Dumper("collaborator adjacency", dump_collaborator_adjacency),
     Dumper("roles", dump_roles),
-    Dumper("targeted trivia", dump_targeted_trivia),
-    Dumper("people trivia", dump_people_trivia),
+    ChunkedDumper("targeted trivia", dump_targeted_trivia, get_targeted_trivia_keys),
+    ChunkedDumper("people trivia", dump_people_trivia, get_people_trivia_keys),
     Dumper("playwrights", dump_playwrights),
     Dumper("plays", dump_plays),
     Dumper("history records", dump_history_records),
@@ -369,17 +612,142 @@ POST_DUMPERS: list[Dumper] = [
 ]
 
 
-def run_dumper(dumper: Dumper, state: DumperSharedState):
+class DumperTask(NamedTuple):
+    dumper: Dumper | ChunkedDumper
+    # Which keys to dump for a chunked dumper
+    keys: list[str] | None = None
+
+
+class DumperTaskResult(NamedTuple):
+    name: str
+    duration: float
+    # Of the process that ran the task
+    cpu_time: float
+    max_rss_kb: int
+    outputs: dict[Path, manifest.FileHash]
+    search_shard: Path | None
+
+
+def get_dumper_tasks(dumpers: list[Dumper | ChunkedDumper]) -> list[DumperTask]:
+    """
+    Split dumpers into tasks. Whole dumpers come first as they can't be split, the
+    chunks then fill in around them so workers finish at around the same time.
+    """
+    tasks = [DumperTask(dumper) for dumper in dumpers if isinstance(dumper, Dumper)]
+    for dumper in dumpers:
+        if isinstance(dumper, ChunkedDumper):
+            keys = dumper.get_keys()
+            tasks.extend(
+                DumperTask(dumper, keys[i : i + settings.dump_chunk_size])
+                for i in range(0, len(keys), settings.dump_chunk_size)
+            )
+    return tasks
+
+
+def get_task_profile_path(task: DumperTask) -> Path | None:
+    """Each task is profiled on its own, chunks are named after their first key"""
+    if task.keys:
+        return profiling.get_profile_path("dump", f"{task.dumper.name} {task.keys[0]}")
+    return profiling.get_profile_path("dump", task.dumper.name)
+
+
+def run_dumper_task(task: DumperTask, state: DumperSharedState) -> DumperTaskResult:
     tick = time.perf_counter()
-    dumper.dumper(state=state)
+    cpu_tick = time.process_time()
+    _outputs.clear()
+    search.clear_documents()
+    with profiling.profile(get_task_profile_path(task)):
+        if isinstance(task.dumper, ChunkedDumper):
+            assert task.keys is not None, "Chunked dumpers need keys to dump"
+            task.dumper.dumper(state=state, keys=task.keys)
+        else:
+            task.dumper.dumper(state=state)
     tock = time.perf_counter()
-    log.info(f"Dumped {dumper.name} in {tock - tick:.4f} seconds")
+    log.debug(f"Dumped a task of {task.dumper.name} in {tock - tick:.4f} seconds")
+    # Send the outputs back in one go, rather than a round trip per file
+    return DumperTaskResult(
+        name=task.dumper.name,
+        duration=tock - tick,
+        cpu_time=time.process_time() - cpu_tick,
+        max_rss_kb=profiling.get_max_rss_kb(),
+        outputs=dict(_outputs),
+        search_shard=search.write_shard(state),
+    )
+
+
+def log_dumper_timings(results: list[DumperTaskResult]) -> None:
+    durations: dict[str, list[float]] = defaultdict(list)
+    for result in results:
+        durations[result.name].append(result.duration)
+    for name, task_durations in sorted(
+        durations.items(), key=lambda item: sum(item[1])
+    ):
+        if len(task_durations) == 1:
+            log.info(f"Dumped {name} in {task_durations[0]:.4f} seconds")
+        else:
+            log.info(
+                f"Dumped {name} in {sum(task_durations):.4f} seconds over "
+                f"{len(task_durations)} tasks, slowest {max(task_durations):.4f}"
+            )
+
+
+def record_dumper_phases(results: list[DumperTaskResult]) -> None:
+    """
+    Record a phase for each dumper, from its tasks wherever they ran. Times are
+    totals over the tasks, which may have run at the same time.
+    """
+    results_by_name: dict[str, list[DumperTaskResult]] = defaultdict(list)
+    for result in results:
+        results_by_name[result.name].append(result)
+    for name, dumper_results in results_by_name.items():
+        profiling.record_phase(
+            profiling.Phase(
+                group="dump",
+                name=name,
+                wall_time=sum(result.duration for result in dumper_results),
+                cpu_time=sum(result.cpu_time for result in dumper_results),
+                max_rss_kb=max(result.max_rss_kb for result in dumper_results),
+                counts={
+                    "tasks": len(dumper_results),
+                    "files": sum(len(result.outputs) for result in dumper_results),
+                },
+            )
+        )
 
 
 def dump_all():
-    with Manager() as manager:
-        state = make_dumper_state(manager)
-        tasks = [functools.partial(run_dumper, dumper, state) for dumper in DUMPERS]
-        parallel.run_cpu_tasks_in_parallel(tasks)
-        [run_dumper(dumper, state) for dumper in POST_DUMPERS]
-    log.info("Dump complete")
+    tick = time.perf_counter()
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    _previous_outputs.clear()
+    if not settings.clean_output:
+        _previous_outputs.update(manifest.read_manifest(OUTPUT_DIR))
+    with tempfile.TemporaryDirectory(prefix="nthp-search-") as search_shard_dir:
+        state = DumperSharedState(search_shard_dir=Path(search_shard_dir))
+        tasks = [
+            functools.partial(run_dumper_task, task, state)
+            for task in get_dumper_tasks(DUMPERS)
+        ]
+        database.close_before_fork()
+        results = parallel.run_cpu_tasks_in_pool(
+            tasks, initializer=database.open_read_only
+        )
+        # Merge shards in task order, so documents are in the same order every time
+        state = state._replace(
+            search_shards=tuple(
+                result.search_shard for result in results if result.search_shard
+            )
+        )
+        results += [
+            run_dumper_task(DumperTask(dumper), state) for dumper in POST_DUMPERS
+        ]
+    log_dumper_timings(results)
+    record_dumper_phases(results)
+    outputs = {
+        path: file_hash
+        for result in results
+        for path, file_hash in result.outputs.items()
+    }
+    manifest_paths = dump_manifest(outputs)
+    if not settings.clean_output:
+        delete_orphaned_files(set(outputs) | set(manifest_paths))
+    log.info(f"Dump complete in {time.perf_counter() - tick:.4f} seconds")
@@ -1,10 +1,10 @@
 import functools
 import logging
 import time
+from collections.abc import Iterable
 from pathlib import Path
 from typing import Any, NamedTuple, Protocol, Type  # noqa: UP035
 
-import frontmatter
 import peewee
 import yaml
 from pydantic import ValidationError
@@ -12,17 +12,21 @@ from pydantic_collections import BaseCollectionModel
 
 from nthp_api.nthp_build import (
     assets,
+    content_cache,
     database,
     models,
     parallel,
     people,
     playwrights,
+    profiling,
     schema,
     shows,
+    sources,
     trivia,
     venues,
     years,
 )
+from nthp_api.nthp_build.config import settings
 from nthp_api.nthp_build.content import markdown_to_html, markdown_to_plaintext
 from nthp_api.nthp_build.documents import (
     DocumentPath,
@@ -30,31 +34,53 @@ from nthp_api.nthp_build.documents import (
     load_document,
     load_yaml,
 )
+from nthp_api.nthp_build.writer import RowWriter
 
 log = logging.getLogger(__name__)
 
 
-def load_show(path: DocumentPath, document: frontmatter.Post, data: models.Show):
+class ParsedDocument(NamedTuple):
+    """A document that has been read, validated and had its content rendered"""
+
+    path: DocumentPath
+    data: Any
+    content_html: str | None
+    content_plaintext: str | None
+
+
+class FailedDocument(NamedTuple):
+    """A document that failed validation, with the errors from pydantic"""
+
+    path: DocumentPath
+    errors: list[Any]
+
+
+def load_show(
+    path: DocumentPath, document: ParsedDocument, data: models.Show, writer: RowWriter
+):
     year_id = years.get_year_id_from_show_path(path)
     primary_image = assets.pick_show_primary_image(data.assets) if data.assets else None
     show_assets = list(assets.assets_from_show_model(data))
-    database.Show.create(
-        id=path.id,
-        source_path=path.path,
-        year=years.get_year_from_year_id(year_id),
-        year_id=year_id,
-        title=data.title,
-        venue_id=venues.get_venue_id(data.venue) if data.venue else None,
-        season_sort=data.season_sort,
-        date_start=data.date_start,
-        date_end=data.date_end,
-        primary_image=primary_image,
-        assets=schema.AssetCollection(show_assets).json(),
-        data=data.json(),
-        content=markdown_to_html(document.content),
-        plaintext=markdown_to_plaintext(document.content),
+    writer.add(
+        database.Show,
+        {
+            "id": path.id,
+            "source_path": path.path,
+            "year": years.get_year_from_year_id(year_id),
+            "year_id": year_id,
+            "title": data.title,
+            "venue_id": venues.get_venue_id(data.venue) if data.venue else None,
+            "season_sort": data.season_sort,
+            "date_start": data.date_start,
+            "date_end": data.date_end,
+            "primary_image": primary_image,
+            "assets": schema.AssetCollection(show_assets).json(),
+            "data": data.json(),
+            "content": document.content_html,
+            "plaintext": document.content_plaintext,
+        },
     )
-    assets.save_show_assets(path, show_assets)
+    assets.save_show_assets(path, show_assets, writer)
 
     # Record person roles
     people.save_person_roles(
@@ -62,12 +88,14 @@ def load_show(path: DocumentPath, document: frontmatter.Post, data: models.Show)
         target_type=database.PersonRoleType.CAST,
         target_year=years.get_year_from_year_id(year_id),
         person_list=data.cast,
+        writer=writer,
     )
     people.save_person_roles(
         target=path.id,
         target_type=database.PersonRoleType.CREW,
         target_year=years.get_year_from_year_id(year_id),
         person_list=data.crew,
+        writer=writer,
     )
 
     # Record playwright, if show has one
@@ -78,6 +106,7 @@ def load_show(path: DocumentPath, document: frontmatter.Post, data: models.Show)
             playwright_name=show_playwright.name,
             show_id=path.id,
             student_written=data.student_written,
+            writer=writer,
         )
 
     if data.trivia:
@@ -88,68 +117,130 @@ def load_show(path: DocumentPath, document: frontmatter.Post, data: models.Show)
             target_image_id=primary_image,
             target_year=years.get_year_from_year_id(year_id),
             trivia_list=data.trivia,
+            writer=writer,
         )
 
 
+def unload_show(path: DocumentPath):
+    database.Show.delete().where(database.Show.id == path.id).execute()
+    assets.delete_assets(path.id, assets.AssetTarget.SHOW)
+    people.delete_person_roles(
+        target=path.id,
+        target_types=[database.PersonRoleType.CAST, database.PersonRoleType.CREW],
+    )
+    playwrights.delete_playwright_shows(path.id)
+    trivia.delete_trivia(path.id, database.TargetType.SHOW)
+
+
 def load_committee(
-    path: DocumentPath, document: frontmatter.Post, data: models.Committee
+    path: DocumentPath,
+    document: ParsedDocument,
+    data: models.Committee,
+    writer: RowWriter,
 ):
     people.save_person_roles(
         target=path.id,
         target_type=database.PersonRoleType.COMMITTEE,
         target_year=years.get_year_from_year_id(path.id),
         person_list=data.committee,
+        writer=writer,
+    )
+
+
+def unload_committee(path: DocumentPath):
+    people.delete_person_roles(
+        target=path.id, target_types=[database.PersonRoleType.COMMITTEE]
     )
 
 
-def load_venue(path: DocumentPath, document: frontmatter.Post, data: models.Venue):
-    database.Venue.create(
-        id=path.id,
-        name=data.title,
-        data=data.json(),
-        content=markdown_to_html(document.content),
-        plaintext=markdown_to_plaintext(document.content),
+def load_venue(
+    path: DocumentPath, document: ParsedDocument, data: models.Venue, writer: RowWriter
+):
+    writer.add(
+        database.Venue,
+        {
+            "id": path.id,
+            "name": data.title,
+            "data": data.json(),
+            "content": document.content_html,
+            "plaintext": document.content_plaintext,
+        },
     )
 
 
-def load_person(path: DocumentPath, document: frontmatter.Post, data: models.Person):
+def unload_venue(path: DocumentPath):
+    database.Venue.delete().where(database.Venue.id == path.id).execute()
+
+
+def load_person(
+    path: DocumentPath, document: ParsedDocument, data: models.Person, writer: RowWriter
+):
     try:
-        database.Person.create(
-            id=data.id,
-            title=data.title,
-            graduated=data.graduated,
-            headshot=data.headshot,
-            data=data.json(),
-            content=markdown_to_html(document.content),
-            plaintext=markdown_to_plaintext(document.content),
+        writer.add(
+            database.Person,
+            {
+                "id": data.id,
+                "source_path": path.path,
+                "title": data.title,
+                "graduated": data.graduated,
+                "headshot": data.headshot,
+                "data": data.json(),
+                "content": document.content_html,
+                "plaintext": document.content_plaintext,
+            },
         )
     except peewee.IntegrityError:
         log.exception(
             f"Person ID {data.id} is already in use, please explicitly set `id` on "
             f"these people to disambiguate them."
         )
-    assets.save_person_assets(path, data)
+    assets.save_person_assets(path, data, writer)
+
 
+def unload_person(path: DocumentPath):
+    database.Person.delete().where(
+        database.Person.source_path == str(path.path)
+    ).execute()
+    assets.delete_assets(path.id, assets.AssetTarget.PERSON)
 
-def load_history(path: DocumentPath, data: models.HistoryRecordCollection):
+
+def load_history(
+    path: DocumentPath, data: models.HistoryRecordCollection, writer: RowWriter
+):
     for record in data:
-        database.HistoryRecord.create(
-            year=record.year,
-            academic_year=record.academic_year,
-            title=record.title,
-            description=markdown_to_html(record.description),
+        writer.add(
+            database.HistoryRecord,
+            {
+                "year": record.year,
+                "academic_year": record.academic_year,
+                "title": record.title,
+                "description": markdown_to_html(record.description),
+            },
         )
 
 
+def unload_history(path: DocumentPath):
+    database.HistoryRecord.delete().execute()
+
+
 class DocumentLoaderFunc(Protocol):
     def __call__(
-        self, path: DocumentPath, document: frontmatter.Post, data: Any
+        self,
+        path: DocumentPath,
+        document: ParsedDocument,
+        data: Any,
+        writer: RowWriter,
     ) -> None:
         pass
 
 
 class DataLoaderFunc(Protocol):
-    def __call__(self, path: DocumentPath, data: Any) -> None:
+    def __call__(self, path: DocumentPath, data: Any, writer: RowWriter) -> None:
+        pass
+
+
+class UnloaderFunc(Protocol):
+    def __call__(self, path: DocumentPath) -> None:
         pass
 
 
@@ -160,6 +251,8 @@ class Loader(NamedTuple):
         models.NthpModel | BaseCollectionModel[models.NthpModel]
     ]
     func: DocumentLoaderFunc | DataLoaderFunc
+    # Removes everything a previous load of a document wrote to the database
+    unload: UnloaderFunc
 
 
 LOADERS: list[Loader] = [
@@ -168,30 +261,35 @@ LOADERS: list[Loader] = [
         path=Path("_shows"),
         schema_type=models.Show,
         func=load_show,
+        unload=unload_show,
     ),
     Loader(
         type=DocumentLoaderFunc,
         path=Path("_committees"),
         schema_type=models.Committee,
         func=load_committee,
+        unload=unload_committee,
     ),
     Loader(
         type=DocumentLoaderFunc,
         path=Path("_venues"),
         schema_type=models.Venue,
         func=load_venue,
+        unload=unload_venue,
     ),
     Loader(
         type=DocumentLoaderFunc,
         path=Path("_people"),
         schema_type=models.Person,
         func=load_person,
+        unload=unload_person,
     ),
     Loader(
         type=DataLoaderFunc,
         path=Path("_data/history.yaml"),
         schema_type=models.HistoryRecordCollection,
         func=load_history,
+        unload=unload_history,
     ),
 ]
 
@@ -202,27 +300,82 @@ def loc_to_path(loc: str | tuple) -> str:
     return loc
 
 
-def print_validation_error(validation_error: ValidationError, path: Path) -> None:
+def print_validation_error(errors: list[Any], path: Path) -> None:
     log.error(f"Validation error in {path}")
-    for error in validation_error.errors():
+    for error in errors:
         loc = loc_to_path(error["loc"])
         log.warning(f"{loc} : {error['msg']}")
         log.info(f"     {error['input']}")
 
 
+def get_source_changes(
+    loader: Loader, doc_paths: Iterable[DocumentPath]
+) -> sources.SourceChanges:
+    if not settings.incremental:
+        return sources.get_all_sources(doc_paths)
+    changes = sources.get_source_changes(loader.path, doc_paths)
+    log.info(
+        f"{len(changes.changed)} changed, {len(changes.deleted)} deleted and "
+        f"{len(changes.unchanged)} unchanged documents in {loader.path}"
+    )
+    return changes
+
+
+def unload_documents(loader: Loader, changes: sources.SourceChanges):
+    """Remove anything loaded from deleted or changed documents by a previous load"""
+    if not settings.incremental:
+        return
+    previously_loaded = [change.path for change in changes.changed if not change.is_new]
+    for doc_path in changes.deleted + previously_loaded:
+        loader.unload(path=doc_path)
+        sources.forget_source(doc_path)
+
+
+def parse_document(
+    schema_type: type[models.NthpModel], doc_path: DocumentPath
+) -> ParsedDocument | FailedDocument:
+    """
+    Do the CPU heavy part of loading a document. This is run in worker processes, so
+    must not touch the database.
+    """
+    document = load_document(doc_path.path)
+    try:
+        data = schema_type(**{"id": doc_path.id, **document.metadata})
+    except ValidationError as error:
+        # ValidationError doesn't survive pickling, so send back the error details
+        return FailedDocument(path=doc_path, errors=error.errors(include_url=False))
+    return ParsedDocument(
+        path=doc_path,
+        data=data,
+        content_html=markdown_to_html(document.content),
+        content_plaintext=markdown_to_plaintext(document.content),
+    )
+
+
 def run_document_loader(loader: Loader):
-    doc_paths = find_documents(loader.path)
+    changes = get_source_changes(loader, find_documents(loader.path))
     docs_that_failed_validation = []
-    with database.db.atomic():
-        for doc_path in doc_paths:
-            document = load_document(doc_path.path)
-            try:
-                data = loader.schema_type(**{"id": doc_path.id, **document.metadata})  # type: ignore[call-arg]
-            except ValidationError as error:
-                print_validation_error(error, doc_path.path)
+    parsed_documents = parallel.map_cpu_task_in_pool(
+        functools.partial(parse_document, loader.schema_type),
+        [change.path for change in changes.changed],
+    )
+    with database.db.atomic(), RowWriter() as writer:
+        unload_documents(loader, changes)
+        for (doc_path, source_state, _), parsed_document in zip(
+            changes.changed, parsed_documents, strict=True
+        ):
+            if isinstance(parsed_document, FailedDocument):
+                print_validation_error(parsed_document.errors, doc_path.path)
                 docs_that_failed_validation.append(doc_path)
                 continue
-            loader.func(path=doc_path, document=document, data=data)  # type: ignore[call-arg]
+            loader.func(  # type: ignore[call-arg]
+                path=doc_path,
+                document=parsed_document,
+                data=parsed_document.data,
+                writer=writer,
+            )
+            sources.record_source(loader.path, doc_path, source_state)
+    profiling.add_counts({"documents": len(changes.changed), **writer.counts})
     if docs_that_failed_validation:
         log.error(
             f"{len(docs_that_failed_validation)} documents failed validation for {loader.path}"
@@ -230,8 +383,20 @@ def run_document_loader(loader: Loader):
 
 
 def run_data_loader(loader: Loader):
+    doc_path = DocumentPath(
+        path=loader.path,
+        id=loader.path.stem,
+        content_path=loader.path,
+        filename=loader.path.name,
+        basename=loader.path.stem,
+    )
+    changes = get_source_changes(loader, [doc_path])
+    if not changes.changed:
+        return
+    source_state = changes.changed[0].state
     files_that_failed_validation = []
-    with database.db.atomic():
+    with database.db.atomic(), RowWriter() as writer:
+        unload_documents(loader, changes)
         try:
             document_data = load_yaml(loader.path)
         except yaml.YAMLError:
@@ -242,20 +407,13 @@ def run_data_loader(loader: Loader):
                 data = loader.schema_type(**document_data)  # type: ignore[call-arg]
             else:
                 data = loader.schema_type(document_data)  # type: ignore[call-arg]
-        except ValidationError:
-            print_validation_error(ValidationError(), loader.path)
+        except ValidationError as error:
+            print_validation_error(error.errors(), loader.path)
             files_that_failed_validation.append(loader.path)
             return
-        loader.func(
-            path=DocumentPath(
-                path=loader.path,
-                id=loader.path.stem,
-                content_path=loader.path,
-                filename=loader.path.name,
-                basename=loader.path.stem,
-            ),
-            data=data,
-        )  # type: ignore[call-arg]
+        loader.func(path=doc_path, data=data, writer=writer)  # type: ignore[call-arg]
+        sources.record_source(loader.path, doc_path, source_state)
+    profiling.add_counts({"documents": 1, **writer.counts})
     if files_that_failed_validation:
         log.error(
             f"{len(files_that_failed_validation)} files failed validation for {loader.path}"
@@ -265,16 +423,22 @@ def run_data_loader(loader: Loader):
 def run_loader(loader: Loader):
     log.info(f"Running loader for {loader.schema_type.__name__}")
     tick = time.perf_counter()
-    if loader.type is DocumentLoaderFunc:
-        run_document_loader(loader)
-    elif loader.type is DataLoaderFunc:
-        run_data_loader(loader)
-    else:
-        raise TypeError(f"Unhandled loader type: {loader.func}")
+    with profiling.phase("load", loader.schema_type.__name__):
+        if loader.type is DocumentLoaderFunc:
+            run_document_loader(loader)
+        elif loader.type is DataLoaderFunc:
+            run_data_loader(loader)
+        else:
+            raise TypeError(f"Unhandled loader type: {loader.func}")
     tock = time.perf_counter()
     log.debug(f"Took {tock - tick:.4f} seconds")
 
 
 def run_loaders():
+    if settings.incremental and not sources.has_sources():
+        log.warning("No record of a previous load, all documents will be loaded")
     tasks = [functools.partial(run_loader, loader) for loader in LOADERS]
     parallel.run_tasks_in_series(tasks)
+    with profiling.phase("load", "indexes"):
+        database.create_indexes()
+    content_cache.prune()
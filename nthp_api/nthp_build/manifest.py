@@ -0,0 +1,79 @@
+"""
+A manifest of the content hash and size of every output file, written alongside the
+output so clients, servers and deploy tooling can tell which files changed between
+builds without comparing their contents.
+"""
+
+import hashlib
+import json
+import logging
+from collections.abc import Iterable
+from pathlib import Path
+from typing import BinaryIO, NamedTuple
+
+from nthp_api.nthp_build import schema
+
+log = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+class FileHash(NamedTuple):
+    sha256: str
+    size: int
+
+
+def hash_bytes(content: bytes) -> FileHash:
+    return FileHash(sha256=hashlib.sha256(content).hexdigest(), size=len(content))
+
+
+def hash_file(path: Path) -> FileHash:
+    hasher = hashlib.sha256()
+    size = 0
+    with path.open("rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+            size += len(chunk)
+    return FileHash(sha256=hasher.hexdigest(), size=size)
+
+
+def write_hashed(f: BinaryIO, chunks: Iterable[str]) -> FileHash:
+    """Write chunks of text to a file, hashing them as they're written"""
+    hasher = hashlib.sha256()
+    size = 0
+    for chunk in chunks:
+        data = chunk.encode()
+        hasher.update(data)
+        size += len(data)
+        f.write(data)
+    return FileHash(sha256=hasher.hexdigest(), size=size)
+
+
+def make_manifest(outputs: dict[Path, FileHash], output_dir: Path) -> schema.Manifest:
+    files = {
+        path.relative_to(output_dir).as_posix(): schema.ManifestFile(
+            sha256=file_hash.sha256, size=file_hash.size
+        )
+        for path, file_hash in outputs.items()
+    }
+    return schema.Manifest(files=dict(sorted(files.items())))
+
+
+def read_manifest(output_dir: Path) -> dict[Path, FileHash]:
+    """
+    Hashes of the files output by the previous build, empty if there's no manifest
+    or it can't be read
+    """
+    path = output_dir / MANIFEST_FILE
+    if not path.exists():
+        return {}
+    try:
+        files = json.loads(path.read_bytes())["files"]
+        return {
+            output_dir / name: FileHash(sha256=file["sha256"], size=file["size"])
+            for name, file in files.items()
+        }
+    except (ValueError, KeyError, TypeError):
+        log.warning(f"Couldn't read manifest {path}, comparing files instead")
+        return {}
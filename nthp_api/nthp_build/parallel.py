@@ -1,12 +1,22 @@
 import logging
-from collections.abc import Callable
-from concurrent.futures import ThreadPoolExecutor
-from multiprocessing import Process, Queue
-from multiprocessing.managers import SyncManager
-from typing import Any, NamedTuple
+import multiprocessing
+import os
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, TypeVar
+
+from nthp_api.nthp_build.config import settings
 
 log = logging.getLogger(__name__)
 
+T = TypeVar("T")
+R = TypeVar("R")
+# Below this many items the cost of starting worker processes outweighs the benefit
+MIN_ITEMS_FOR_POOL = 32
+# Number of chunks to aim to give each worker, smaller chunks balance load better
+CHUNKS_PER_WORKER = 4
+
 
 class MultiProcessError(Exception):
     pass
@@ -18,27 +28,59 @@ def run_tasks_in_series(tasks):
         task()
 
 
-def run_cpu_task(task: Callable, error_queue: Queue):
-    try:
-        task()
-    except Exception as e:
-        log.exception(f"Error occurred while running task {task}")
-        error_queue.put(e)
-
-
-def run_cpu_tasks_in_parallel(tasks: list[Callable]):
-    log.info("Running %d CPU tasks in parallel", len(tasks))
-    error_queue: Queue = Queue()
-    running_tasks = [
-        Process(target=run_cpu_task, args=(task, error_queue)) for task in tasks
-    ]
-    for running_task in running_tasks:
-        running_task.start()
-    for running_task in running_tasks:
-        running_task.join()
-
-    if not error_queue.empty():
+def get_cpu_worker_count() -> int:
+    return settings.cpu_workers or os.cpu_count() or 1
+
+
+def run_cpu_tasks_in_pool(
+    tasks: Sequence[Callable[[], R]], initializer: Callable[[], None] | None = None
+) -> list[R]:
+    """
+    Run tasks on a pool of worker processes, one per CPU. Workers take the next task
+    as soon as they finish one, so put the longest tasks first. Returns results in
+    the same order as tasks, tasks and results must be picklable. initializer is run
+    in each worker before its first task, not when tasks are run in this process.
+    """
+    workers = min(get_cpu_worker_count(), len(tasks))
+    log.info("Running %d CPU tasks over %d processes", len(tasks), workers)
+    if workers <= 1:
+        return [task() for task in tasks]
+    results: list[R] = []
+    has_errors = False
+    # Fork so workers inherit loaded modules, settings and the database
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=initializer,
+    ) as executor:
+        futures = [executor.submit(task) for task in tasks]
+        for task, future in zip(tasks, futures, strict=True):
+            try:
+                results.append(future.result())
+            except Exception:
+                log.exception(f"Error occurred while running task {task}")
+                has_errors = True
+    if has_errors:
         raise MultiProcessError("Errors occurred while running tasks")
+    return results
+
+
+def map_cpu_task_in_pool(func: Callable[[T], R], items: Sequence[T]) -> Iterator[R]:
+    """
+    Map func over items using a pool of worker processes, yielding results in the
+    same order as items. func and items must be picklable.
+    """
+    workers = min(get_cpu_worker_count(), len(items))
+    if workers <= 1 or len(items) < MIN_ITEMS_FOR_POOL:
+        yield from map(func, items)
+        return
+    log.debug("Mapping %d items over %d processes", len(items), workers)
+    chunk_size = max(1, len(items) // (workers * CHUNKS_PER_WORKER))
+    # Fork so workers inherit loaded modules and settings without reimporting them
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("fork")
+    ) as executor:
+        yield from executor.map(func, items, chunksize=chunk_size)
 
 
 def run_io_tasks_in_parallel(tasks):
@@ -50,8 +92,7 @@ def run_io_tasks_in_parallel(tasks):
 
 
 class DumperSharedState(NamedTuple):
-    search_documents: Any
-
-
-def make_dumper_state(manager: SyncManager) -> DumperSharedState:
-    return DumperSharedState(search_documents=manager.list())
+    # Where dumper tasks write their shards of search documents
+    search_shard_dir: Path
+    # Shards written by the dumper tasks, for dumpers that run after them
+    search_shards: tuple[Path, ...] = ()
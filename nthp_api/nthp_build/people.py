@@ -1,12 +1,14 @@
 import datetime
 from collections import defaultdict
 from collections.abc import Iterable
+from typing import NamedTuple
 
 import peewee
 from slugify import slugify
 
 from nthp_api.nthp_build import database, models, schema, years
 from nthp_api.nthp_build.config import settings
+from nthp_api.nthp_build.writer import RowWriter, insert_rows
 
 
 def get_person_id(name: str) -> str:
@@ -18,6 +20,7 @@ def save_person_roles(
     target_type: str,  # TODO: why not PersonRoleType?
     target_year: int,
     person_list: list[models.PersonRef],
+    writer: RowWriter | None = None,
 ) -> list[models.PersonRole]:
     rows = []
     person_roles: list[models.PersonRole] = []
@@ -43,19 +46,35 @@ def save_person_roles(
                 "data": person_role.json(),
             }
         )
-    database.PersonRole.insert_many(rows).execute()
+    insert_rows(database.PersonRole, rows, writer)
     return person_roles
 
 
+def delete_person_roles(target: str, target_types: list[str]) -> None:
+    database.PersonRole.delete().where(
+        database.PersonRole.target_id == target,
+        database.PersonRole.target_type.in_(target_types),
+    ).execute()
+
+
 def get_real_people() -> peewee.ModelSelect:
     return database.Person.select()
 
 
-def get_person_show_roles(person_id: str) -> list[schema.PersonShowRoles]:
-    query = (
-        database.PersonRole.select(database.PersonRole, database.Show)
+def get_show_roles_query() -> peewee.ModelSelect:
+    """Cast and crew roles with the show they're for, as rows rather than models"""
+    return (
+        database.PersonRole.select(
+            database.PersonRole.person_id,
+            database.PersonRole.target_id,
+            database.PersonRole.target_type,
+            database.PersonRole.role,
+            database.Show.title.alias("show_title"),
+            database.Show.year_id.alias("show_year_id"),
+            database.Show.year.alias("show_year"),
+            database.Show.primary_image.alias("show_primary_image"),
+        )
         .where(
-            database.PersonRole.person_id == person_id,
             database.PersonRole.target_type.in_(
                 [database.PersonRoleType.CAST, database.PersonRoleType.CREW]
             ),
@@ -63,24 +82,35 @@ def get_person_show_roles(person_id: str) -> list[schema.PersonShowRoles]:
         .join(
             database.Show,
             on=(database.PersonRole.target_id == database.Show.id),
-            attr="show",
         )
-        .order_by(database.Show.year_id, database.Show.season_sort)
+        .order_by(
+            database.Show.year_id,
+            database.Show.season_sort,
+            database.Show.id,
+            database.PersonRole.id,
+        )
+        .namedtuples()
     )
-    # Collect all results by show_id
+
+
+def get_person_show_roles(person_id: str) -> list[schema.PersonShowRoles]:
+    query = get_show_roles_query().where(database.PersonRole.person_id == person_id)
+    return make_person_show_roles(query)
+
+
+def make_person_show_roles(results: Iterable) -> list[schema.PersonShowRoles]:
+    """Group rows from get_show_roles_query for a single person by show"""
     results_by_show_id: dict[str, list] = defaultdict(list)
-    shows: dict[str, database.Show] = {}
-    for result in query:
+    for result in results:
         results_by_show_id[result.target_id].append(result)
-        shows[result.target_id] = result.show
 
     return [
         schema.PersonShowRoles(
             show_id=show_id,
-            show_title=shows[show_id].title,
-            show_year_id=shows[show_id].year_id,
-            show_year=shows[show_id].year,
-            show_primary_image=shows[show_id].primary_image,
+            show_title=roles[0].show_title,
+            show_year_id=roles[0].show_year_id,
+            show_year=roles[0].show_year,
+            show_primary_image=roles[0].show_primary_image,
             roles=[
                 schema.PersonShowRoleItem(role=role.role, role_type=role.target_type)
                 for role in roles
@@ -90,25 +120,34 @@ def get_person_show_roles(person_id: str) -> list[schema.PersonShowRoles]:
     ]
 
 
+def get_committee_roles_query() -> peewee.ModelSelect:
+    return (
+        database.PersonRole.select()
+        .where(database.PersonRole.target_type == database.PersonRoleType.COMMITTEE)
+        .order_by(database.PersonRole.target_year, database.PersonRole.id)
+    )
+
+
 def get_person_committee_roles(person_id: str) -> list[schema.PersonCommitteeRole]:
-    query = database.PersonRole.select().where(
-        database.PersonRole.person_id == person_id,
-        database.PersonRole.target_type == database.PersonRoleType.COMMITTEE,
+    query = get_committee_roles_query().where(
+        database.PersonRole.person_id == person_id
     )
+    return [make_person_committee_role(person_role) for person_role in query]
 
-    return [
-        schema.PersonCommitteeRole(
-            year_id=person_role.target_id,
-            year_title=years.get_year_title(
-                years.get_year_from_year_id(person_role.target_id)
-            ),
-            year_decade=years.get_year_decade(
-                years.get_year_from_year_id(person_role.target_id)
-            ),
-            role=person_role.role,
-        )
-        for person_role in query
-    ]
+
+def make_person_committee_role(
+    person_role: database.PersonRole,
+) -> schema.PersonCommitteeRole:
+    return schema.PersonCommitteeRole(
+        year_id=person_role.target_id,
+        year_title=years.get_year_title(
+            years.get_year_from_year_id(person_role.target_id)
+        ),
+        year_decade=years.get_year_decade(
+            years.get_year_from_year_id(person_role.target_id)
+        ),
+        role=person_role.role,
+    )
 
 
 def get_person_collaborators(person_id: str) -> list[schema.PersonCollaborator]:
@@ -134,7 +173,7 @@ def get_person_collaborators(person_id: str) -> list[schema.PersonCollaborator]:
             database.PersonRole.person_id.is_null(False),  # exclude null person_id
             database.PersonRole.is_person == True,  # noqa: E712, need to use ==
         )
-        .order_by(database.PersonRole.person_id)
+        .order_by(database.PersonRole.person_id, database.PersonRole.person_name)
     )
     # Map collaborators against a list of targets
     collaborator_map = defaultdict(set)
@@ -153,6 +192,105 @@ def get_person_collaborators(person_id: str) -> list[schema.PersonCollaborator]:
     ]
 
 
+class CollaboratorGraph(NamedTuple):
+    """
+    People and the targets (shows, committees) they have roles on, used to find every
+    person's collaborators without querying per person.
+    """
+
+    # Every target each person has a role on
+    person_targets: dict[str, set[str]]
+    # The people with roles on each target, as (person_id, person_name)
+    target_people: dict[str, set[tuple[str, str]]]
+
+
+def get_collaborator_graph(person_ids: list[str] | None = None) -> CollaboratorGraph:
+    """
+    Build the collaborator graph in a single pass over person roles. If person_ids are
+    given only roles on their targets are read, so the graph is only complete enough
+    to find collaborators of those people.
+    """
+    query = (
+        database.PersonRole.select(
+            database.PersonRole.target_id,
+            database.PersonRole.person_id,
+            database.PersonRole.person_name,
+            database.PersonRole.is_person,
+        )
+        .where(database.PersonRole.person_id.is_null(False))
+        .tuples()
+    )
+    if person_ids is not None:
+        targets_query = database.PersonRole.select(database.PersonRole.target_id).where(
+            database.PersonRole.person_id.in_(person_ids)
+        )
+        query = query.where(
+            database.PersonRole.person_id.in_(person_ids)
+            | database.PersonRole.target_id.in_(targets_query)
+        )
+    person_targets: dict[str, set[str]] = defaultdict(set)
+    target_people: dict[str, set[tuple[str, str]]] = defaultdict(set)
+    for target_id, person_id, person_name, is_person in query:
+        person_targets[person_id].add(target_id)
+        if is_person:
+            target_people[target_id].add((person_id, person_name))
+    return CollaboratorGraph(
+        person_targets=dict(person_targets), target_people=dict(target_people)
+    )
+
+
+def get_graph_collaborators(
+    graph: CollaboratorGraph, person_id: str
+) -> list[schema.PersonCollaborator]:
+    """
+    Get all collaborators for a person from a collaborator graph, the same as
+    get_person_collaborators would return.
+    """
+    collaborator_map = defaultdict(set)
+    for target_id in graph.person_targets.get(person_id, ()):
+        for collaborator in graph.target_people.get(target_id, ()):
+            if collaborator[0] != person_id:
+                collaborator_map[collaborator].add(target_id)
+    return [
+        schema.PersonCollaborator(
+            person_id=collaborator_id,
+            person_name=collaborator_name,
+            target_ids=sorted(target_ids),
+        )
+        for (collaborator_id, collaborator_name), target_ids in sorted(
+            collaborator_map.items(),
+            # Match the database ordering, where nulls come first
+            key=lambda item: (item[0][0], item[0][1] or ""),
+        )
+    ]
+
+
+def get_collaborator_adjacency(
+    graph: CollaboratorGraph, person_refs: Iterable[tuple[str, str]]
+) -> schema.CollaboratorAdjacency:
+    """
+    A compact form of the collaborator graph, listing each target once and referring
+    to them by index.
+    """
+    target_ids = sorted(graph.target_people)
+    target_indexes = {target_id: index for index, target_id in enumerate(target_ids)}
+    return schema.CollaboratorAdjacency(
+        targets=target_ids,
+        people=[
+            schema.CollaboratorAdjacencyPerson(
+                id=person_id,
+                name=person_name,
+                targets=sorted(
+                    target_indexes[target_id]
+                    for target_id in graph.person_targets.get(person_id, ())
+                    if target_id in target_indexes
+                ),
+            )
+            for person_id, person_name in person_refs
+        ],
+    )
+
+
 def get_people_from_roles(
     excluded_ids: Iterable[str] | None = None,
 ) -> peewee.ModelSelect:
@@ -171,19 +309,22 @@ def get_people_from_roles(
     )
 
 
-def get_graduation(model: models.Person) -> schema.PersonGraduated | None:
+def get_graduation(
+    model: models.Person, years_active: Iterable[int] | None = None
+) -> schema.PersonGraduated | None:
     """
     Either get a PersonGraduated from the provided year for the person, or make an
-    estimate based on their credits.
+    estimate based on their credits. Years active are queried unless given.
     """
     if model.graduated:
         return schema.PersonGraduated.from_year(model.graduated, estimated=False)
 
-    years_active_query = database.PersonRole.select(
-        database.PersonRole.target_year.distinct()
-    ).where(database.PersonRole.person_id == model.id)
-    years_active = [year.target_year for year in years_active_query]
-    last_year_active = max(years_active) if years_active else None
+    if years_active is None:
+        years_active_query = database.PersonRole.select(
+            database.PersonRole.target_year.distinct()
+        ).where(database.PersonRole.person_id == model.id)
+        years_active = [year.target_year for year in years_active_query]
+    last_year_active = max(years_active, default=None)
 
     if last_year_active:
         how_many_years_ago_was_that = datetime.date.today().year - last_year_active
@@ -210,18 +351,77 @@ def make_virtual_person_model(ref) -> models.Person:
     )
 
 
+class PersonDetailIndex(NamedTuple):
+    """Everyone's roles, grouped by person, to make person details without queries"""
+
+    # Rows from get_show_roles_query
+    show_roles: dict[str, list]
+    committee_roles: dict[str, list[database.PersonRole]]
+    years_active: dict[str, set[int]]
+
+
+def get_person_detail_index(
+    person_ids: list[str] | peewee.SelectQuery | None = None,
+) -> PersonDetailIndex:
+    """
+    Load the roles of everyone, or just the people in person_ids (a list or
+    subquery), in three queries.
+    """
+
+    def filter_people(query: peewee.ModelSelect) -> peewee.ModelSelect:
+        if person_ids is None:
+            return query
+        return query.where(database.PersonRole.person_id.in_(person_ids))
+
+    show_roles: dict[str, list] = defaultdict(list)
+    for result in filter_people(get_show_roles_query()):
+        show_roles[result.person_id].append(result)
+    committee_roles: dict[str, list[database.PersonRole]] = defaultdict(list)
+    for person_role in filter_people(get_committee_roles_query()):
+        committee_roles[person_role.person_id].append(person_role)
+    years_active: dict[str, set[int]] = defaultdict(set)
+    years_active_query = filter_people(
+        database.PersonRole.select(
+            database.PersonRole.person_id, database.PersonRole.target_year
+        ).tuples()
+    )
+    for person_id, target_year in years_active_query:
+        years_active[person_id].add(target_year)
+    return PersonDetailIndex(
+        show_roles=dict(show_roles),
+        committee_roles=dict(committee_roles),
+        years_active=dict(years_active),
+    )
+
+
 def make_person_detail(
     model: models.Person,
     content: str | None = None,
+    index: PersonDetailIndex | None = None,
 ) -> schema.PersonDetail:
+    """
+    Make the detail for a person, from an index of everyone's roles if given rather
+    than querying for this person's.
+    """
     assert model.id is not None, "Person model should have id by now"
+    if index is None:
+        graduated = get_graduation(model)
+        show_roles = get_person_show_roles(model.id)
+        committee_roles = get_person_committee_roles(model.id)
+    else:
+        graduated = get_graduation(model, index.years_active.get(model.id, set()))
+        show_roles = make_person_show_roles(index.show_roles.get(model.id, []))
+        committee_roles = [
+            make_person_committee_role(person_role)
+            for person_role in index.committee_roles.get(model.id, [])
+        ]
     return schema.PersonDetail(
         id=model.id,
         title=model.title,
         submitted=model.submitted,
         headshot=model.headshot,
-        graduated=get_graduation(model),
-        show_roles=get_person_show_roles(model.id),
-        committee_roles=get_person_committee_roles(model.id),
+        graduated=graduated,
+        show_roles=show_roles,
+        committee_roles=committee_roles,
         content=content,
     )
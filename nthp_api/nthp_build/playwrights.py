@@ -4,6 +4,7 @@ from typing import NamedTuple
 from slugify import slugify
 
 from nthp_api.nthp_build import database, people, schema
+from nthp_api.nthp_build.writer import RowWriter, insert_rows
 
 
 def get_play_id(name: str) -> str:
@@ -15,16 +16,27 @@ def get_playwright_id(name: str) -> str:
 
 
 def save_playwright_show(
-    play_name: str, playwright_name: str, show_id: str, student_written: bool
+    play_name: str,
+    playwright_name: str,
+    show_id: str,
+    student_written: bool,
+    writer: RowWriter | None = None,
 ) -> None:
-    database.PlaywrightShow.create(
-        play_id=get_play_id(play_name),
-        play_name=play_name,
-        playwright_id=get_playwright_id(playwright_name),
-        playwright_name=playwright_name,
-        show_id=show_id,
-        person_id=people.get_person_id(playwright_name) if student_written else None,
-    )
+    row = {
+        "play_id": get_play_id(play_name),
+        "play_name": play_name,
+        "playwright_id": get_playwright_id(playwright_name),
+        "playwright_name": playwright_name,
+        "show_id": show_id,
+        "person_id": people.get_person_id(playwright_name) if student_written else None,
+    }
+    insert_rows(database.PlaywrightShow, [row], writer)
+
+
+def delete_playwright_shows(show_id: str) -> None:
+    database.PlaywrightShow.delete().where(
+        database.PlaywrightShow.show_id == show_id
+    ).execute()
 
 
 PlaywrightShowMapping = dict[tuple[str, str], list[database.Show]]
@@ -42,6 +54,7 @@ def get_playwright_shows() -> PlaywrightShowMapping:
             database.PlaywrightShow.playwright_id,
             database.Show.year,
             database.Show.date_start,
+            database.Show.id,
         )
     )
     playwright_shows = defaultdict(list)
@@ -96,6 +109,7 @@ def get_play_shows() -> PlayShowMapping:
             database.PlaywrightShow.play_id,
             database.Show.year,
             database.Show.date_start,
+            database.Show.id,
         )
     )
     play_shows = defaultdict(list)
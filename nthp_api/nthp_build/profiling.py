@@ -0,0 +1,137 @@
+"""
+Wall time, CPU time, memory and counts of what was done for each phase of a build,
+written as a JSON report so build times can be tracked between builds. Phases are
+always recorded, the report and cProfile output of each phase are only written when
+a profile directory is set.
+"""
+
+import contextlib
+import cProfile
+import json
+import logging
+import resource
+import time
+from collections import Counter
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+from typing import NamedTuple
+
+from slugify import slugify
+
+from nthp_api.nthp_build.config import settings
+from nthp_api.nthp_build.version import get_version
+
+log = logging.getLogger(__name__)
+
+REPORT_FILE = "report.json"
+
+
+class Phase(NamedTuple):
+    # Such as load, dump or smugmug, or total for a whole step
+    group: str
+    name: str
+    wall_time: float
+    # Of this process and any worker processes that finished during the phase
+    cpu_time: float
+    # The most memory used by any one process so far, in kilobytes
+    max_rss_kb: int
+    # What was done, such as rows inserted or files written
+    counts: dict[str, int]
+
+
+# Phases recorded by this process, in the order they finished
+_phases: list[Phase] = []
+# Counts of the phases running in this process, innermost last
+_counts: list[Counter[str]] = []
+
+
+def get_cpu_time() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime + children.ru_utime + children.ru_stime
+
+
+def get_max_rss_kb() -> int:
+    return max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+
+
+def get_profile_path(group: str, name: str) -> Path | None:
+    if settings.profile_dir is None:
+        return None
+    settings.profile_dir.mkdir(parents=True, exist_ok=True)
+    return settings.profile_dir / f"{group}-{slugify(name)}.prof"
+
+
+@contextlib.contextmanager
+def profile(path: Path | None) -> Iterator[None]:
+    """Run cProfile over the block and save its stats to path, if there is one"""
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+@contextlib.contextmanager
+def phase(group: str, name: str, *, use_cprofile: bool = True) -> Iterator[None]:
+    """
+    Record a phase of the build. Only one cProfile profiler can run at a time, so
+    phases that contain other phases shouldn't use it.
+    """
+    counts: Counter[str] = Counter()
+    _counts.append(counts)
+    wall_tick = time.perf_counter()
+    cpu_tick = get_cpu_time()
+    try:
+        with profile(get_profile_path(group, name) if use_cprofile else None):
+            yield
+    finally:
+        _counts.pop()
+        record_phase(
+            Phase(
+                group=group,
+                name=name,
+                wall_time=time.perf_counter() - wall_tick,
+                cpu_time=get_cpu_time() - cpu_tick,
+                max_rss_kb=get_max_rss_kb(),
+                counts=dict(counts),
+            )
+        )
+
+
+def add_counts(counts: Mapping[str, int]) -> None:
+    """Add to the counts of the innermost phase running, if there is one"""
+    if _counts:
+        _counts[-1].update(counts)
+
+
+def record_phase(phase: Phase) -> None:
+    _phases.append(phase)
+
+
+def get_phases() -> list[Phase]:
+    return list(_phases)
+
+
+def write_report() -> Path | None:
+    """Write the phases recorded so far to the profile directory, if there is one"""
+    if settings.profile_dir is None:
+        return None
+    settings.profile_dir.mkdir(parents=True, exist_ok=True)
+    path = settings.profile_dir / REPORT_FILE
+    report = {
+        "version": get_version(),
+        "branch": settings.branch,
+        "phases": [phase._asdict() for phase in _phases],
+    }
+    path.write_text(json.dumps(report, indent=2))
+    log.info(f"Wrote build profile to {path}")
+    return path
@@ -28,6 +28,11 @@ class NthpSchema(BaseModel):
     model_config = RESPONSE_CONFIG
 
 
+def to_json(obj: BaseModel) -> str:
+    """Serialise an object as it's output by the API"""
+    return obj.json(by_alias=True, exclude_none=True, exclude_unset=True)
+
+
 class Location(NthpSchema):
     lat: float
     lon: float
@@ -297,6 +302,27 @@ class PersonCollaboratorCollection(BaseCollectionModel[PersonCollaborator]):
     pass
 
 
+class CollaboratorAdjacencyPerson(NthpSchema):
+    id: str
+    name: str | None = None
+    targets: list[int] = Field(
+        description="Indexes into the targets list of the shows and committees the "
+        "person has a role on",
+    )
+
+
+class CollaboratorAdjacency(NthpSchema):
+    """
+    Every person's collaborators in one document, people who share a target are
+    collaborators.
+    """
+
+    targets: list[str] = Field(
+        description="IDs of the shows and committees people have roles on",
+    )
+    people: list[CollaboratorAdjacencyPerson]
+
+
 class BaseTrivia(NthpSchema):
     quote: str = Field(
         title="Quote",
@@ -438,3 +464,17 @@ class SiteStats(NthpSchema):
         description="Number of bits of trivia or stories.",
         example=1234,
     )
+
+
+class ManifestFile(NthpSchema):
+    sha256: str = Field(description="Hex SHA-256 hash of the file's content.")
+    size: int = Field(description="Size of the file in bytes.")
+
+
+class Manifest(NthpSchema):
+    """Every file output by a build, for telling which have changed between builds"""
+
+    files: dict[str, ManifestFile] = Field(
+        description="Files by their path relative to the root of the API, sorted "
+        "by path. Doesn't include the manifest itself.",
+    )
@@ -1,6 +1,19 @@
+"""
+Search documents are collected by each dumper task and written to a shard file of
+JSON lines, the shards are then merged into a single output by the parent process.
+"""
+
+import os
+import tempfile
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
 from nthp_api.nthp_build import schema
 from nthp_api.nthp_build.parallel import DumperSharedState
 
+# Serialised documents added by the dumper task running in this process
+_documents: list[str] = []
+
 
 def add_document(
     state: DumperSharedState,
@@ -10,8 +23,35 @@ def add_document(
     image_id: str | None = None,
     **kwargs
 ):
-    state.search_documents.append(
-        schema.SearchDocument(
-            type=type, title=title, id=id, image_id=image_id, **kwargs
+    _documents.append(
+        schema.to_json(
+            schema.SearchDocument(
+                type=type, title=title, id=id, image_id=image_id, **kwargs
+            )
         )
     )
+
+
+def clear_documents() -> None:
+    _documents.clear()
+
+
+def write_shard(state: DumperSharedState) -> Path | None:
+    """Write documents added since the last shard to a new shard, if there are any"""
+    if not _documents:
+        return None
+    fd, path = tempfile.mkstemp(dir=state.search_shard_dir, suffix=".jsonl")
+    with os.fdopen(fd, "w") as f:
+        for document in _documents:
+            f.write(document)
+            f.write("\n")
+    _documents.clear()
+    return Path(path)
+
+
+def read_shards(paths: Iterable[Path]) -> Iterator[str]:
+    """Yield serialised documents from shards one at a time"""
+    for path in paths:
+        with path.open() as f:
+            for line in f:
+                yield line.rstrip("\n")
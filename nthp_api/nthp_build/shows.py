@@ -12,6 +12,7 @@ def get_show_query() -> peewee.Query:
         # all shows.
         database.Show.season_sort,
         database.Show.date_start,
+        database.Show.id,
     )
 
 
@@ -171,7 +172,8 @@ def get_show_detail(show_inst: database.Show) -> schema.ShowDetail:
     )
 
 
-def get_show_people_names(show: schema.ShowDetail) -> set[str]:
+def get_show_people_names(show: schema.ShowDetail) -> list[str]:
+    """Everyone in the cast and crew, sorted so the order is the same every build"""
     people_names = set()
     for credit in show.cast:
         if credit.person and credit.person.name is not None:
@@ -179,4 +181,4 @@ def get_show_people_names(show: schema.ShowDetail) -> set[str]:
     for person in show.crew:
         if person.person and person.person.name is not None:
             people_names.add(person.person.name)
-    return people_names
+    return sorted(people_names)
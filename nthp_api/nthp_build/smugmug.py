@@ -2,39 +2,94 @@ import asyncio
 import logging
 
 from nthp_api import smugmugger
-from nthp_api.nthp_build import database
+from nthp_api.nthp_build import database, profiling
 from nthp_api.nthp_build.assets import AssetSource, AssetType
 
 log = logging.getLogger(__name__)
+# Rows written per statement, well under SQLite's limit on bound variables
+WRITE_BATCH_SIZE = 100
 
 
-def get_albums_to_fetch():
-    return database.Asset.select().where(
-        database.Asset.asset_source == AssetSource.SMUGMUG,
-        database.Asset.asset_type == AssetType.ALBUM,
+def is_smugmug_album():
+    return (database.Asset.asset_source == AssetSource.SMUGMUG) & (
+        database.Asset.asset_type == AssetType.ALBUM
     )
 
 
-async def update_album(client: smugmugger.SmugMugClient, asset: database.Asset):
-    log.debug(f"Updating {asset.asset_id}")
-    image_collection = await smugmugger.get_album_images(client, asset.asset_id)
-    asset.asset_smugmug_data = image_collection.json(
-        exclude_unset=True, exclude_none=True
+def get_album_ids_query():
+    return (
+        database.Asset.select(database.Asset.asset_id)
+        .where(is_smugmug_album())
+        .distinct()
     )
-    asset.save()
-    return asset
+
+
+async def fetch_album(
+    client: smugmugger.SmugMugClient, cache: smugmugger.AlbumCache, album_id: str
+) -> str | None:
+    """
+    Fetch an album's images as they're stored, or None if it couldn't be fetched so
+    others can carry on
+    """
+    log.debug(f"Updating {album_id}")
+    try:
+        image_collection = await smugmugger.get_album_images(client, album_id, cache)
+    except smugmugger.SmugMugError:
+        log.exception(f"Failed to fetch album {album_id}")
+        return None
+    return image_collection.json(exclude_unset=True, exclude_none=True)
+
+
+def save_albums(album_images: dict[str, str]) -> None:
+    """
+    Store each album's images once, in one transaction. Albums no assets refer to
+    any more are removed, albums that couldn't be fetched keep their images.
+    """
+    rows = [
+        {"id": album_id, "images": images} for album_id, images in album_images.items()
+    ]
+    with database.db.atomic():
+        for i in range(0, len(rows), WRITE_BATCH_SIZE):
+            database.SmugMugAlbum.replace_many(rows[i : i + WRITE_BATCH_SIZE]).execute()
+        database.SmugMugAlbum.delete().where(
+            database.SmugMugAlbum.id.not_in(get_album_ids_query())
+        ).execute()
 
 
 async def async_main():
+    # The same album can be an asset of more than one show, so fetch each only once
+    album_ids = sorted(album_id for (album_id,) in get_album_ids_query().tuples())
+    cache = smugmugger.AlbumCache.load(album_ids)
     async with smugmugger.make_client() as client:
-        albums = get_albums_to_fetch()
-
-        assets_to_update = await asyncio.gather(
-            *[update_album(client, asset) for asset in albums]
-        )
+        try:
+            results = await asyncio.gather(
+                *[fetch_album(client, cache, album_id) for album_id in album_ids]
+            )
+        finally:
+            # Keep whatever was fetched, even if something went badly wrong
+            cache.save()
+        client.stats.log_summary()
 
-        log.info(f"Writing {len(assets_to_update)} assets (albums) to db")
+    album_images = {
+        album_id: images
+        for album_id, images in zip(album_ids, results, strict=True)
+        if images is not None
+    }
+    log.info(f"Writing {len(album_images)} albums to db")
+    save_albums(album_images)
+    failed_count = len(album_ids) - len(album_images)
+    profiling.add_counts(
+        {
+            "albums": len(album_ids),
+            "failed_albums": failed_count,
+            "requests": len(client.stats.durations),
+            "retries": client.stats.retries,
+        }
+    )
+    if failed_count:
+        log.error(f"Failed to fetch {failed_count} albums")
 
 
 def run():
-    asyncio.run(async_main())
+    with profiling.phase("smugmug", "albums"):
+        asyncio.run(async_main())
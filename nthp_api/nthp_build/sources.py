@@ -0,0 +1,138 @@
+"""Track which source files have been loaded, so unchanged ones can be skipped"""
+
+import hashlib
+import logging
+from collections.abc import Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+from nthp_api.nthp_build import database
+from nthp_api.nthp_build.config import settings
+from nthp_api.nthp_build.documents import DocumentPath
+
+log = logging.getLogger(__name__)
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+class SourceState(NamedTuple):
+    sha256: str | None
+    mtime_ns: int
+    size: int
+
+
+class ChangedDocument(NamedTuple):
+    path: DocumentPath
+    state: SourceState
+    # Not loaded before, so there's nothing to unload
+    is_new: bool = False
+
+
+class SourceChanges(NamedTuple):
+    changed: list[ChangedDocument]
+    unchanged: list[DocumentPath]
+    deleted: list[DocumentPath]
+
+
+def hash_file(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def get_source_file(doc_path: DocumentPath) -> Path:
+    return settings.content_root / doc_path.content_path
+
+
+def get_source_state(doc_path: DocumentPath, *, with_hash: bool = True) -> SourceState:
+    path = get_source_file(doc_path)
+    stat = path.stat()
+    return SourceState(
+        sha256=hash_file(path) if with_hash else None,
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+    )
+
+
+def get_loader_name(content_path: Path) -> str:
+    return str(content_path)
+
+
+def entry_to_document_path(entry: database.SourceDocument) -> DocumentPath:
+    content_path = Path(entry.content_path)
+    return DocumentPath(
+        path=settings.content_root / content_path,
+        id=entry.document_id,
+        content_path=content_path,
+        filename=content_path.name,
+        basename=content_path.stem,
+    )
+
+
+def get_source_changes(
+    loader_path: Path, doc_paths: Iterable[DocumentPath]
+) -> SourceChanges:
+    """
+    Compare documents against what was recorded when they were last loaded. A file is
+    only hashed if its size or modification time differ from the recorded values.
+    """
+    entries = {
+        entry.content_path: entry
+        for entry in database.SourceDocument.select().where(
+            database.SourceDocument.loader == get_loader_name(loader_path)
+        )
+    }
+    changed: list[ChangedDocument] = []
+    unchanged: list[DocumentPath] = []
+    for doc_path in doc_paths:
+        entry = entries.pop(str(doc_path.content_path), None)
+        state = get_source_state(doc_path, with_hash=False)
+        if entry and (entry.mtime_ns, entry.size) == (state.mtime_ns, state.size):
+            unchanged.append(doc_path)
+            continue
+        state = state._replace(sha256=hash_file(get_source_file(doc_path)))
+        if entry and entry.sha256 == state.sha256 and entry.document_id == doc_path.id:
+            # Touched but not modified, note the new mtime so we don't rehash it
+            record_source(loader_path, doc_path, state)
+            unchanged.append(doc_path)
+            continue
+        changed.append(ChangedDocument(doc_path, state, is_new=entry is None))
+    return SourceChanges(
+        changed=changed,
+        unchanged=unchanged,
+        deleted=[entry_to_document_path(entry) for entry in entries.values()],
+    )
+
+
+def get_all_sources(doc_paths: Iterable[DocumentPath]) -> SourceChanges:
+    """Treat every document as changed, used when doing a full load"""
+    return SourceChanges(
+        changed=[
+            ChangedDocument(doc_path, get_source_state(doc_path), is_new=True)
+            for doc_path in doc_paths
+        ],
+        unchanged=[],
+        deleted=[],
+    )
+
+
+def record_source(loader_path: Path, doc_path: DocumentPath, state: SourceState):
+    database.SourceDocument.replace(
+        content_path=str(doc_path.content_path),
+        loader=get_loader_name(loader_path),
+        document_id=doc_path.id,
+        sha256=state.sha256,
+        mtime_ns=state.mtime_ns,
+        size=state.size,
+    ).execute()
+
+
+def forget_source(doc_path: DocumentPath):
+    database.SourceDocument.delete().where(
+        database.SourceDocument.content_path == str(doc_path.content_path)
+    ).execute()
+
+
+def has_sources() -> bool:
+    return database.SourceDocument.select().exists()
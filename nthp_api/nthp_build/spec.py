@@ -20,7 +20,9 @@ def make_models_json_schema_models(
 PYDANTIC_JSON_SCHEMA = models_json_schema(
     make_models_json_schema_models(
         schema.AssetCollection,
+        schema.CollaboratorAdjacency,
         schema.HistoryRecordCollection,
+        schema.Manifest,
         schema.PersonCollaboratorCollection,
         schema.PersonCommitteeRoleListCollection,
         schema.PersonDetail,
@@ -152,6 +154,16 @@ SPEC = {
             "and build information.",
             model=schema.SiteStats,
         ),
+        "/manifest.json": make_basic_get_operation(
+            operation_id="getManifest",
+            tags=["site"],
+            summary="Get build manifest",
+            description="The content hash and size of every file in the API. Files "
+            "can be requested with their hash as a v query parameter, such as "
+            "/index.json?v={sha256}, to be cached as immutable by servers that "
+            "support it.",
+            model=schema.Manifest,
+        ),
         "/years/index.json": make_basic_get_operation(
             operation_id="getYearList",
             tags=["years"],
@@ -201,6 +213,14 @@ SPEC = {
             model=schema.PersonCollaboratorCollection,
             key="id",
         ),
+        "/collaborators.json": make_basic_get_operation(
+            operation_id="getCollaboratorAdjacency",
+            tags=["people"],
+            summary="Get all collaborators",
+            description="Every person's collaborators in one compact document. Only "
+            "present if the API was built with DUMP_COLLABORATOR_ADJACENCY set.",
+            model=schema.CollaboratorAdjacency,
+        ),
         "/roles/committee/{name}.json": make_detail_get_operation(
             operation_id="getPeopleByCommitteeRole",
             tags=["roles"],
@@ -287,11 +307,15 @@ SPEC = {
 }
 
 
+def get_spec_json() -> str:
+    return json.dumps(SPEC, indent=4)
+
+
 def write_spec(path: str | Path):
     if isinstance(path, str):
         path = Path(path)
     with path.open("w") as f:
-        json.dump(SPEC, f, indent=4)
+        f.write(get_spec_json())
 
 
 if __name__ == "__main__":
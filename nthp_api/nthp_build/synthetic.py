@@ -0,0 +1,227 @@
+"""
+Synthetic content trees shaped like the content repo, for benchmarking builds at
+scales the real content won't reach for a long time. Every document is valid against
+its model, and the same number of shows and seed always give the same tree.
+"""
+
+import datetime
+import random
+from pathlib import Path
+from typing import Any
+
+import yaml
+from slugify import slugify
+
+from nthp_api.nthp_build import years
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Cara", "Dan", "Eve", "Finn", "Gail", "Hal", "Isla", "Jack",
+    "Kate", "Liam", "Maya", "Ned", "Olive", "Pete", "Quinn", "Rosa", "Sam", "Tess",
+    "Umar", "Vera", "Will", "Xena", "Yusuf", "Zoe", "Amir", "Beth", "Cole", "Dina",
+]  # fmt: skip
+SURNAMES = [
+    "Bloggs", "Smith", "Froggs", "Jones", "Khan", "Lee", "Moss", "Nash", "Owen",
+    "Patel", "Quill", "Reid", "Shaw", "Tate", "Usher", "Vance", "Wood", "Young",
+    "Abbott", "Baker", "Chen", "Doyle", "Ellis", "Flynn", "Grant", "Hale", "Irwin",
+    "Joyce", "Kerr", "Lowe", "Mills", "Noble", "Olsen", "Price", "Rowe", "Sykes",
+]  # fmt: skip
+PLAYS = [
+    ("Hamlet", "William Shakespeare"),
+    ("The Tempest", "William Shakespeare"),
+    ("Twelfth Night", "William Shakespeare"),
+    ("The Seagull", "Anton Chekhov"),
+    ("Three Sisters", "Anton Chekhov"),
+    ("A Doll's House", "Henrik Ibsen"),
+    ("Blood Wedding", "Federico García Lorca"),
+    ("The Crucible", "Arthur Miller"),
+    ("Waiting for Godot", "Samuel Beckett"),
+    ("Top Girls", "Caryl Churchill"),
+    ("Arcadia", "Tom Stoppard"),
+    ("Blasted", "Sarah Kane"),
+    ("Posh", "Laura Wade"),
+    ("Jerusalem", "Jez Butterworth"),
+    ("The Importance of Being Earnest", "Oscar Wilde"),
+    ("Abigail's Party", "Mike Leigh"),
+]
+VENUES = [
+    "New Theatre",
+    "Djanogly Theatre",
+    "Nottingham Playhouse",
+    "Lakeside Arts Centre",
+    "Edinburgh Fringe",
+    "Trent Building",
+]
+SEASONS = ["Autumn", "Spring", "Summer", "Fringe"]
+CAST_ROLES = ["Lead", "Chorus", "Narrator", "Ensemble", "Understudy"]
+CREW_ROLES = [
+    "Director",
+    "Producer",
+    "Stage Manager",
+    "Lighting Design",
+    "Sound Design",
+    "Set Design",
+    "Costume",
+    "Publicity",
+]
+COMMITTEE_ROLES = ["President", "Treasurer", "Secretary", "Technical Director"]
+FIRST_YEAR = 1940
+LAST_YEAR = 2023
+# Most people are only in a few shows, a few are in a great many
+PEOPLE_PER_SHOW = 2
+# Of the people in shows, how many have their own page
+PEOPLE_WITH_PAGES = 0.5
+# Much faster than the pure Python dumper, if libyaml is available
+YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+def get_person_name(index: int) -> str:
+    """A unique name for every index, double-barrelled once single surnames run out"""
+    first_name = FIRST_NAMES[index % len(FIRST_NAMES)]
+    remaining = index // len(FIRST_NAMES)
+    surnames = [SURNAMES[remaining % len(SURNAMES)]]
+    while remaining := remaining // len(SURNAMES):
+        surnames.append(SURNAMES[remaining % len(SURNAMES)])
+    return f"{first_name} {'-'.join(surnames)}"
+
+
+def get_year(index: int, show_count: int) -> int:
+    """Shows are spread evenly over the years, in order"""
+    return FIRST_YEAR + index * (LAST_YEAR - FIRST_YEAR + 1) // show_count
+
+
+def write_document(path: Path, data: dict[str, Any], content: str = "") -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    front_matter = yaml.dump(
+        data, Dumper=YamlDumper, allow_unicode=True, sort_keys=False
+    )
+    path.write_text(f"---\n{front_matter}---\n{content}", encoding="utf-8")
+
+
+class ContentGenerator:
+    def __init__(self, show_count: int, seed: int = 0) -> None:
+        self.show_count = show_count
+        self.person_count = max(len(FIRST_NAMES), show_count * PEOPLE_PER_SHOW)
+        self.rng = random.Random(seed)
+
+    def pick_person(self) -> str:
+        # Squaring skews towards the start, so some people have many roles
+        return get_person_name(int(self.person_count * self.rng.random() ** 2))
+
+    def make_person_refs(self, roles: list[str], count: int) -> list[dict]:
+        return [
+            {"role": self.rng.choice(roles), "name": self.pick_person()}
+            for _ in range(count)
+        ]
+
+    def make_show(self, index: int, year: int) -> dict:
+        title, playwright = PLAYS[index % len(PLAYS)]
+        student_written = index % 11 == 0
+        if student_written:
+            title = "New Writing"
+        show: dict[str, Any] = {
+            "title": title,
+            "playwright": None if student_written else playwright,
+            "student_written": student_written,
+            "season": self.rng.choice(SEASONS),
+            "season_sort": index % 10,
+            "venue": self.rng.choice(VENUES),
+            "date_start": datetime.date(year, 10, 1)
+            + datetime.timedelta(days=self.rng.randrange(240)),
+            "cast": self.make_person_refs(CAST_ROLES, self.rng.randint(2, 15)),
+            "crew": self.make_person_refs(CREW_ROLES, self.rng.randint(1, 8)),
+            "assets": [
+                {"type": "poster", "image": f"poster{index}"},
+                {
+                    "type": "programme",
+                    "filename": f"programme{index}.pdf",
+                    "title": "Programme",
+                },
+            ],
+        }
+        if index % 3 == 0:
+            show["prod_shots"] = f"album{index}"
+        if index % 4 == 0:
+            show["trivia"] = [
+                {
+                    "quote": f"Something that happened during {title}.",
+                    "name": self.pick_person(),
+                    "submitted": datetime.date(2020, 1, 1),
+                }
+            ]
+        return show
+
+    def write_shows(self, root: Path) -> None:
+        for index in range(self.show_count):
+            year = get_year(index, self.show_count)
+            show = self.make_show(index, year)
+            show_id = slugify(f"{show['title']} {index}", separator="_")
+            write_document(
+                root / "_shows" / years.get_year_id(year) / f"{show_id}.md",
+                show,
+                f"# {show['title']}\n\nA production of **{show['title']}**.\n",
+            )
+
+    def write_people(self, root: Path) -> None:
+        for index in range(int(self.person_count * PEOPLE_WITH_PAGES)):
+            name = get_person_name(index)
+            person: dict[str, Any] = {"title": name}
+            if index % 2 == 0:
+                person["headshot"] = f"headshot{index}"
+            if index % 5 == 0:
+                person["graduated"] = FIRST_YEAR + index % (LAST_YEAR - FIRST_YEAR)
+            write_document(
+                root / "_people" / f"{slugify(name, separator='_')}.md",
+                person,
+                f"{name} was in some shows.\n",
+            )
+
+    def write_committees(self, root: Path) -> None:
+        for year in range(FIRST_YEAR, LAST_YEAR + 1):
+            write_document(
+                root / "_committees" / f"{years.get_year_id(year)}.md",
+                {
+                    "committee": [
+                        {"role": role, "name": self.pick_person()}
+                        for role in COMMITTEE_ROLES
+                    ]
+                },
+            )
+
+    def write_venues(self, root: Path) -> None:
+        for index, venue in enumerate(VENUES):
+            write_document(
+                root / "_venues" / f"{slugify(venue, separator='_')}.md",
+                {
+                    "title": venue,
+                    "built": 1900 + index * 10,
+                    "city": "Nottingham",
+                    "location": {"lat": 52.9 + index / 100, "lon": -1.2},
+                },
+                f"The {venue}.\n",
+            )
+
+    def write_history(self, root: Path) -> None:
+        path = root / "_data" / "history.yaml"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        records = [
+            {
+                "year": str(year),
+                "academic_year": years.get_year_id(year),
+                "title": f"Something happened in {year}",
+                "description": "A *notable* event.",
+            }
+            for year in range(FIRST_YEAR, LAST_YEAR + 1, 5)
+        ]
+        path.write_text(yaml.dump(records, Dumper=YamlDumper), encoding="utf-8")
+
+    def write(self, root: Path) -> None:
+        self.write_shows(root)
+        self.write_people(root)
+        self.write_committees(root)
+        self.write_venues(root)
+        self.write_history(root)
+
+
+def generate_content(root: Path, show_count: int, seed: int = 0) -> None:
+    """Write a content tree with the given number of shows, and people to match"""
+    ContentGenerator(show_count, seed).write(root)
@@ -1,4 +1,5 @@
 from nthp_api.nthp_build import database, models, people, schema
+from nthp_api.nthp_build.writer import RowWriter, insert_rows
 
 
 def save_trivia(  # noqa: PLR0913
@@ -9,6 +10,7 @@ def save_trivia(  # noqa: PLR0913
     target_image_id: str | None,
     target_year: int,
     trivia_list: list[models.Trivia],
+    writer: RowWriter | None = None,
 ) -> None:
     rows = []
     for trivia in trivia_list:
@@ -26,7 +28,14 @@ def save_trivia(  # noqa: PLR0913
                 "data": trivia.json(),
             }
         )
-    database.Trivia.insert_many(rows).execute()
+    insert_rows(database.Trivia, rows, writer)
+
+
+def delete_trivia(target_id: str, target_type: str) -> None:
+    database.Trivia.delete().where(
+        database.Trivia.target_id == target_id,
+        database.Trivia.target_type == target_type,
+    ).execute()
 
 
 def make_targeted_trivia(
@@ -48,8 +57,12 @@ def make_targeted_trivia(
 
 
 def make_person_trivia(person_id: str) -> list[schema.PersonTrivia]:
-    query = database.Trivia.select().where(
-        database.Trivia.person_id == person_id,
+    query = (
+        database.Trivia.select()
+        .where(database.Trivia.person_id == person_id)
+        .order_by(
+            database.Trivia.target_year, database.Trivia.target_id, database.Trivia.id
+        )
     )
     return [
         schema.PersonTrivia(
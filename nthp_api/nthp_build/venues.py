@@ -20,8 +20,15 @@ def get_show_venue_map(venue_query: ModelSelect) -> ShowVenueMap:
     """
     Returns a map of venue IDs to a list of shows for that venue.
     """
-    shows_per_venue_query = database.Show.select().where(
-        database.Show.venue_id << venue_query.select(database.Venue.id)
+    shows_per_venue_query = (
+        database.Show.select()
+        .where(database.Show.venue_id << venue_query.select(database.Venue.id))
+        .order_by(
+            database.Show.year,
+            database.Show.season_sort,
+            database.Show.date_start,
+            database.Show.id,
+        )
     )
     return {
         venue.id: [show for show in shows_per_venue_query if show.venue_id == venue.id]
@@ -0,0 +1,109 @@
+"""Buffered writing of rows, so they can be inserted in bulk rather than one by one"""
+
+import logging
+import sqlite3
+from collections import Counter, defaultdict
+from typing import Any
+
+import peewee
+
+log = logging.getLogger(__name__)
+
+Row = dict[str, Any]
+# How many rows to hold for a table before inserting them
+FLUSH_THRESHOLD = 10_000
+
+
+class DuplicateRowError(peewee.IntegrityError):
+    pass
+
+
+def get_max_variables() -> int:
+    """How many bound variables SQLite allows in a single statement"""
+    if sqlite3.sqlite_version_info >= (3, 32, 0):
+        return 32766
+    return 999
+
+
+def get_fields(model: type[peewee.Model]) -> dict[str, peewee.Field]:
+    return model._meta.fields  # noqa: SLF001, _meta is peewee's public metadata API
+
+
+def get_primary_key(model: type[peewee.Model]) -> peewee.Field:
+    return model._meta.primary_key  # noqa: SLF001
+
+
+def get_chunk_size(model: type[peewee.Model]) -> int:
+    return max(1, get_max_variables() // len(get_fields(model)))
+
+
+def has_natural_key(model: type[peewee.Model]) -> bool:
+    return not isinstance(get_primary_key(model), peewee.AutoField)
+
+
+class RowWriter:
+    """
+    Collects rows per table and inserts them with insert_many. Rows are inserted in
+    the order they were added, use as a context manager to flush on exit.
+
+    Primary keys that aren't auto-incrementing are checked as rows are added, so
+    duplicates are reported against the row that caused them rather than failing a
+    whole chunk when it's inserted.
+    """
+
+    def __init__(self) -> None:
+        self.rows: dict[type[peewee.Model], list[Row]] = defaultdict(list)
+        self.keys: dict[type[peewee.Model], set[Any]] = {}
+        self.counts: Counter[str] = Counter()
+
+    def __enter__(self) -> "RowWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.flush()
+
+    def get_keys(self, model: type[peewee.Model]) -> set[Any]:
+        if model not in self.keys:
+            # Include rows already in the table, such as from a previous load
+            query = model.select(get_primary_key(model)).tuples()
+            self.keys[model] = {row[0] for row in query}
+        return self.keys[model]
+
+    def add(self, model: type[peewee.Model], row: Row) -> None:
+        if has_natural_key(model):
+            key = row[get_primary_key(model).name]
+            keys = self.get_keys(model)
+            if key in keys:
+                raise DuplicateRowError(
+                    f"{model.__name__} with primary key {key} already exists"
+                )
+            keys.add(key)
+        self.rows[model].append(row)
+        if len(self.rows[model]) >= FLUSH_THRESHOLD:
+            self.flush_model(model)
+
+    def add_many(self, model: type[peewee.Model], rows: list[Row]) -> None:
+        for row in rows:
+            self.add(model, row)
+
+    def flush_model(self, model: type[peewee.Model]) -> None:
+        rows = self.rows.pop(model, [])
+        for chunk in peewee.chunked(rows, get_chunk_size(model)):
+            model.insert_many(chunk).execute()
+        self.counts[model.__name__] += len(rows)
+
+    def flush(self) -> None:
+        for model in list(self.rows):
+            self.flush_model(model)
+
+
+def insert_rows(
+    model: type[peewee.Model], rows: list[Row], writer: RowWriter | None = None
+) -> None:
+    """Add rows to a writer if given, otherwise insert them straight away"""
+    if writer is not None:
+        writer.add_many(model, rows)
+        return
+    with RowWriter() as immediate_writer:
+        immediate_writer.add_many(model, rows)
@@ -0,0 +1,17 @@
+from .config import settings
+from .server import StaticServer
+
+
+def make_server() -> StaticServer:
+    return StaticServer(
+        address=(settings.server_host, settings.server_port),
+        directory=settings.server_directory,
+        threads=settings.server_threads,
+        cache_bytes=settings.server_cache_bytes,
+        cache_control=settings.server_cache_control,
+        immutable_cache_control=settings.server_immutable_cache_control,
+        keep_alive_timeout=settings.server_keep_alive_timeout,
+    )
+
+
+__all__ = ["StaticServer", "make_server"]
@@ -0,0 +1,21 @@
+from pathlib import Path
+
+from pydantic_settings import BaseSettings
+
+
+class ServerSettings(BaseSettings):
+    server_directory: Path = Path("dist")
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    # Each thread serves one connection at a time, including idle keep-alive ones
+    server_threads: int = 32
+    # Idle keep-alive connections are closed after this many seconds
+    server_keep_alive_timeout: float = 5
+    # Total size of file contents to hold in memory
+    server_cache_bytes: int = 64 * 1024 * 1024
+    server_cache_control: str = "public, no-cache"
+    # For requests with the current hash of the file from the manifest
+    server_immutable_cache_control: str = "public, max-age=31536000, immutable"
+
+
+settings = ServerSettings()
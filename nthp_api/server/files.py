@@ -0,0 +1,79 @@
+"""An in-memory cache of the files being served"""
+
+import hashlib
+import os
+import stat
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+
+class StaticFile(NamedTuple):
+    content: bytes
+    # Hex SHA-256 of the content, as in the manifest written by the dumper
+    sha256: str
+    mtime_ns: int
+
+    @property
+    def etag(self) -> str:
+        """A strong ETag, the same content always gets the same ETag"""
+        return f'"{self.sha256}"'
+
+
+class FileCache:
+    """
+    A least recently used cache of file contents, bounded by their total size. Files
+    are checked for changes on each lookup, so a new dump is picked up straight away.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.files: OrderedDict[Path, StaticFile] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, path: Path) -> StaticFile | None:
+        try:
+            file_stat = path.stat()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not stat.S_ISREG(file_stat.st_mode):
+            return None
+        with self.lock:
+            cached = self.files.get(path)
+            if cached and (cached.mtime_ns, len(cached.content)) == (
+                file_stat.st_mtime_ns,
+                file_stat.st_size,
+            ):
+                self.files.move_to_end(path)
+                return cached
+        return self.load(path)
+
+    def load(self, path: Path) -> StaticFile | None:
+        try:
+            with path.open("rb") as f:
+                # Use the stat of what was read, in case the file was replaced
+                file_stat = os.fstat(f.fileno())
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        static_file = StaticFile(
+            content=content,
+            sha256=hashlib.sha256(content).hexdigest(),
+            mtime_ns=file_stat.st_mtime_ns,
+        )
+        if len(content) <= self.max_bytes:
+            self.put(path, static_file)
+        return static_file
+
+    def put(self, path: Path, static_file: StaticFile) -> None:
+        with self.lock:
+            previous = self.files.pop(path, None)
+            if previous:
+                self.current_bytes -= len(previous.content)
+            self.files[path] = static_file
+            self.current_bytes += len(static_file.content)
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self.files.popitem(last=False)
+                self.current_bytes -= len(evicted.content)
@@ -0,0 +1,262 @@
+"""
+Serves a dumped API. Connections are handled by a pool of threads and kept alive
+between requests. Responses have strong ETags so clients can revalidate cheaply,
+precompressed siblings are sent to clients that accept them and ranges are supported.
+Requests for a file with its hash from the manifest as the v query parameter can be
+cached forever, as a different hash is requested once the file changes.
+"""
+
+import logging
+import mimetypes
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from nthp_api.server.files import FileCache, StaticFile
+
+log = logging.getLogger(__name__)
+
+# Content-Encoding and file suffix of precompressed siblings, in order of preference
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+INDEX_FILE = "index.json"
+# Query parameter for the content hash of the requested file
+VERSION_PARAM = "v"
+
+
+class ByteRange(NamedTuple):
+    start: int
+    # Inclusive, as in the Range header
+    end: int
+
+
+class RangeNotSatisfiableError(Exception):
+    pass
+
+
+def get_quality(params: list[str]) -> float:
+    for param in params:
+        if param.startswith("q="):
+            try:
+                return float(param[2:])
+            except ValueError:
+                return 0
+    return 1
+
+
+def get_accepted_encodings(accept_encoding: str) -> set[str]:
+    """Encodings listed in an Accept-Encoding header, except those with q=0"""
+    accepted = set()
+    for value in accept_encoding.split(","):
+        name, *params = (part.strip() for part in value.split(";"))
+        if get_quality(params) > 0:
+            accepted.add(name.lower())
+    return accepted
+
+
+def parse_range(range_header: str, size: int) -> ByteRange | None:
+    """
+    Parse a Range header for a single range of bytes. Returns None if the header
+    should be ignored, such as for multiple ranges, which means sending everything.
+    """
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in ranges:
+        return None
+    first, _, last = ranges.strip().partition("-")
+    try:
+        if not first:
+            # A suffix range, the last n bytes
+            suffix_length = int(last)
+            if suffix_length <= 0:
+                raise RangeNotSatisfiableError
+            return ByteRange(max(0, size - suffix_length), size - 1)
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise RangeNotSatisfiableError
+    return ByteRange(start, end)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match uses"""
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StaticServer"
+
+    def setup(self) -> None:
+        # Close idle keep-alive connections, rather than holding a thread forever
+        self.request.settimeout(self.server.keep_alive_timeout)
+        super().setup()
+
+    def log_message(self, format: str, *args) -> None:
+        log.debug(f"{self.address_string()} {format % args}")
+
+    def do_GET(self) -> None:
+        self.serve(include_body=True)
+
+    def do_HEAD(self) -> None:
+        self.serve(include_body=False)
+
+    def do_OPTIONS(self) -> None:
+        self.send_response(HTTPStatus.NO_CONTENT)
+        self.send_cors_headers()
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def send_cors_headers(self) -> None:
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, HEAD, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "*")
+
+    def send_not_found(self, include_body: bool) -> None:
+        body = b'{"detail":"Not Found"}'
+        self.send_response(HTTPStatus.NOT_FOUND)
+        self.send_cors_headers()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def get_variant(self, path: Path) -> tuple[str | None, StaticFile | None]:
+        """Pick the precompressed sibling to send, if the client accepts one"""
+        accepted = get_accepted_encodings(self.headers.get("Accept-Encoding", ""))
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted:
+                static_file = self.server.files.get(path.with_name(path.name + suffix))
+                if static_file:
+                    return encoding, static_file
+        return None, self.server.files.get(path)
+
+    def is_current_version(self, path: Path) -> bool:
+        """If the request has the hash of the file's current content"""
+        query = parse_qs(urlsplit(self.path).query)
+        versions = query.get(VERSION_PARAM)
+        if not versions:
+            return False
+        static_file = self.server.files.get(path)
+        return static_file is not None and static_file.sha256 in versions
+
+    def get_cache_control(self, path: Path) -> str:
+        if self.is_current_version(path):
+            return self.server.immutable_cache_control
+        return self.server.cache_control
+
+    def serve(self, include_body: bool) -> None:
+        path = self.server.resolve(self.path)
+        encoding, static_file = self.get_variant(path) if path else (None, None)
+        if path is None or static_file is None:
+            self.send_not_found(include_body)
+            return
+
+        content = static_file.content
+        byte_range = None
+        status = HTTPStatus.OK
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match and etag_matches(if_none_match, static_file.etag):
+            status = HTTPStatus.NOT_MODIFIED
+        elif (
+            "Range" in self.headers
+            and self.headers.get("If-Range", static_file.etag) == static_file.etag
+        ):
+            try:
+                byte_range = parse_range(self.headers["Range"], len(content))
+            except RangeNotSatisfiableError:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_cors_headers()
+                self.send_header("Content-Range", f"bytes */{len(content)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if byte_range:
+                status = HTTPStatus.PARTIAL_CONTENT
+
+        self.send_response(status)
+        self.send_cors_headers()
+        self.send_header("ETag", static_file.etag)
+        self.send_header("Cache-Control", self.get_cache_control(path))
+        self.send_header("Vary", "Accept-Encoding")
+        if status == HTTPStatus.NOT_MODIFIED:
+            self.end_headers()
+            return
+        content_type, _ = mimetypes.guess_type(path.name)
+        self.send_header("Content-Type", content_type or "application/octet-stream")
+        self.send_header("Accept-Ranges", "bytes")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        if byte_range:
+            self.send_header(
+                "Content-Range",
+                f"bytes {byte_range.start}-{byte_range.end}/{len(content)}",
+            )
+            content = content[byte_range.start : byte_range.end + 1]
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(content)
+
+
+class StaticServer(HTTPServer):
+    """An HTTP server that hands each connection to a bounded pool of threads"""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        address: tuple[str, int],
+        *,
+        directory: Path,
+        threads: int,
+        cache_bytes: int,
+        cache_control: str,
+        immutable_cache_control: str,
+        keep_alive_timeout: float,
+    ) -> None:
+        super().__init__(address, RequestHandler)
+        self.directory = directory.resolve()
+        self.files = FileCache(cache_bytes)
+        self.cache_control = cache_control
+        self.immutable_cache_control = immutable_cache_control
+        self.keep_alive_timeout = keep_alive_timeout
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="nthp-serve"
+        )
+
+    def resolve(self, request_path: str) -> Path | None:
+        """Find the file for a request path, None if it's outside the directory"""
+        url_path = posixpath.normpath(unquote(urlsplit(request_path).path))
+        parts = [part for part in url_path.split("/") if part]
+        if any(part in (".", "..") for part in parts):
+            return None
+        path = self.directory.joinpath(*parts)
+        if path.is_dir():
+            path = path / INDEX_FILE
+        if not path.resolve().is_relative_to(self.directory):
+            return None
+        return path
+
+    def process_request(self, request, client_address) -> None:
+        self.executor.submit(self.process_request_in_thread, request, client_address)
+
+    def process_request_in_thread(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.executor.shutdown(wait=True)
@@ -1,9 +1,11 @@
-from .client import SmugMugClient, make_client
+from .client import SmugMugClient, SmugMugError, make_client
 from .schema import SmugMugAlbum, SmugMugImage, SmugMugImageCollection
-from .smugmug import get_album_images
+from .smugmug import AlbumCache, get_album_images
 
 __all__ = [
+    "AlbumCache",
     "SmugMugClient",
+    "SmugMugError",
     "SmugMugAlbum",
     "SmugMugImage",
     "SmugMugImageCollection",
@@ -1,4 +1,4 @@
-from nthp_api.smugmugger.client import SmugMugClient, get, get_pages
+from nthp_api.smugmugger.client import SmugMugClient, get, get_pages, parse_response
 from nthp_api.smugmugger.schema import (
     SmugMugAlbum,
     SmugMugImage,
@@ -7,14 +7,16 @@ from nthp_api.smugmugger.schema import (
 
 
 async def get_album(client: SmugMugClient, album_id: str) -> SmugMugAlbum:
-    response = await get(client, f"album/{album_id}")
-    return SmugMugAlbum(**response["Response"]["Album"])
+    url = f"album/{album_id}"
+    response = await get(client, url)
+    with parse_response(url):
+        return SmugMugAlbum(**response["Response"]["Album"])
 
 
 async def get_album_images(
     client: SmugMugClient, album_id: str
 ) -> SmugMugImageCollection:
-    images = await get_pages(
-        client, f"album/{album_id}!images", response_key="AlbumImage"
-    )
-    return SmugMugImageCollection([SmugMugImage(**image) for image in images])
+    url = f"album/{album_id}!images"
+    images = await get_pages(client, url, response_key="AlbumImage")
+    with parse_response(url):
+        return SmugMugImageCollection([SmugMugImage(**image) for image in images])
@@ -1,70 +1,218 @@
 import asyncio
 import contextlib
+import datetime
+import email.utils
 import logging
-from collections.abc import AsyncGenerator
+import random
+import time
+from collections.abc import AsyncGenerator, Iterator
 from http import HTTPStatus
 from typing import NamedTuple
+from urllib.parse import urlsplit
 
 import httpx
+import pydantic
 
 from nthp_api.smugmugger import schema
 from nthp_api.smugmugger.config import settings
+from nthp_api.smugmugger.limiter import AdaptiveLimiter
+from nthp_api.smugmugger.replay import ResponseArchive, make_key
+from nthp_api.smugmugger.stats import RequestStats
+
+try:
+    import h2
+except ImportError:  # pragma: no cover, depends on the environment
+    h2 = None
 
 log = logging.getLogger(__name__)
 PAGE_SIZE = 100
+SMUGMUG_API_HOST = "api.smugmug.com"
+# Statuses worth trying again, as the request may well succeed later
+RETRY_STATUSES = {
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+}
 
 
 class ConfigError(Exception):
     pass
 
 
-class SmugMugApiError(Exception):
+class SmugMugError(Exception):
+    """Base for errors from SmugMug, which only affect the album being fetched"""
+
+
+class SmugMugApiError(SmugMugError):
     pass
 
 
-class SmugMugNotFound(Exception):
+class SmugMugNotFound(SmugMugError):
     pass
 
 
-class SmugMugInvalidResponse(Exception):
+class SmugMugInvalidResponse(SmugMugError):
     pass
 
 
+@contextlib.contextmanager
+def parse_response(url: str) -> Iterator[None]:
+    """Errors parsing a response are raised as SmugMugInvalidResponse"""
+    try:
+        yield
+    except (pydantic.ValidationError, KeyError, TypeError) as e:
+        raise SmugMugInvalidResponse(f"Invalid response for {url}: {e}") from e
+
+
+def needs_api_key() -> bool:
+    """Only SmugMug needs a key, a replay server answers without one"""
+    return urlsplit(settings.smugmug_api_base).hostname == SMUGMUG_API_HOST
+
+
 def make_url(path: str) -> str:
-    return "https://api.smugmug.com/api/v2/" + path
+    return settings.smugmug_api_base + path
 
 
 class SmugMugClient(NamedTuple):
     client: httpx.AsyncClient
-    connection_limit: asyncio.Semaphore
+    connection_limit: AdaptiveLimiter
+    stats: RequestStats
+    # Where responses are recorded, if they are
+    archive: ResponseArchive | None = None
+
+
+def use_http2() -> bool:
+    if settings.smugmug_http2 and h2 is None:
+        log.warning("HTTP/2 needs the h2 package installed, using HTTP/1.1")
+        return False
+    return settings.smugmug_http2
+
+
+def make_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        # No more connections than requests that can be made at once
+        limits=httpx.Limits(
+            max_connections=settings.smugmug_connection_limit,
+            max_keepalive_connections=settings.smugmug_max_keepalive_connections,
+            keepalive_expiry=settings.smugmug_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(
+            settings.smugmug_timeout, connect=settings.smugmug_connect_timeout
+        ),
+        http2=use_http2(),
+    )
 
 
 @contextlib.asynccontextmanager
 async def make_client() -> AsyncGenerator[SmugMugClient, None]:
+    record_path = settings.smugmug_record_path
     client = SmugMugClient(
-        client=httpx.AsyncClient(),
-        connection_limit=asyncio.Semaphore(settings.smugmug_connection_limit),
+        client=make_http_client(),
+        connection_limit=AdaptiveLimiter(settings.smugmug_connection_limit),
+        stats=RequestStats(),
+        archive=ResponseArchive.load_or_create(record_path) if record_path else None,
+    )
+    try:
+        yield client
+    finally:
+        await client.client.aclose()
+        if record_path and client.archive:
+            client.archive.save(record_path)
+
+
+def get_backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter, so retries are spread out"""
+    max_delay = min(
+        settings.smugmug_retry_max_delay,
+        settings.smugmug_retry_base_delay * 2**attempt,
     )
-    yield client
-    await client.client.aclose()
+    return random.uniform(0, max_delay)
+
+
+def get_retry_after(response: httpx.Response) -> float | None:
+    """Seconds to wait from a Retry-After header, in either of its formats"""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is None:
+        return None
+    try:
+        delay = float(retry_after)
+    except ValueError:
+        try:
+            retry_at = email.utils.parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        delay = (
+            retry_at - datetime.datetime.now(tz=datetime.timezone.utc)
+        ).total_seconds()
+    return min(max(0, delay), settings.smugmug_retry_max_delay)
+
+
+async def request(client: SmugMugClient, url: str, params: dict) -> httpx.Response:
+    """Make a request, trying again if it fails in a way that might not last"""
+    attempt = 0
+    while True:
+        try:
+            async with client.connection_limit:
+                tick = time.perf_counter()
+                try:
+                    response = await client.client.get(
+                        make_url(url),
+                        params=params,
+                        headers={"Accept": "application/json"},
+                    )
+                except httpx.TransportError as e:
+                    client.stats.record(time.perf_counter() - tick, type(e).__name__)
+                    raise
+                client.stats.record(
+                    time.perf_counter() - tick,
+                    str(response.status_code),
+                    response.http_version,
+                )
+                if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+                    client.connection_limit.on_rate_limited()
+                elif response.is_success:
+                    client.connection_limit.on_success()
+        except httpx.TransportError as e:
+            if attempt >= settings.smugmug_max_retries:
+                raise SmugMugApiError(f"Request for {url} failed: {e!r}") from e
+            delay = get_backoff_delay(attempt)
+            log.warning(f"Request for {url} failed ({e!r}), retrying in {delay:.1f}s")
+        else:
+            if (
+                response.status_code not in RETRY_STATUSES
+                or attempt >= settings.smugmug_max_retries
+            ):
+                return response
+            delay = get_retry_after(response) or get_backoff_delay(attempt)
+            log.warning(
+                f"Request for {url} got {response.status_code}, "
+                f"retrying in {delay:.1f}s"
+            )
+        # Wait outside the limit, so other requests can go ahead
+        client.stats.record_retry()
+        await asyncio.sleep(delay)
+        attempt += 1
 
 
 async def get(client: SmugMugClient, url, params=None):
-    if not settings.smugmug_api_key:
+    if not settings.smugmug_api_key and needs_api_key():
         raise ConfigError("No SmugMug API key configured")
-    if params is None:
-        params = {}
-    params["APIKey"] = settings.smugmug_api_key
-    async with client.connection_limit:
-        response = await client.client.get(
-            make_url(url), params=params, headers={"Accept": "application/json"}
-        )
+    request_params = dict(params or {})
+    if settings.smugmug_api_key:
+        request_params["APIKey"] = settings.smugmug_api_key
+    response = await request(client, url, params=request_params)
     try:
         data = response.json()
     except ValueError as e:
         log.exception(response.text)
         raise SmugMugInvalidResponse from e
-    response_obj = schema.SmugMugResponse(**data)
+    # Failures that might not last aren't worth replaying
+    if client.archive is not None and response.status_code not in RETRY_STATUSES:
+        client.archive.record(make_key(url, params or {}), response.status_code, data)
+    with parse_response(url):
+        response_obj = schema.SmugMugResponse(**data)
     if not response.is_success:
         if response.status_code == HTTPStatus.NOT_FOUND:
             raise SmugMugNotFound(response_obj.Message)
@@ -72,26 +220,48 @@ async def get(client: SmugMugClient, url, params=None):
     return data
 
 
+def get_page_starts(pages: schema.SmugMugPages) -> list[int]:
+    """The start of every page after the first"""
+    return list(range(pages.Start + PAGE_SIZE, pages.Total + 1, PAGE_SIZE))
+
+
+async def get_page(
+    client: SmugMugClient, url: str, start: int, params: dict | None = None
+) -> dict:
+    return await get(
+        client, url, params={**(params or {}), "start": start, "count": PAGE_SIZE}
+    )
+
+
 async def get_pages(
     client: SmugMugClient, url: str, response_key: str, params: dict | None = None
 ):
     """
-    Fetch all items from a collection by iterating over pages.
+    Fetch all items from a collection. The first page says how many items there are,
+    the rest of the pages are then fetched at the same time.
     """
-    if not params:
-        params = {}
-    start = 1
-    wanted_data = []
-    while True:
-        params["start"] = start
-        params["count"] = PAGE_SIZE
-        data = await get(client, url, params=params)
-        response = schema.SmugMugResponse(**data)
-        assert response.Response.Pages is not None, "No Pages object in response"
-        pages = response.Response.Pages
-        assert pages.RequestedCount == PAGE_SIZE
-        wanted_data.extend(data["Response"][response_key])
-        if not pages.NextPage:
-            break
-        start += PAGE_SIZE
+    data = await get_page(client, url, start=1, params=params)
+    response = schema.SmugMugResponse(**data)
+    pages = response.Response.Pages
+    if pages is None:
+        raise SmugMugInvalidResponse(f"No Pages object in response for {url}")
+    if pages.RequestedCount != PAGE_SIZE:
+        raise SmugMugInvalidResponse(
+            f"Asked for {PAGE_SIZE} items per page of {url}, "
+            f"got {pages.RequestedCount}"
+        )
+    with parse_response(url):
+        wanted_data = list(data["Response"][response_key])
+    if not pages.NextPage:
+        return wanted_data
+    # Results come back in the order they were requested, so items stay in order
+    other_pages = await asyncio.gather(
+        *(
+            get_page(client, url, start=start, params=params)
+            for start in get_page_starts(pages)
+        )
+    )
+    with parse_response(url):
+        for page_data in other_pages:
+            wanted_data.extend(page_data["Response"].get(response_key, []))
     return wanted_data
@@ -1,3 +1,5 @@
+from pathlib import Path
+
 from pydantic_settings import BaseSettings
 
 
@@ -7,7 +9,29 @@ class SmugMuggerSettings(BaseSettings):
     # Should we actually hit SmugMug API if needed?
     # If not, we'll just use the cached data.
     smugmug_fetch: bool = True
+    # Point at a replay server to build without the network, see replay.py
+    smugmug_api_base: str = "https://api.smugmug.com/api/v2/"
+    # Record responses to this archive, to replay later
+    smugmug_record_path: Path | None = None
+    # Most requests to make at once, lowered while SmugMug is rate limiting us
     smugmug_connection_limit: int = 10
+    # Requests that fail with a rate limit, server or connection error are retried
+    # this many times, waiting longer each time
+    smugmug_max_retries: int = 5
+    smugmug_retry_base_delay: float = 0.5
+    smugmug_retry_max_delay: float = 60
+    # Idle connections kept open for reuse, and for how many seconds
+    smugmug_max_keepalive_connections: int = 10
+    smugmug_keepalive_expiry: float = 30
+    # Multiplex requests over one connection, needs the h2 package installed
+    smugmug_http2: bool = False
+    # Seconds to wait to connect, and for each read, write or pooled connection
+    smugmug_connect_timeout: float = 10
+    smugmug_timeout: float = 30
+    # Cached albums fetched longer ago than this are checked for changes, by fetching
+    # just the album to compare when its images were last updated. Cached albums are
+    # used forever if not set.
+    smugmug_max_age_hours: float | None = None
 
 
 settings = SmugMuggerSettings()
@@ -0,0 +1,36 @@
+import asyncio
+
+
+class AdaptiveLimiter:
+    """
+    Limits how many requests are made at once. The limit halves each time the API
+    says we're making too many requests, and grows back by one after a limit's worth
+    of requests in a row have succeeded, up to max_limit.
+    """
+
+    def __init__(self, max_limit: int) -> None:
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self.active = 0
+        self.successes = 0
+        self.condition = asyncio.Condition()
+
+    async def __aenter__(self) -> None:
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def __aexit__(self, *exc_info) -> None:
+        async with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def on_success(self) -> None:
+        self.successes += 1
+        if self.successes >= self.limit and self.limit < self.max_limit:
+            self.limit += 1
+            self.successes = 0
+
+    def on_rate_limited(self) -> None:
+        self.limit = max(1, self.limit // 2)
+        self.successes = 0
@@ -0,0 +1,136 @@
+"""
+Record SmugMug responses to an archive, and replay them from a local stand-in for
+the API. Point the client at the stand-in with SMUGMUG_API_BASE for builds that
+don't need the network, or to benchmark syncing albums against a steady latency.
+"""
+
+import gzip
+import json
+import logging
+import time
+from collections.abc import Mapping
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, NamedTuple
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit
+
+log = logging.getLogger(__name__)
+
+ARCHIVE_VERSION = 1
+# Query parameters that don't change the response, and shouldn't be recorded
+IGNORED_PARAMS = {"APIKey"}
+# Path of the API on the stand-in, as on SmugMug
+API_PREFIX = "/api/v2/"
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def make_key(path: str, params: Mapping[str, Any]) -> str:
+    """Identify a request by its path relative to the API and its parameters"""
+    query = urlencode(
+        sorted(
+            (name, str(value))
+            for name, value in params.items()
+            if name not in IGNORED_PARAMS
+        )
+    )
+    return f"{path}?{query}" if query else path
+
+
+class RecordedResponse(NamedTuple):
+    status: int
+    body: Any
+
+
+class ResponseArchive:
+    """Responses by request, stored as gzip compressed JSON"""
+
+    def __init__(self, responses: dict[str, RecordedResponse] | None = None) -> None:
+        self.responses = responses or {}
+
+    @classmethod
+    def load(cls, path: Path) -> "ResponseArchive":
+        with gzip.open(path, "rt") as f:
+            archive = json.load(f)
+        if archive.get("version") != ARCHIVE_VERSION:
+            raise ArchiveError(f"Unsupported archive version in {path}")
+        return cls(
+            {
+                key: RecordedResponse(response["status"], response["body"])
+                for key, response in archive["responses"].items()
+            }
+        )
+
+    @classmethod
+    def load_or_create(cls, path: Path) -> "ResponseArchive":
+        return cls.load(path) if path.exists() else cls()
+
+    def save(self, path: Path) -> None:
+        archive = {
+            "version": ARCHIVE_VERSION,
+            "responses": {
+                key: {"status": response.status, "body": response.body}
+                for key, response in sorted(self.responses.items())
+            },
+        }
+        # No mtime, so the same responses always make the same archive
+        with gzip.GzipFile(path, "wb", mtime=0) as f:
+            f.write(json.dumps(archive, separators=(",", ":")).encode())
+        log.info(f"Saved {len(self.responses)} SmugMug responses to {path}")
+
+    def record(self, key: str, status: int, body: Any) -> None:
+        self.responses[key] = RecordedResponse(status, body)
+
+    def get(self, key: str) -> RecordedResponse | None:
+        return self.responses.get(key)
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Serves responses from an archive, waiting latency seconds before each one"""
+
+    daemon_threads = True
+
+    def __init__(
+        self, address: tuple[str, int], archive: ResponseArchive, latency: float = 0
+    ) -> None:
+        super().__init__(address, ReplayRequestHandler)
+        self.archive = archive
+        self.latency = latency
+
+    @property
+    def api_base(self) -> str:
+        """What to set SMUGMUG_API_BASE to, to use this server"""
+        host, port = self.socket.getsockname()[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: ReplayServer
+
+    def log_message(self, format: str, *args) -> None:
+        log.debug(f"{self.address_string()} {format % args}")
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        path = unquote(url.path).removeprefix(API_PREFIX)
+        key = make_key(path, dict(parse_qsl(url.query)))
+        response = self.server.archive.get(key) or RecordedResponse(
+            HTTPStatus.NOT_FOUND,
+            {
+                "Code": HTTPStatus.NOT_FOUND,
+                "Message": f"Not in archive: {key}",
+                "Response": {"Uri": url.path},
+            },
+        )
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        body = json.dumps(response.body, separators=(",", ":")).encode()
+        self.send_response(response.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
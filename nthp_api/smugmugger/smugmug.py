@@ -1,8 +1,8 @@
 import datetime
 import json
 import logging
-
-import peewee
+from collections.abc import Iterable
+from typing import Any
 
 import nthp_api.smugmugger.album
 from nthp_api.smugmugger import database
@@ -17,41 +17,126 @@ from nthp_api.smugmugger.schema import (
 log = logging.getLogger(__name__)
 
 
-def get_cached_album_images(album_id: str) -> SmugMugImageCollection | None:
-    try:
-        cached_result = database.SmugMugResponse.get(
-            database.SmugMugResponse.id == album_id
-        )
-        return SmugMugImageCollection(
-            [SmugMugImage(**image) for image in json.loads(cached_result.data)]
+# Rows of the cache are handled as dicts, which can be written back in bulk
+CachedResponse = dict[str, Any]
+# Rows written per statement, well under SQLite's limit on bound variables
+WRITE_BATCH_SIZE = 100
+
+
+class AlbumCache:
+    """
+    Cached album images for a set of albums, read in one query up front and written
+    back in one transaction at the end, so fetching albums doesn't wait on the
+    database.
+    """
+
+    def __init__(self, responses: dict[str, CachedResponse]) -> None:
+        self.responses = responses
+        self.updated_ids: set[str] = set()
+
+    @classmethod
+    def load(cls, album_ids: Iterable[str]) -> "AlbumCache":
+        query = database.SmugMugResponse.select().where(
+            database.SmugMugResponse.id.in_(list(set(album_ids)))
         )
-    except peewee.DoesNotExist:
-        return None
+        return cls({response["id"]: response for response in query.dicts()})
+
+    def get(self, album_id: str) -> CachedResponse | None:
+        return self.responses.get(album_id)
+
+    def put(self, response: CachedResponse) -> None:
+        self.responses[response["id"]] = response
+        self.updated_ids.add(response["id"])
+
+    def save(self) -> None:
+        """Write back the responses that have been updated since the last save"""
+        updates = [self.responses[album_id] for album_id in sorted(self.updated_ids)]
+        with database.db.atomic():
+            for i in range(0, len(updates), WRITE_BATCH_SIZE):
+                database.SmugMugResponse.replace_many(
+                    updates[i : i + WRITE_BATCH_SIZE]
+                ).execute()
+        self.updated_ids.clear()
+        log.debug(f"Saved {len(updates)} cached albums")
 
 
-def upsert_cached_album_images(
+def parse_cached_album_images(
+    cached_result: CachedResponse,
+) -> SmugMugImageCollection:
+    return SmugMugImageCollection(
+        [SmugMugImage(**image) for image in json.loads(cached_result["data"])]
+    )
+
+
+def parse_cached_datetime(value: datetime.datetime | str) -> datetime.datetime:
+    """
+    Peewee can't parse datetimes stored with a timezone so gives them back as
+    strings. Older versions stored last_fetched without one, in local time.
+    """
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.astimezone(datetime.timezone.utc)
+    return value
+
+
+def is_cache_stale(cached_result: CachedResponse, now: datetime.datetime) -> bool:
+    if settings.smugmug_max_age_hours is None:
+        return False
+    max_age = datetime.timedelta(hours=settings.smugmug_max_age_hours)
+    return now - parse_cached_datetime(cached_result["last_fetched"]) > max_age
+
+
+def make_cached_response(
     album_id: str, album: SmugMugAlbum, album_images: SmugMugImageCollection
-):
-    """Either create or update cache for an album's images."""
-    database.SmugMugResponse.replace(
-        id=album_id,
-        last_updated=album.ImagesLastUpdated,
-        last_fetched=datetime.datetime.now(),
-        data=album_images.json(),
-    ).execute()
+) -> CachedResponse:
+    return {
+        "id": album_id,
+        "last_updated": album.ImagesLastUpdated,
+        "last_fetched": datetime.datetime.now(tz=datetime.timezone.utc),
+        "data": album_images.json(),
+    }
 
 
 async def get_album_images(
-    client: SmugMugClient, album_id: str
+    client: SmugMugClient, album_id: str, cache: AlbumCache | None = None
 ) -> SmugMugImageCollection:
-    if cached_result := get_cached_album_images(album_id):
-        return cached_result
+    """
+    Get an album's images, from the cache if it's fresh. When fetching many albums
+    share a cache between them and save it at the end, otherwise the album's cache
+    is read and written on its own.
+    """
+    if cache is None:
+        cache = AlbumCache.load([album_id])
+        album_images = await get_album_images(client, album_id, cache)
+        cache.save()
+        return album_images
+    cached_result = cache.get(album_id)
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    # Everything is fetched while recording, so the archive has every album
+    recording = settings.smugmug_record_path is not None
+    if cached_result and not recording and not is_cache_stale(cached_result, now):
+        return parse_cached_album_images(cached_result)
     if not settings.smugmug_fetch:
+        if cached_result:
+            return parse_cached_album_images(cached_result)
+        log.warning(f"Album {album_id} isn't cached and fetching is disabled")
         return SmugMugImageCollection()
-    log.info("Fetching album images for %s", album_id)
     album = await nthp_api.smugmugger.album.get_album(client, album_id)
+    # Only the album is needed to tell if the images have changed, which is much
+    # cheaper than fetching every page of images
+    if (
+        cached_result
+        and not recording
+        and album.ImagesLastUpdated
+        == parse_cached_datetime(cached_result["last_updated"])
+    ):
+        log.debug("Album images for %s are unchanged", album_id)
+        cache.put({**cached_result, "last_fetched": now})
+        return parse_cached_album_images(cached_result)
+    log.info("Fetching album images for %s", album_id)
     album_images = await nthp_api.smugmugger.album.get_album_images(client, album_id)
-    upsert_cached_album_images(album_id, album, album_images)
+    cache.put(make_cached_response(album_id, album, album_images))
     log.info("Fetched album images for %s", album_id)
     return album_images
 
@@ -0,0 +1,55 @@
+import logging
+import math
+from collections import Counter
+
+log = logging.getLogger(__name__)
+
+
+def get_percentile(sorted_values: list[float], percentile: float) -> float:
+    """Nearest rank percentile of values that are already sorted"""
+    rank = max(1, math.ceil(percentile / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class RequestStats:
+    """Latency and outcome of every request made by a client, to report at the end"""
+
+    def __init__(self) -> None:
+        self.durations: list[float] = []
+        # By status code, or the name of the exception for requests that failed
+        self.outcomes: Counter[str] = Counter()
+        self.http_versions: Counter[str] = Counter()
+        self.retries = 0
+
+    def record(
+        self, duration: float, outcome: str, http_version: str | None = None
+    ) -> None:
+        self.durations.append(duration)
+        self.outcomes[outcome] += 1
+        if http_version:
+            self.http_versions[http_version] += 1
+
+    def record_retry(self) -> None:
+        self.retries += 1
+
+    def log_summary(self) -> None:
+        if not self.durations:
+            log.info("No SmugMug requests made")
+            return
+        durations = sorted(self.durations)
+        log.info(
+            f"Made {len(durations)} SmugMug requests with {self.retries} retries, "
+            f"{sum(durations):.2f} seconds in total"
+        )
+        log.info(
+            f"Request latency: mean {sum(durations) / len(durations):.3f}s, "
+            f"p50 {get_percentile(durations, 50):.3f}s, "
+            f"p95 {get_percentile(durations, 95):.3f}s, "
+            f"max {durations[-1]:.3f}s"
+        )
+        log.info(
+            "Responses: "
+            + ", ".join(f"{key} x{count}" for key, count in self.outcomes.most_common())
+            + "; protocols: "
+            + ", ".join(f"{key} x{count}" for key, count in self.http_versions.items())
+        )
@@ -0,0 +1,39 @@
+import gzip
+
+from nthp_api.nthp_build import compression
+
+CONTENT = b'{"title": "The Tempest"}' * 100
+
+
+def test_compress_file(tmp_path):
+    path = tmp_path / "show.json"
+    path.write_bytes(CONTENT)
+    sibling_paths = compression.compress_file(path)
+    gzip_path = tmp_path / "show.json.gz"
+    assert gzip_path in sibling_paths
+    assert gzip.decompress(gzip_path.read_bytes()) == CONTENT
+
+
+def test_compress_file_is_deterministic(tmp_path):
+    path = tmp_path / "show.json"
+    path.write_bytes(CONTENT)
+    compression.compress_file(path)
+    first = (tmp_path / "show.json.gz").read_bytes()
+    compression.compress_file(path)
+    assert (tmp_path / "show.json.gz").read_bytes() == first
+
+
+def test_small_files_are_not_compressed(tmp_path):
+    path = tmp_path / "show.json"
+    path.write_bytes(b"{}")
+    assert compression.compress_file(path) == []
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_existing_siblings_are_kept_without_overwrite(tmp_path):
+    path = tmp_path / "show.json"
+    path.write_bytes(CONTENT)
+    gzip_path = tmp_path / "show.json.gz"
+    gzip_path.write_bytes(b"existing")
+    assert gzip_path in compression.compress_file(path, overwrite=False)
+    assert gzip_path.read_bytes() == b"existing"
@@ -0,0 +1,79 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from nthp_api.nthp_build import content, content_cache
+from nthp_api.nthp_build.config import settings
+
+
+@pytest.fixture()
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "content_cache_dir", tmp_path)
+    return tmp_path
+
+
+def test_disabled_by_default():
+    assert not content_cache.is_enabled()
+
+
+def test_get_cache_key_depends_on_all_parts():
+    assert content_cache.get_cache_key("a", "bc") != content_cache.get_cache_key(
+        "ab", "c"
+    )
+
+
+def test_get_missing(cache_dir):
+    assert content_cache.get(content_cache.get_cache_key("missing")) is None
+
+
+def test_put_and_get(cache_dir):
+    key = content_cache.get_cache_key("present")
+    content_cache.put(key, "<p>Hello</p>")
+    assert content_cache.get(key) == "<p>Hello</p>"
+
+
+def test_put_and_get_non_ascii(cache_dir):
+    key = content_cache.get_cache_key("non-ascii")
+    content_cache.put(key, "<p>Nëd Thöoter “Hamlet”</p>")
+    assert content_cache.get_entry_path(key).read_bytes().decode("utf-8") == (
+        "<p>Nëd Thöoter “Hamlet”</p>"
+    )
+    assert content_cache.get(key) == "<p>Nëd Thöoter “Hamlet”</p>"
+
+
+def test_get_entry_pruned_after_read(cache_dir, monkeypatch):
+    key = content_cache.get_cache_key("pruned")
+    content_cache.put(key, "<p>Hello</p>")
+    read_text = Path.read_text
+
+    def read_then_prune(path, *args, **kwargs):
+        value = read_text(path, *args, **kwargs)
+        path.unlink()
+        return value
+
+    monkeypatch.setattr(Path, "read_text", read_then_prune)
+    assert content_cache.get(key) == "<p>Hello</p>"
+    assert not content_cache.get_entry_path(key).exists()
+
+
+def test_prune_removes_least_recently_used(cache_dir):
+    keys = [content_cache.get_cache_key(str(i)) for i in range(4)]
+    for age, key in enumerate(keys):
+        content_cache.put(key, key)
+        os.utime(content_cache.get_entry_path(key), ns=(0, (100 - age) * 10**9))
+    # Using the oldest entry makes it the most recently used
+    content_cache.get(keys[3])
+    assert content_cache.prune(max_entries=2) == 2  # noqa: PLR2004
+    assert content_cache.get(keys[0]) is not None
+    assert content_cache.get(keys[1]) is None
+    assert content_cache.get(keys[2]) is None
+    assert content_cache.get(keys[3]) is not None
+
+
+def test_markdown_conversion_uses_cache(cache_dir):
+    assert content.markdown_to_html("**1**") == "<p><strong>1</strong></p>"
+    assert content.markdown_to_plaintext("**1**") == "1"
+    assert len(list(cache_dir.glob("*/*"))) == 2  # noqa: PLR2004
+    assert content.markdown_to_html("**1**") == "<p><strong>1</strong></p>"
+    assert content.markdown_to_plaintext("**1**") == "1"
@@ -0,0 +1,101 @@
+import peewee
+import pytest
+
+from nthp_api.nthp_build import database
+from nthp_api.nthp_build.config import settings
+
+
+@pytest.fixture()
+def file_db(tmp_path, monkeypatch):
+    path = tmp_path / "nthp.db"
+    previous_database = database.db.database
+    previous_pragmas = database.db._pragmas  # noqa: SLF001
+    monkeypatch.setattr(settings, "db_uri", str(path))
+    database.db.init(str(path))
+    try:
+        yield path
+    finally:
+        database.db.close()
+        database.db.init(previous_database, pragmas=previous_pragmas)
+
+
+def add_venue():
+    database.Venue.create(id="new_theatre", name="New Theatre", data="{}")
+
+
+def test_init_db_creates_current_schema(file_db):
+    database.init_db()
+    assert database.is_schema_current()
+    assert database.db.pragma("journal_mode") == "wal"
+
+
+def test_init_db_keeps_rows(file_db):
+    database.init_db()
+    add_venue()
+    database.db.close()
+    database.init_db()
+    assert database.Venue.select().count() == 1
+
+
+def test_init_db_create_clears_rows(file_db):
+    database.init_db()
+    add_venue()
+    database.init_db(create=True)
+    assert database.Venue.select().count() == 0
+
+
+def test_outdated_schema(file_db):
+    database.init_db()
+    database.db.pragma("user_version", database.SCHEMA_VERSION - 1)
+    assert not database.is_schema_current()
+
+
+def test_open_read_only(file_db):
+    database.init_db()
+    add_venue()
+    database.close_before_fork()
+    database.open_read_only()
+    assert database.Venue.select().count() == 1
+    with pytest.raises(peewee.OperationalError):
+        add_venue()
+
+
+def test_pragma_profile(file_db, monkeypatch):
+    monkeypatch.setattr(settings, "db_pragmas", {"cache_size": -1024})
+    database.init_db()
+    database.use_pragma_profile("load")
+    assert database.db.pragma("synchronous") == 0
+    assert database.db.pragma("cache_size") == -1024  # noqa: PLR2004
+    # Kept for connections opened later
+    database.db.close()
+    assert database.db.pragma("synchronous") == 0
+
+
+def test_dump_profile_is_read_only(file_db):
+    database.init_db()
+    database.use_pragma_profile("dump")
+    with pytest.raises(peewee.OperationalError):
+        add_venue()
+
+
+def get_index_names(table: str) -> set[str]:
+    return {index.name for index in database.db.get_indexes(table)}
+
+
+def test_init_db_create_defers_indexes(file_db):
+    database.init_db(create=True)
+    assert get_index_names("personrole") == set()
+    database.create_indexes()
+    assert get_index_names("personrole") == {
+        "personrole_person_id_target_type",
+        "personrole_target_type_target_id",
+        "personrole_target_type_role",
+    }
+    assert database.db.table_exists("sqlite_stat1")
+
+
+def test_create_indexes_again(file_db):
+    database.init_db(create=True)
+    database.create_indexes()
+    database.create_indexes()
+    assert len(get_index_names("asset")) == 2  # noqa: PLR2004
@@ -0,0 +1,188 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from nthp_api.nthp_build import database, dumper, loader, manifest, profiling, schema
+from nthp_api.nthp_build.config import settings
+
+
+def dump_nothing(state, keys=None):
+    pass
+
+
+def get_keys() -> list[str]:
+    return [str(key) for key in range(5)]
+
+
+def test_get_dumper_tasks(monkeypatch):
+    monkeypatch.setattr(settings, "dump_chunk_size", 2)
+    whole = dumper.Dumper("whole", dump_nothing)
+    chunked = dumper.ChunkedDumper("chunked", dump_nothing, get_keys)
+    assert dumper.get_dumper_tasks([chunked, whole]) == [
+        dumper.DumperTask(whole),
+        dumper.DumperTask(chunked, ["0", "1"]),
+        dumper.DumperTask(chunked, ["2", "3"]),
+        dumper.DumperTask(chunked, ["4"]),
+    ]
+
+
+def test_join_json_array():
+    collection = schema.SearchDocumentCollection(
+        [
+            schema.SearchDocument(
+                type=schema.SearchDocumentType.SHOW, title="Hamlet", id="hamlet"
+            ),
+            schema.SearchDocument(
+                type=schema.SearchDocumentType.YEAR, title="1999-00", id="99_00"
+            ),
+        ]
+    )
+    items = [schema.to_json(document) for document in collection]
+    assert "".join(dumper.join_json_array(items)) == schema.to_json(collection)
+    assert "".join(dumper.join_json_array([])) == "[]"
+
+
+@pytest.mark.parametrize("clean_output", [False, True])
+def test_write_file_streams_collections(tmp_path, monkeypatch, clean_output):
+    monkeypatch.setattr(settings, "clean_output", clean_output)
+    collection = schema.PersonCollaboratorCollection(
+        [
+            schema.PersonCollaborator(
+                person_id="fred_bloggs", person_name="Fred Bloggs", target_ids=["a"]
+            ),
+            schema.PersonCollaborator(
+                person_id="john_smith", person_name="John Smith", target_ids=[]
+            ),
+        ]
+    )
+    path = tmp_path / "collaborators.json"
+    dumper.write_file(path, collection)
+    assert path.read_text() == schema.to_json(collection)
+    assert list(tmp_path.iterdir()) == [path]
+
+
+@pytest.fixture()
+def previous_outputs(monkeypatch):
+    monkeypatch.setattr(settings, "clean_output", False)
+    monkeypatch.setattr(dumper, "_previous_outputs", {})
+    monkeypatch.setattr(dumper, "_outputs", {})
+    return dumper._previous_outputs  # noqa: SLF001
+
+
+def test_write_content_leaves_unchanged_file(tmp_path, previous_outputs):
+    path = tmp_path / "show.json"
+    path.write_bytes(b"{}")
+    mtime_ns = path.stat().st_mtime_ns
+    previous_outputs[path] = manifest.hash_bytes(b"{}")
+    dumper.write_content(path, b"{}")
+    assert path.stat().st_mtime_ns == mtime_ns
+    assert dumper._outputs == {path: manifest.hash_bytes(b"{}")}  # noqa: SLF001
+
+
+def test_write_content_trusts_manifest(tmp_path, previous_outputs):
+    # Only the size of the file is checked when it's in the manifest
+    path = tmp_path / "show.json"
+    path.write_bytes(b"[]")
+    previous_outputs[path] = manifest.hash_bytes(b"{}")
+    dumper.write_content(path, b"{}")
+    assert path.read_bytes() == b"[]"
+
+
+@pytest.mark.parametrize("previous", [b"[]", b"[1]", None])
+def test_write_content_rewrites_changed_file(tmp_path, previous_outputs, previous):
+    path = tmp_path / "show.json"
+    path.write_bytes(b"{}")
+    if previous:
+        previous_outputs[path] = manifest.hash_bytes(previous)
+    dumper.write_content(path, b'{"a":1}')
+    assert path.read_bytes() == b'{"a":1}'
+
+
+def test_write_chunks_leaves_unchanged_file(tmp_path, previous_outputs):
+    path = tmp_path / "shows.json"
+    path.write_bytes(b"[1,2]")
+    mtime_ns = path.stat().st_mtime_ns
+    previous_outputs[path] = manifest.hash_bytes(b"[1,2]")
+    dumper.write_chunks(path, ["[", "1,2", "]"])
+    assert path.stat().st_mtime_ns == mtime_ns
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_record_dumper_phases(monkeypatch):
+    monkeypatch.setattr(profiling, "_phases", [])
+    results = [
+        dumper.DumperTaskResult("shows", 1.0, 0.5, 100, {}, None),
+        dumper.DumperTaskResult("venues", 2.0, 1.0, 300, {}, None),
+        dumper.DumperTaskResult("shows", 3.0, 1.5, 200, {}, None),
+    ]
+    dumper.record_dumper_phases(results)
+    phases = {phase.name: phase for phase in profiling.get_phases()}
+    assert list(phases) == ["shows", "venues"]
+    assert phases["shows"].wall_time == 4.0  # noqa: PLR2004
+    assert phases["shows"].cpu_time == 2.0  # noqa: PLR2004
+    assert phases["shows"].max_rss_kb == 200  # noqa: PLR2004
+    assert phases["shows"].counts == {"tasks": 2, "files": 0}
+
+
+VENUES = {
+    "new_theatre": "---\ntitle: New Theatre\nbuilt: 1990\n---\nA venue",
+    "djanogly_theatre": "---\ntitle: Djanogly Theatre\n---\nAnother venue",
+    "trent_building": "---\ntitle: Trent Building\n---\nA building",
+}
+
+
+def load_and_dump_venues(output_dir: Path, monkeypatch) -> dict[str, bytes]:
+    venue_loader = next(
+        each_loader
+        for each_loader in loader.LOADERS
+        if each_loader.path == Path("_venues")
+    )
+    loader.run_loader(venue_loader)
+    monkeypatch.setattr(dumper, "OUTPUT_DIR", output_dir)
+    dumper.dump_all()
+    return {
+        path.relative_to(output_dir).as_posix(): path.read_bytes()
+        for path in output_dir.rglob("*")
+        if path.is_file()
+    }
+
+
+def test_incremental_load_dumps_same_as_full_load(test_db, tmp_path, monkeypatch):
+    # Loaders open the default database file, alongside what's dumped
+    monkeypatch.chdir(tmp_path)
+    content_root = tmp_path / "content"
+    (content_root / "_venues").mkdir(parents=True)
+    for venue_id, content in VENUES.items():
+        (content_root / "_venues" / f"{venue_id}.md").write_text(content)
+    monkeypatch.setattr(settings, "content_root", content_root)
+    monkeypatch.setattr(settings, "content_cache_dir", None)
+    monkeypatch.setattr(settings, "cpu_workers", 1)
+    monkeypatch.setattr(settings, "clean_output", True)
+    monkeypatch.setattr(
+        dumper, "DUMPERS", [dumper.Dumper("venues", dumper.dump_venues)]
+    )
+
+    monkeypatch.setattr(settings, "incremental", True)
+    load_and_dump_venues(tmp_path / "before", monkeypatch)
+    # Reloading the venue moves its row to the end of the table
+    (content_root / "_venues" / "new_theatre.md").write_text(
+        VENUES["new_theatre"] + " with a bar"
+    )
+    incremental = load_and_dump_venues(tmp_path / "incremental", monkeypatch)
+
+    test_db.drop_tables(database.MODELS)
+    test_db.create_tables(database.MODELS)
+    monkeypatch.setattr(settings, "incremental", False)
+    full = load_and_dump_venues(tmp_path / "full", monkeypatch)
+    assert "venues/index.json" in full
+    assert incremental == full
+
+
+def test_dump_crew_roles_sorts_aliases(tmp_path, monkeypatch, previous_outputs):
+    monkeypatch.setattr(dumper, "OUTPUT_DIR", tmp_path)
+    dumper.dump_crew_roles()
+    crew_roles = json.loads((tmp_path / "roles/crew/index.json").read_text())
+    aliases = [role["aliases"] for role in crew_roles]
+    assert any(len(role_aliases) > 1 for role_aliases in aliases)
+    assert all(role_aliases == sorted(role_aliases) for role_aliases in aliases)
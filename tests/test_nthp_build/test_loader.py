@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import pytest
+
+from nthp_api.nthp_build import loader, models
+from nthp_api.nthp_build.config import settings
+from nthp_api.nthp_build.documents import find_documents
+
+
+@pytest.fixture()
+def content_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "content_root", tmp_path)
+    (tmp_path / "_venues").mkdir()
+    return tmp_path
+
+
+def get_venue_path(content_root: Path, content: str):
+    (content_root / "_venues" / "new_theatre.md").write_text(content)
+    return next(iter(find_documents("_venues")))
+
+
+class TestParseDocument:
+    def test_valid(self, content_root):
+        doc_path = get_venue_path(
+            content_root, "---\ntitle: New Theatre\nbuilt: 1990\n---\nA **venue**"
+        )
+        parsed = loader.parse_document(models.Venue, doc_path)
+        assert isinstance(parsed, loader.ParsedDocument)
+        assert parsed.path == doc_path
+        assert parsed.data == models.Venue(title="New Theatre", built=1990)
+        assert parsed.content_html == "<p>A <strong>venue</strong></p>"
+        assert parsed.content_plaintext == "A venue"
+
+    def test_invalid(self, content_root):
+        doc_path = get_venue_path(content_root, "---\nbuilt: 1990\n---\nA venue")
+        parsed = loader.parse_document(models.Venue, doc_path)
+        assert isinstance(parsed, loader.FailedDocument)
+        assert parsed.path == doc_path
+        assert [error["loc"] for error in parsed.errors] == [("title",)]
@@ -0,0 +1,55 @@
+import hashlib
+import io
+from pathlib import Path
+
+from nthp_api.nthp_build import manifest
+
+
+def test_hashes_match():
+    content = b'{"id":"the_tempest"}' * 10_000
+    expected = manifest.FileHash(hashlib.sha256(content).hexdigest(), len(content))
+    assert manifest.hash_bytes(content) == expected
+
+
+def test_hash_file(tmp_path):
+    content = b'{"id":"the_tempest"}' * 10_000
+    path = tmp_path / "show.json"
+    path.write_bytes(content)
+    assert manifest.hash_file(path) == manifest.hash_bytes(content)
+
+
+def test_write_hashed():
+    f = io.BytesIO()
+    file_hash = manifest.write_hashed(f, ["[", '"Émile"', "]"])
+    assert f.getvalue() == '["Émile"]'.encode()
+    assert file_hash == manifest.hash_bytes(f.getvalue())
+
+
+def test_make_manifest():
+    output_dir = Path("dist")
+    outputs = {
+        output_dir / "shows" / "b.json": manifest.FileHash("bbb", 2),
+        output_dir / "index.json": manifest.FileHash("iii", 1),
+        output_dir / "shows" / "a.json": manifest.FileHash("aaa", 3),
+    }
+    result = manifest.make_manifest(outputs, output_dir)
+    assert list(result.files) == ["index.json", "shows/a.json", "shows/b.json"]
+    assert result.files["shows/a.json"].sha256 == "aaa"
+    assert result.files["shows/a.json"].size == 3  # noqa: PLR2004
+
+
+def test_read_manifest(tmp_path):
+    outputs = {tmp_path / "shows" / "a.json": manifest.FileHash("aaa", 3)}
+    (tmp_path / manifest.MANIFEST_FILE).write_text(
+        manifest.make_manifest(outputs, tmp_path).json()
+    )
+    assert manifest.read_manifest(tmp_path) == outputs
+
+
+def test_read_missing_manifest(tmp_path):
+    assert manifest.read_manifest(tmp_path) == {}
+
+
+def test_read_invalid_manifest(tmp_path):
+    (tmp_path / manifest.MANIFEST_FILE).write_text('{"files": [')
+    assert manifest.read_manifest(tmp_path) == {}
@@ -0,0 +1,34 @@
+import functools
+
+import pytest
+
+from nthp_api.nthp_build import parallel
+from nthp_api.nthp_build.config import settings
+
+
+def square(x: int) -> int:
+    return x * x
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_map_cpu_task_in_pool_keeps_order(workers, monkeypatch):
+    monkeypatch.setattr(settings, "cpu_workers", workers)
+    items = list(range(parallel.MIN_ITEMS_FOR_POOL * 3))
+    assert list(parallel.map_cpu_task_in_pool(square, items)) == [x * x for x in items]
+
+
+def fail() -> None:
+    raise ValueError("Task failed")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_cpu_tasks_in_pool_keeps_order(workers, monkeypatch):
+    monkeypatch.setattr(settings, "cpu_workers", workers)
+    tasks = [functools.partial(square, x) for x in range(10)]
+    assert parallel.run_cpu_tasks_in_pool(tasks) == [x * x for x in range(10)]
+
+
+def test_run_cpu_tasks_in_pool_raises_errors(monkeypatch):
+    monkeypatch.setattr(settings, "cpu_workers", 2)
+    with pytest.raises(parallel.MultiProcessError):
+        parallel.run_cpu_tasks_in_pool([functools.partial(square, 2), fail])
@@ -2,7 +2,12 @@ import freezegun
 import pytest
 
 from nthp_api.nthp_build import database, models, people
-from nthp_api.nthp_build.schema import PersonCollaborator, PersonGraduated
+from nthp_api.nthp_build.schema import (
+    CollaboratorAdjacency,
+    CollaboratorAdjacencyPerson,
+    PersonCollaborator,
+    PersonGraduated,
+)
 
 
 @pytest.mark.parametrize(
@@ -70,12 +75,24 @@ class TestSavePersonRoles:
         )
 
 
+def get_collaborators_from_graph(person_id: str) -> list[PersonCollaborator]:
+    return people.get_graph_collaborators(people.get_collaborator_graph(), person_id)
+
+
+@pytest.fixture(
+    params=[people.get_person_collaborators, get_collaborators_from_graph],
+    ids=["query", "graph"],
+)
+def get_collaborators(request):
+    return request.param
+
+
 class TestGetPersonCollaborators:
-    def test_no_person(self, test_db):
+    def test_no_person(self, test_db, get_collaborators):
         person_id = people.get_person_id("Fred Bloggs")
-        assert people.get_person_collaborators(person_id) == []
+        assert get_collaborators(person_id) == []
 
-    def test_no_collaborators(self, test_db):
+    def test_no_collaborators(self, test_db, get_collaborators):
         person_id = people.get_person_id("Fred Bloggs")
         people.save_person_roles(
             target=THE_TEMPEST,
@@ -89,9 +106,9 @@ class TestGetPersonCollaborators:
             target_year=1999,
             person_list=[FRED_PERSON_REF],
         )
-        assert people.get_person_collaborators(person_id) == []
+        assert get_collaborators(person_id) == []
 
-    def test_one_collaborator(self, test_db):
+    def test_one_collaborator(self, test_db, get_collaborators):
         person_id = people.get_person_id("Fred Bloggs")
         people.save_person_roles(
             target=THE_TEMPEST,
@@ -105,7 +122,7 @@ class TestGetPersonCollaborators:
             target_year=1999,
             person_list=[FRED_PERSON_REF, JOHN_PERSON_REF],
         )
-        assert people.get_person_collaborators(person_id) == [
+        assert get_collaborators(person_id) == [
             PersonCollaborator(
                 person_id="john_smith",
                 person_name="John Smith",
@@ -113,7 +130,7 @@ class TestGetPersonCollaborators:
             )
         ]
 
-    def test_multiple_collaborators(self, test_db):
+    def test_multiple_collaborators(self, test_db, get_collaborators):
         person_id = people.get_person_id("Fred Bloggs")
         people.save_person_roles(
             target=THE_TEMPEST,
@@ -141,7 +158,7 @@ class TestGetPersonCollaborators:
                 ALICE_PERSON_REF,
             ],
         )
-        assert people.get_person_collaborators(person_id) == [
+        assert get_collaborators(person_id) == [
             PersonCollaborator(
                 person_id="alice_froggs",
                 person_name="Alice Froggs",
@@ -154,7 +171,7 @@ class TestGetPersonCollaborators:
             ),
         ]
 
-    def test_multiple_roles_for_same_person(self, test_db):
+    def test_multiple_roles_for_same_person(self, test_db, get_collaborators):
         person_id = people.get_person_id("Fred Bloggs")
         people.save_person_roles(
             target=THE_TEMPEST,
@@ -174,7 +191,7 @@ class TestGetPersonCollaborators:
             ],
         )
 
-        assert people.get_person_collaborators(person_id) == [
+        assert get_collaborators(person_id) == [
             PersonCollaborator(
                 person_id="alice_froggs",
                 person_name="Alice Froggs",
@@ -187,6 +204,75 @@ class TestGetPersonCollaborators:
             ),
         ]
 
+    def test_ignores_roles_not_played_by_people(self, test_db, get_collaborators):
+        person_id = people.get_person_id("Fred Bloggs")
+        people.save_person_roles(
+            target=THE_TEMPEST,
+            target_type=database.PersonRoleType.CAST,
+            target_year=1999,
+            person_list=[
+                FRED_PERSON_REF,
+                models.PersonRef(role="Band", name="The Band", person=False),
+            ],
+        )
+        assert get_collaborators(person_id) == []
+
+
+def test_partial_collaborator_graph(test_db):
+    people.save_person_roles(
+        target=THE_TEMPEST,
+        target_type=database.PersonRoleType.CAST,
+        target_year=1999,
+        person_list=[FRED_PERSON_REF, ALICE_PERSON_REF],
+    )
+    people.save_person_roles(
+        target=TITUS_ANDRONICUS,
+        target_type=database.PersonRoleType.CAST,
+        target_year=1999,
+        person_list=[JOHN_PERSON_REF, ALICE_PERSON_REF],
+    )
+    graph = people.get_collaborator_graph(person_ids=["fred_bloggs"])
+    assert set(graph.target_people) == {THE_TEMPEST}
+    assert people.get_graph_collaborators(
+        graph, "fred_bloggs"
+    ) == people.get_person_collaborators("fred_bloggs")
+
+
+class TestGetCollaboratorAdjacency:
+    def test_adjacency(self, test_db):
+        people.save_person_roles(
+            target=THE_TEMPEST,
+            target_type=database.PersonRoleType.CAST,
+            target_year=1999,
+            person_list=[FRED_PERSON_REF, ALICE_PERSON_REF],
+        )
+        people.save_person_roles(
+            target=TITUS_ANDRONICUS,
+            target_type=database.PersonRoleType.CAST,
+            target_year=1999,
+            person_list=[JOHN_PERSON_REF, ALICE_PERSON_REF],
+        )
+        graph = people.get_collaborator_graph()
+        person_refs = [
+            (ref.person_id, ref.person_name) for ref in people.get_people_from_roles()
+        ]
+        assert people.get_collaborator_adjacency(
+            graph, person_refs
+        ) == CollaboratorAdjacency(
+            targets=["the_tempest", "titus_andronicus"],
+            people=[
+                CollaboratorAdjacencyPerson(
+                    id="alice_froggs", name="Alice Froggs", targets=[0, 1]
+                ),
+                CollaboratorAdjacencyPerson(
+                    id="fred_bloggs", name="Fred Bloggs", targets=[0]
+                ),
+                CollaboratorAdjacencyPerson(
+                    id="john_smith", name="John Smith", targets=[1]
+                ),
+            ],
+        )
+
 
 class TestGetGraduation:
     def test_unknown(self, test_db):
@@ -285,3 +371,89 @@ class TestGetGraduation:
                 )
                 == graduated
             )
+
+
+class TestMakePersonDetail:
+    @pytest.fixture()
+    def roles(self, test_db):
+        for show_id, year, season_sort in [
+            (THE_TEMPEST, 1999, 2),
+            (TITUS_ANDRONICUS, 1999, 1),
+            (JULIUS_CAESAR, 1994, 1),
+        ]:
+            database.Show.create(
+                id=show_id,
+                source_path=f"{show_id}.md",
+                year=year,
+                year_id=f"{year % 100:02}_{(year + 1) % 100:02}",
+                title=show_id.replace("_", " ").title(),
+                season_sort=season_sort,
+                assets="[]",
+                data="{}",
+            )
+        people.save_person_roles(
+            target=THE_TEMPEST,
+            target_type=database.PersonRoleType.CAST,
+            target_year=1999,
+            person_list=[FRED_PERSON_REF, ALICE_PERSON_REF],
+        )
+        people.save_person_roles(
+            target=THE_TEMPEST,
+            target_type=database.PersonRoleType.CREW,
+            target_year=1999,
+            person_list=[FRED_PERSON_REF],
+        )
+        people.save_person_roles(
+            target=TITUS_ANDRONICUS,
+            target_type=database.PersonRoleType.CAST,
+            target_year=1999,
+            person_list=[ALICE_PERSON_REF, ALICE_SECOND_ROLE_PERSON_REF],
+        )
+        people.save_person_roles(
+            target=JULIUS_CAESAR,
+            target_type=database.PersonRoleType.CAST,
+            target_year=1994,
+            person_list=[FRED_PERSON_REF, JOHN_PERSON_REF],
+        )
+        people.save_person_roles(
+            target="98_99",
+            target_type=database.PersonRoleType.COMMITTEE,
+            target_year=1998,
+            person_list=[FRED_PERSON_REF, JOHN_PERSON_REF],
+        )
+
+    @pytest.mark.parametrize(
+        "model",
+        [
+            models.Person(id="fred_bloggs", title="Fred Bloggs"),
+            models.Person(id="alice_froggs", title="Alice Froggs", graduated=2001),
+            models.Person(id="john_smith", title="John Smith"),
+            models.Person(id="nobody", title="Nobody"),
+        ],
+    )
+    def test_index_matches_queries(self, roles, model: models.Person):
+        index = people.get_person_detail_index()
+        assert people.make_person_detail(
+            model, index=index
+        ) == people.make_person_detail(model)
+
+    def test_show_roles_grouped_by_show(self, roles):
+        index = people.get_person_detail_index()
+        person_detail = people.make_person_detail(
+            models.Person(id="fred_bloggs", title="Fred Bloggs"), index=index
+        )
+        assert [
+            (show_roles.show_id, [role.role_type for role in show_roles.roles])
+            for show_roles in person_detail.show_roles
+        ] == [(JULIUS_CAESAR, ["CAST"]), (THE_TEMPEST, ["CAST", "CREW"])]
+        assert [role.year_id for role in person_detail.committee_roles] == ["98_99"]
+
+    def test_index_for_selected_people(self, roles):
+        index = people.get_person_detail_index(
+            person_ids=database.PersonRole.select(database.PersonRole.person_id).where(
+                database.PersonRole.person_id == "john_smith"
+            )
+        )
+        assert set(index.show_roles) == {"john_smith"}
+        assert set(index.committee_roles) == {"john_smith"}
+        assert index.years_active == {"john_smith": {1994, 1998}}
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from nthp_api.nthp_build import profiling
+from nthp_api.nthp_build.config import settings
+
+
+@pytest.fixture()
+def phases(monkeypatch):
+    monkeypatch.setattr(profiling, "_phases", [])
+    monkeypatch.setattr(profiling, "_counts", [])
+    return profiling._phases  # noqa: SLF001
+
+
+def test_phase_records_counts(phases, monkeypatch):
+    monkeypatch.setattr(settings, "profile_dir", None)
+    with profiling.phase("load", "Show"):
+        profiling.add_counts({"documents": 2})
+        with profiling.phase("load", "Asset"):
+            profiling.add_counts({"Asset": 3})
+        profiling.add_counts({"documents": 1, "Show": 3})
+    assert [(phase.group, phase.name) for phase in phases] == [
+        ("load", "Asset"),
+        ("load", "Show"),
+    ]
+    assert phases[0].counts == {"Asset": 3}
+    assert phases[1].counts == {"documents": 3, "Show": 3}
+    assert phases[1].wall_time >= phases[0].wall_time
+    assert phases[1].max_rss_kb > 0
+
+
+def test_add_counts_outside_phase(phases):
+    profiling.add_counts({"documents": 1})
+    assert phases == []
+
+
+def test_phase_recorded_on_error(phases, monkeypatch):
+    monkeypatch.setattr(settings, "profile_dir", None)
+    with pytest.raises(ValueError), profiling.phase("dump", "shows"):
+        raise ValueError
+    assert [phase.name for phase in phases] == ["shows"]
+
+
+def test_write_report(phases, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "profile_dir", tmp_path)
+    with profiling.phase("smugmug", "albums"):
+        profiling.add_counts({"albums": 1})
+    with profiling.phase("total", "dump", use_cprofile=False):
+        pass
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["smugmug-albums.prof"]
+    report_path = profiling.write_report()
+    assert report_path == tmp_path / profiling.REPORT_FILE
+    report = json.loads(report_path.read_text())
+    assert report["branch"] == settings.branch
+    assert [phase["name"] for phase in report["phases"]] == ["albums", "dump"]
+    assert report["phases"][0]["counts"] == {"albums": 1}
+
+
+def test_write_report_without_profile_dir(phases, monkeypatch):
+    monkeypatch.setattr(settings, "profile_dir", None)
+    assert profiling.write_report() is None
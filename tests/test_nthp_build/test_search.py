@@ -0,0 +1,25 @@
+from nthp_api.nthp_build import schema, search
+from nthp_api.nthp_build.parallel import DumperSharedState
+
+
+def test_shards_round_trip(tmp_path):
+    state = DumperSharedState(search_shard_dir=tmp_path)
+    search.clear_documents()
+    search.add_document(
+        state, schema.SearchDocumentType.SHOW, "Hamlet", "hamlet", plaintext="A\nB"
+    )
+    first_shard = search.write_shard(state)
+    assert search.write_shard(state) is None
+    search.add_document(state, schema.SearchDocumentType.YEAR, "1999-00", "99_00")
+    second_shard = search.write_shard(state)
+    assert first_shard is not None
+    assert second_shard is not None
+
+    documents = [
+        schema.SearchDocument.model_validate_json(document)
+        for document in search.read_shards([first_shard, second_shard])
+    ]
+    assert [(document.id, document.plaintext) for document in documents] == [
+        ("hamlet", "A\nB"),
+        ("99_00", None),
+    ]
@@ -99,3 +99,27 @@ from nthp_api.nthp_build import models, schema, shows
 def test_get_show_playwright(input: dict, expected: schema.PlaywrightShow):
     show = models.Show.construct(**input)
     assert shows.get_show_playwright(show) == expected
+
+
+def make_show_role(name: str | None) -> schema.ShowRole:
+    return schema.ShowRole(
+        person=schema.PersonList(
+            id=str(name), name=name, is_person=name is not None, has_bio=False
+        )
+    )
+
+
+def test_get_show_people_names():
+    show = schema.ShowDetail.construct(
+        cast=[make_show_role("Zoe Bloggs"), make_show_role("Fred Bloggs")],
+        crew=[
+            make_show_role("Zoe Bloggs"),
+            make_show_role(None),
+            make_show_role("Alice Smith"),
+        ],
+    )
+    assert shows.get_show_people_names(show) == [
+        "Alice Smith",
+        "Fred Bloggs",
+        "Zoe Bloggs",
+    ]
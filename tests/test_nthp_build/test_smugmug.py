@@ -0,0 +1,85 @@
+import httpx
+import peewee
+import pytest
+
+from nthp_api import smugmugger
+from nthp_api.nthp_build import database, smugmug
+from nthp_api.nthp_build.assets import AssetSource, AssetType
+from nthp_api.smugmugger import database as smugmugger_database
+from nthp_api.smugmugger.config import settings as smugmugger_settings
+from nthp_api.smugmugger.limiter import AdaptiveLimiter
+from nthp_api.smugmugger.stats import RequestStats
+
+
+@pytest.fixture()
+def cache_db(monkeypatch):
+    test_db = peewee.SqliteDatabase(":memory:")
+    monkeypatch.setattr(smugmugger_database, "db", test_db)
+    with test_db.bind_ctx(smugmugger_database.MODELS):
+        test_db.create_tables(smugmugger_database.MODELS)
+        yield test_db
+
+
+def make_album_asset(target_id: str, album_id: str) -> database.Asset:
+    return database.Asset.create(
+        target_id=target_id,
+        target_type="show",
+        asset_source=AssetSource.SMUGMUG,
+        asset_type=AssetType.ALBUM,
+        asset_id=album_id,
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_main(test_db, cache_db, monkeypatch):
+    monkeypatch.setattr(database, "db", test_db)
+    fetched_album_ids = []
+
+    async def get_album_images(client, album_id, cache):
+        fetched_album_ids.append(album_id)
+        if album_id == "broken":
+            raise smugmugger.SmugMugError("Broken album")
+        return smugmugger.SmugMugImageCollection()
+
+    monkeypatch.setattr(smugmugger, "get_album_images", get_album_images)
+    make_album_asset("hamlet", "album_1")
+    make_album_asset("hamlet_redux", "album_1")
+    make_album_asset("macbeth", "broken")
+
+    await smugmug.async_main()
+
+    # Each album is only fetched and stored once, however many assets it has
+    assert sorted(fetched_album_ids) == ["album_1", "broken"]
+    assert list(database.SmugMugAlbum.select().tuples()) == [("album_1", "[]")]
+
+
+@pytest.mark.asyncio
+async def test_fetch_album_skips_malformed_album(monkeypatch):
+    monkeypatch.setattr(smugmugger_settings, "smugmug_fetch", True)
+    monkeypatch.setattr(smugmugger_settings, "smugmug_api_key", "a123")
+    # The album is missing most of its fields
+    response = httpx.Response(
+        200,
+        json={
+            "Code": 200,
+            "Message": "Ok",
+            "Response": {"Uri": "/api/v2/album/abc", "Album": {"Name": "East"}},
+        },
+    )
+    client = smugmugger.SmugMugClient(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(lambda _: response)),
+        connection_limit=AdaptiveLimiter(1),
+        stats=RequestStats(),
+    )
+    cache = smugmugger.AlbumCache({})
+    assert await smugmug.fetch_album(client, cache, "abc") is None
+
+
+def test_save_albums_removes_unused(test_db, monkeypatch):
+    monkeypatch.setattr(database, "db", test_db)
+    make_album_asset("hamlet", "album_1")
+    database.SmugMugAlbum.create(id="album_1", images="[]")
+    database.SmugMugAlbum.create(id="unused", images="[]")
+    smugmug.save_albums({})
+    # Albums that weren't fetched this time keep their images
+    assert [album.id for album in database.SmugMugAlbum.select()] == ["album_1"]
@@ -0,0 +1,102 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from nthp_api.nthp_build import sources
+from nthp_api.nthp_build.config import settings
+from nthp_api.nthp_build.documents import find_documents
+
+SHOWS = Path("_shows")
+
+
+@pytest.fixture()
+def content_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "content_root", tmp_path)
+    (tmp_path / SHOWS / "99_00").mkdir(parents=True)
+    (tmp_path / SHOWS / "99_00" / "the_tempest.md").write_text("---\ntitle: A\n---\n")
+    (tmp_path / SHOWS / "99_00" / "hamlet.md").write_text("---\ntitle: B\n---\n")
+    return tmp_path
+
+
+def record_all():
+    for change in sources.get_all_sources(find_documents(SHOWS)).changed:
+        sources.record_source(SHOWS, change.path, change.state)
+
+
+def get_change_ids(changes: sources.SourceChanges) -> tuple[set, set, set]:
+    return (
+        {change.path.id for change in changes.changed},
+        {doc_path.id for doc_path in changes.unchanged},
+        {doc_path.id for doc_path in changes.deleted},
+    )
+
+
+class TestGetSourceChanges:
+    def test_nothing_recorded(self, test_db, content_root):
+        changes = sources.get_source_changes(SHOWS, find_documents(SHOWS))
+        assert get_change_ids(changes) == (
+            {"99_00/the_tempest", "99_00/hamlet"},
+            set(),
+            set(),
+        )
+        assert all(change.is_new for change in changes.changed)
+
+    def test_unchanged(self, test_db, content_root):
+        record_all()
+        changes = sources.get_source_changes(SHOWS, find_documents(SHOWS))
+        assert get_change_ids(changes) == (
+            set(),
+            {"99_00/the_tempest", "99_00/hamlet"},
+            set(),
+        )
+
+    def test_modified(self, test_db, content_root):
+        record_all()
+        (content_root / SHOWS / "99_00" / "hamlet.md").write_text(
+            "---\ntitle: C\n---\n"
+        )
+        changes = sources.get_source_changes(SHOWS, find_documents(SHOWS))
+        assert get_change_ids(changes) == (
+            {"99_00/hamlet"},
+            {"99_00/the_tempest"},
+            set(),
+        )
+        assert not changes.changed[0].is_new
+
+    def test_touched_but_not_modified(self, test_db, content_root):
+        record_all()
+        path = content_root / SHOWS / "99_00" / "hamlet.md"
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        changes = sources.get_source_changes(SHOWS, find_documents(SHOWS))
+        assert get_change_ids(changes) == (
+            set(),
+            {"99_00/the_tempest", "99_00/hamlet"},
+            set(),
+        )
+
+    def test_deleted(self, test_db, content_root):
+        record_all()
+        (content_root / SHOWS / "99_00" / "hamlet.md").unlink()
+        changes = sources.get_source_changes(SHOWS, find_documents(SHOWS))
+        assert get_change_ids(changes) == (
+            set(),
+            {"99_00/the_tempest"},
+            {"99_00/hamlet"},
+        )
+
+    def test_forgotten_source_is_changed(self, test_db, content_root):
+        record_all()
+        hamlet = next(
+            doc_path
+            for doc_path in find_documents(SHOWS)
+            if doc_path.id == "99_00/hamlet"
+        )
+        sources.forget_source(hamlet)
+        changes = sources.get_source_changes(SHOWS, find_documents(SHOWS))
+        assert get_change_ids(changes) == (
+            {"99_00/hamlet"},
+            {"99_00/the_tempest"},
+            set(),
+        )
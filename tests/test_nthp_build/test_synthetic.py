@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import pytest
+
+from nthp_api.nthp_build import loader, models, synthetic
+from nthp_api.nthp_build.config import settings
+from nthp_api.nthp_build.documents import find_documents, load_yaml
+
+DOCUMENT_LOADERS = [
+    document_loader
+    for document_loader in loader.LOADERS
+    if document_loader.type is loader.DocumentLoaderFunc
+]
+
+
+@pytest.fixture()
+def content_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "content_root", tmp_path)
+    synthetic.generate_content(tmp_path, 50)
+    return tmp_path
+
+
+def read_tree(root: Path) -> dict[Path, str]:
+    return {path.relative_to(root): path.read_text() for path in root.rglob("*.md")}
+
+
+def test_person_names_are_unique():
+    names = [synthetic.get_person_name(index) for index in range(5000)]
+    assert len(set(names)) == len(names)
+
+
+@pytest.mark.parametrize(
+    "document_loader",
+    DOCUMENT_LOADERS,
+    ids=lambda document_loader: document_loader.schema_type.__name__,
+)
+def test_documents_are_valid(content_root, document_loader):
+    doc_paths = list(find_documents(document_loader.path))
+    assert doc_paths
+    for doc_path in doc_paths:
+        parsed = loader.parse_document(document_loader.schema_type, doc_path)
+        assert isinstance(parsed, loader.ParsedDocument), parsed
+
+
+def test_history_is_valid(content_root):
+    assert models.HistoryRecordCollection(load_yaml("_data/history.yaml"))
+
+
+def test_show_count(content_root):
+    assert len(list(find_documents("_shows"))) == 50  # noqa: PLR2004
+
+
+def test_same_seed_same_content(tmp_path):
+    synthetic.generate_content(tmp_path / "a", 20, seed=1)
+    synthetic.generate_content(tmp_path / "b", 20, seed=1)
+    synthetic.generate_content(tmp_path / "c", 20, seed=2)
+    assert read_tree(tmp_path / "a") == read_tree(tmp_path / "b")
+    assert read_tree(tmp_path / "a") != read_tree(tmp_path / "c")
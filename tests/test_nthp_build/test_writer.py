@@ -0,0 +1,48 @@
+import pytest
+
+from nthp_api.nthp_build import database, writer
+
+
+def make_venue_row(id: str) -> dict:
+    return {"id": id, "name": id.title(), "data": "{}"}
+
+
+class TestRowWriter:
+    def test_flushes_on_exit(self, test_db):
+        with writer.RowWriter() as row_writer:
+            row_writer.add(database.Venue, make_venue_row("new-theatre"))
+            assert database.Venue.select().count() == 0
+        assert database.Venue.select().count() == 1
+        assert row_writer.counts["Venue"] == 1
+
+    def test_inserts_in_chunks_in_order(self, test_db, monkeypatch):
+        monkeypatch.setattr(writer, "get_max_variables", lambda: 10)
+        ids = [f"venue-{i:02}" for i in range(25)]
+        with writer.RowWriter() as row_writer:
+            row_writer.add_many(database.Venue, [make_venue_row(id) for id in ids])
+        query = database.Venue.select().order_by(database.Venue.id)
+        assert [venue.id for venue in query] == ids
+
+    def test_duplicate_primary_key(self, test_db):
+        with writer.RowWriter() as row_writer:
+            row_writer.add(database.Venue, make_venue_row("new-theatre"))
+            with pytest.raises(writer.DuplicateRowError):
+                row_writer.add(database.Venue, make_venue_row("new-theatre"))
+            row_writer.add(database.Venue, make_venue_row("djanogly"))
+        assert database.Venue.select().count() == 2  # noqa: PLR2004
+
+    def test_duplicate_of_existing_row(self, test_db):
+        database.Venue.create(**make_venue_row("new-theatre"))
+        with pytest.raises(writer.DuplicateRowError), writer.RowWriter() as row_writer:
+            row_writer.add(database.Venue, make_venue_row("new-theatre"))
+
+    def test_auto_primary_keys_not_checked(self, test_db):
+        row = {"year": "1990", "title": "A", "description": "B"}
+        with writer.RowWriter() as row_writer:
+            row_writer.add_many(database.HistoryRecord, [row, row])
+        assert database.HistoryRecord.select().count() == 2  # noqa: PLR2004
+
+
+def test_get_chunk_size(monkeypatch):
+    monkeypatch.setattr(writer, "get_max_variables", lambda: 999)
+    assert writer.get_chunk_size(database.Venue) == 999 // 5
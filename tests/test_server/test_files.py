@@ -0,0 +1,58 @@
+import hashlib
+import os
+
+from nthp_api.server.files import FileCache
+
+
+def test_get_missing(tmp_path):
+    assert FileCache(1024).get(tmp_path / "missing.json") is None
+
+
+def test_get_directory(tmp_path):
+    assert FileCache(1024).get(tmp_path) is None
+
+
+def test_get_caches_content(tmp_path):
+    path = tmp_path / "show.json"
+    path.write_bytes(b"{}")
+    cache = FileCache(1024)
+    static_file = cache.get(path)
+    assert static_file is not None
+    assert static_file.content == b"{}"
+    assert static_file.etag == f'"{hashlib.sha256(b"{}").hexdigest()}"'
+    assert cache.get(path) is static_file
+
+
+def test_get_reloads_changed_file(tmp_path):
+    path = tmp_path / "show.json"
+    path.write_bytes(b"{}")
+    cache = FileCache(1024)
+    first = cache.get(path)
+    assert first is not None
+    path.write_bytes(b'{"a":1}')
+    os.utime(path, ns=(first.mtime_ns + 1_000_000, first.mtime_ns + 1_000_000))
+    second = cache.get(path)
+    assert second is not None
+    assert second.content == b'{"a":1}'
+    assert second.etag != first.etag
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = FileCache(max_bytes=10)
+    paths = [tmp_path / f"{name}.json" for name in "abc"]
+    for path in paths:
+        path.write_bytes(b"1234")
+    cache.get(paths[0])
+    cache.get(paths[1])
+    cache.get(paths[0])
+    cache.get(paths[2])
+    assert list(cache.files) == [paths[0], paths[2]]
+    assert cache.current_bytes == 8  # noqa: PLR2004
+
+
+def test_large_files_are_not_cached(tmp_path):
+    path = tmp_path / "big.json"
+    path.write_bytes(b"x" * 20)
+    cache = FileCache(max_bytes=10)
+    assert cache.get(path) is not None
+    assert cache.files == {}
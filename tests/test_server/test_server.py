@@ -0,0 +1,197 @@
+import gzip
+import hashlib
+import http.client
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from nthp_api.server.server import (
+    ByteRange,
+    RangeNotSatisfiableError,
+    StaticServer,
+    etag_matches,
+    get_accepted_encodings,
+    parse_range,
+)
+
+CONTENT = b'{"id":"the_tempest","title":"The Tempest"}'
+
+
+@pytest.mark.parametrize(
+    "accept_encoding,expected",
+    [
+        ("", {""}),
+        ("gzip, br", {"gzip", "br"}),
+        ("gzip;q=0.5, br;q=0", {"gzip"}),
+        ("GZIP;q=nonsense, identity", {"identity"}),
+    ],
+)
+def test_get_accepted_encodings(accept_encoding: str, expected: set[str]):
+    assert get_accepted_encodings(accept_encoding) == expected
+
+
+@pytest.mark.parametrize(
+    "range_header,expected",
+    [
+        ("bytes=0-9", ByteRange(0, 9)),
+        ("bytes=10-", ByteRange(10, 99)),
+        ("bytes=-10", ByteRange(90, 99)),
+        ("bytes=90-200", ByteRange(90, 99)),
+        ("bytes=0-1,5-6", None),
+        ("lines=0-1", None),
+        ("bytes=a-b", None),
+    ],
+)
+def test_parse_range(range_header: str, expected: ByteRange | None):
+    assert parse_range(range_header, 100) == expected
+
+
+@pytest.mark.parametrize("range_header", ["bytes=100-", "bytes=5-4", "bytes=-0"])
+def test_parse_range_not_satisfiable(range_header: str):
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_range(range_header, 100)
+
+
+@pytest.mark.parametrize(
+    "if_none_match,expected",
+    [('"abc"', True), ('W/"abc"', True), ('"xyz", "abc"', True), ("*", True)],
+)
+def test_etag_matches(if_none_match: str, expected: bool):
+    assert etag_matches(if_none_match, '"abc"') == expected
+
+
+def test_etag_does_not_match():
+    assert not etag_matches('"xyz"', '"abc"')
+
+
+@pytest.fixture()
+def directory(tmp_path: Path) -> Path:
+    directory = tmp_path / "dist"
+    (directory / "shows").mkdir(parents=True)
+    (directory / "shows" / "the_tempest.json").write_bytes(CONTENT)
+    (directory / "shows" / "the_tempest.json.gz").write_bytes(gzip.compress(CONTENT))
+    (directory / "index.json").write_bytes(b"{}")
+    (tmp_path / "secret.json").write_bytes(b"{}")
+    return directory
+
+
+@pytest.fixture()
+def server(directory: Path) -> Iterator[StaticServer]:
+    server = StaticServer(
+        ("127.0.0.1", 0),
+        directory=directory,
+        threads=2,
+        cache_bytes=1024,
+        cache_control="public, no-cache",
+        immutable_cache_control="immutable",
+        keep_alive_timeout=1,
+    )
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture()
+def connection(server: StaticServer) -> Iterator[http.client.HTTPConnection]:
+    connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+    yield connection
+    connection.close()
+
+
+def request(
+    connection: http.client.HTTPConnection, path: str, **headers: str
+) -> http.client.HTTPResponse:
+    connection.request(
+        "GET", path, headers={k.replace("_", "-"): v for k, v in headers.items()}
+    )
+    return connection.getresponse()
+
+
+def test_get(connection):
+    response = request(connection, "/shows/the_tempest.json")
+    assert response.status == 200  # noqa: PLR2004
+    assert response.read() == CONTENT
+    assert response.getheader("Content-Type") == "application/json"
+    assert response.getheader("ETag")
+    assert response.getheader("Content-Encoding") is None
+
+
+def test_keep_alive(connection):
+    first = request(connection, "/shows/the_tempest.json")
+    first.read()
+    sock = connection.sock
+    second = request(connection, "/index.json")
+    assert second.read() == b"{}"
+    assert connection.sock is sock
+
+
+def test_directory_index(connection):
+    response = request(connection, "/")
+    assert response.read() == b"{}"
+
+
+def test_not_found(connection):
+    response = request(connection, "/shows/hamlet.json")
+    assert response.status == 404  # noqa: PLR2004
+    response.read()
+
+
+def test_outside_directory(connection):
+    response = request(connection, "/../secret.json")
+    assert response.status == 404  # noqa: PLR2004
+    response.read()
+    response = request(connection, "/%2e%2e/secret.json")
+    assert response.status == 404  # noqa: PLR2004
+    response.read()
+
+
+def test_not_modified(connection):
+    etag = request(connection, "/shows/the_tempest.json").getheader("ETag")
+    connection.close()
+    response = request(connection, "/shows/the_tempest.json", If_None_Match=etag)
+    assert response.status == 304  # noqa: PLR2004
+    assert response.read() == b""
+    assert response.getheader("ETag") == etag
+
+
+def test_precompressed(connection):
+    response = request(
+        connection, "/shows/the_tempest.json", Accept_Encoding="br, gzip"
+    )
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert response.getheader("Vary") == "Accept-Encoding"
+    assert gzip.decompress(response.read()) == CONTENT
+
+
+def test_range(connection):
+    response = request(connection, "/shows/the_tempest.json", Range="bytes=0-5")
+    assert response.status == 206  # noqa: PLR2004
+    assert response.read() == CONTENT[:6]
+    assert response.getheader("Content-Range") == f"bytes 0-5/{len(CONTENT)}"
+
+
+def test_range_not_satisfiable(connection):
+    response = request(connection, "/shows/the_tempest.json", Range="bytes=500-")
+    assert response.status == 416  # noqa: PLR2004
+    response.read()
+
+
+def test_current_version_is_immutable(connection):
+    sha256 = hashlib.sha256(CONTENT).hexdigest()
+    response = request(
+        connection, f"/shows/the_tempest.json?v={sha256}", Accept_Encoding="gzip"
+    )
+    assert response.getheader("Cache-Control") == "immutable"
+    assert response.getheader("Content-Encoding") == "gzip"
+    response.read()
+
+
+def test_previous_version_is_not_immutable(connection):
+    response = request(connection, "/shows/the_tempest.json?v=abc")
+    assert response.getheader("Cache-Control") == "public, no-cache"
+    assert response.read() == CONTENT
@@ -1,6 +1,19 @@
+import httpx
 import pytest
 
-from nthp_api.smugmugger.client import get_pages, make_client
+from nthp_api.smugmugger import album
+from nthp_api.smugmugger import client as smugmug_client
+from nthp_api.smugmugger.client import (
+    SmugMugClient,
+    SmugMugInvalidResponse,
+    get_page_starts,
+    get_pages,
+    make_client,
+)
+from nthp_api.smugmugger.config import settings
+from nthp_api.smugmugger.limiter import AdaptiveLimiter
+from nthp_api.smugmugger.schema import SmugMugPages
+from nthp_api.smugmugger.stats import RequestStats
 
 
 class TestGetPages:
@@ -13,3 +26,78 @@ class TestGetPages:
         # this has been verified by VCR cassette
         expected_number_of_images = 379
         assert len(images) == expected_number_of_images
+        # Pages are fetched at the same time but kept in order
+        assert [images[i]["ImageKey"] for i in range(0, 400, 100)] == [
+            "gKfJkMG",
+            "WN9VZS6",
+            "sgcDbCR",
+            "GMSDkLb",
+        ]
+
+
+@pytest.mark.parametrize(
+    "total,expected",
+    [(1, []), (100, []), (101, [101]), (300, [101, 201]), (379, [101, 201, 301])],
+)
+def test_get_page_starts(total: int, expected: list[int]):
+    pages = SmugMugPages(
+        Total=total,
+        Start=1,
+        Count=min(total, 100),
+        RequestedCount=100,
+        FirstPage="",
+        LastPage="",
+    )
+    assert get_page_starts(pages) == expected
+
+
+def test_http2_needs_h2(monkeypatch):
+    monkeypatch.setattr(settings, "smugmug_http2", True)
+    monkeypatch.setattr(smugmug_client, "h2", None)
+    assert smugmug_client.use_http2() is False
+
+
+@pytest.mark.asyncio
+async def test_make_http_client_timeouts(monkeypatch):
+    monkeypatch.setattr(settings, "smugmug_timeout", 12)
+    monkeypatch.setattr(settings, "smugmug_connect_timeout", 3)
+    async with smugmug_client.make_http_client() as http_client:
+        assert http_client.timeout.read == 12  # noqa: PLR2004
+        assert http_client.timeout.connect == 3  # noqa: PLR2004
+
+
+def make_mock_client(response: dict) -> SmugMugClient:
+    """A client that gets the same response to every request"""
+    return SmugMugClient(
+        client=httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, json=response)
+            )
+        ),
+        connection_limit=AdaptiveLimiter(1),
+        stats=RequestStats(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_malformed_album(monkeypatch):
+    monkeypatch.setattr(settings, "smugmug_api_key", "a123")
+    client = make_mock_client(
+        {
+            "Code": 200,
+            "Message": "Ok",
+            "Response": {"Uri": "/api/v2/album/abc", "Album": {"Name": "East"}},
+        }
+    )
+    with pytest.raises(SmugMugInvalidResponse):
+        await album.get_album(client, "abc")
+
+
+@pytest.mark.asyncio
+async def test_pages_missing(monkeypatch):
+    monkeypatch.setattr(settings, "smugmug_api_key", "a123")
+    client = make_mock_client(
+        {"Code": 200, "Message": "Ok", "Response": {"Uri": "/api/v2/album/abc"}}
+    )
+    with pytest.raises(SmugMugInvalidResponse):
+        await get_pages(client, "album/abc!images", "AlbumImage")
@@ -0,0 +1,117 @@
+import gzip
+import threading
+from collections.abc import Iterator
+
+import pytest
+
+from nthp_api.smugmugger import album, make_client
+from nthp_api.smugmugger.client import ConfigError, SmugMugNotFound
+from nthp_api.smugmugger.config import settings
+from nthp_api.smugmugger.replay import (
+    ArchiveError,
+    RecordedResponse,
+    ReplayServer,
+    ResponseArchive,
+    make_key,
+)
+
+ALBUM_BODY = {
+    "Code": 200,
+    "Message": "Ok",
+    "Response": {
+        "Uri": "/api/v2/album/dvVPZh",
+        "Album": {
+            "Uri": "/api/v2/album/dvVPZh",
+            "AlbumKey": "dvVPZh",
+            "ImagesLastUpdated": "2015-11-06T16:55:22+00:00",
+            "LastUpdated": "2015-11-06T16:55:22+00:00",
+            "Name": "East 2013",
+            "NiceName": "East-2013",
+        },
+    },
+}
+
+
+def test_make_key():
+    assert make_key("album/abc", {}) == "album/abc"
+    assert (
+        make_key("album/abc!images", {"start": 1, "count": 100, "APIKey": "secret"})
+        == "album/abc!images?count=100&start=1"
+    )
+
+
+def test_archive_round_trip(tmp_path):
+    path = tmp_path / "smugmug.json.gz"
+    archive = ResponseArchive()
+    archive.record("album/dvVPZh", 200, ALBUM_BODY)
+    archive.save(path)
+    content = path.read_bytes()
+    assert ResponseArchive.load(path).responses == archive.responses
+    # The same responses always make the same archive
+    archive.save(path)
+    assert path.read_bytes() == content
+
+
+def test_archive_version(tmp_path):
+    path = tmp_path / "smugmug.json.gz"
+    path.write_bytes(gzip.compress(b'{"version": 0, "responses": {}}'))
+    with pytest.raises(ArchiveError):
+        ResponseArchive.load(path)
+
+
+@pytest.fixture()
+def replay_server(monkeypatch) -> Iterator[ReplayServer]:
+    archive = ResponseArchive({"album/dvVPZh": RecordedResponse(200, ALBUM_BODY)})
+    server = ReplayServer(("127.0.0.1", 0), archive)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    monkeypatch.setattr(settings, "smugmug_api_base", server.api_base)
+    monkeypatch.setattr(settings, "smugmug_api_key", "a123")
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.mark.asyncio
+async def test_replay(replay_server):
+    async with make_client() as client:
+        east = await album.get_album(client, "dvVPZh")
+    assert east.Name == "East 2013"
+
+
+@pytest.mark.asyncio
+async def test_replay_without_api_key(replay_server, monkeypatch):
+    monkeypatch.setattr(settings, "smugmug_api_key", None)
+    async with make_client() as client:
+        east = await album.get_album(client, "dvVPZh")
+    assert east.Name == "East 2013"
+
+
+@pytest.mark.asyncio
+async def test_smugmug_needs_api_key(monkeypatch):
+    monkeypatch.setattr(settings, "smugmug_api_key", None)
+    monkeypatch.setattr(settings, "smugmug_api_base", "https://api.smugmug.com/api/v2/")
+    with pytest.raises(ConfigError):
+        async with make_client() as client:
+            await album.get_album(client, "dvVPZh")
+
+
+@pytest.mark.asyncio
+async def test_replay_missing(replay_server):
+    with pytest.raises(SmugMugNotFound):
+        async with make_client() as client:
+            await album.get_album(client, "abc123")
+
+
+@pytest.mark.asyncio
+async def test_record(replay_server, tmp_path, monkeypatch):
+    path = tmp_path / "smugmug.json.gz"
+    monkeypatch.setattr(settings, "smugmug_record_path", path)
+    with pytest.raises(SmugMugNotFound):
+        async with make_client() as client:
+            await album.get_album(client, "dvVPZh")
+            await album.get_album(client, "abc123")
+    recorded = ResponseArchive.load(path).responses
+    assert recorded["album/dvVPZh"] == RecordedResponse(200, ALBUM_BODY)
+    assert recorded["album/abc123"].status == 404  # noqa: PLR2004
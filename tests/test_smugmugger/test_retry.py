@@ -0,0 +1,189 @@
+import asyncio
+import datetime
+import email.utils
+import json
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from nthp_api.smugmugger.client import (
+    SmugMugApiError,
+    get,
+    get_backoff_delay,
+    get_retry_after,
+    make_client,
+)
+from nthp_api.smugmugger.config import settings
+from nthp_api.smugmugger.limiter import AdaptiveLimiter
+
+OK_BODY = {"Code": 200, "Message": "Ok", "Response": {"Uri": "/api/v2/album/abc"}}
+
+
+class StubApi(ThreadingHTTPServer):
+    """Sends queued responses in order, then OK for any further requests"""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), StubApiHandler)
+        self.responses: list[tuple[int, dict[str, str]]] = []
+        self.request_count = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/v2/"
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    server: StubApi
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.server.request_count += 1
+        status, headers = (
+            self.server.responses.pop(0) if self.server.responses else (200, {})
+        )
+        body = json.dumps({**OK_BODY, "Code": status, "Message": str(status)}).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture()
+def stub_api(monkeypatch) -> Iterator[StubApi]:
+    server = StubApi()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    monkeypatch.setattr(settings, "smugmug_api_base", server.base_url)
+    monkeypatch.setattr(settings, "smugmug_api_key", "a123")
+    monkeypatch.setattr(settings, "smugmug_retry_base_delay", 0.01)
+    monkeypatch.setattr(settings, "smugmug_max_retries", 3)
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.mark.asyncio
+async def test_retries_rate_limited(stub_api):
+    stub_api.responses = [(429, {"Retry-After": "0"}), (429, {})]
+    async with make_client() as client:
+        data = await get(client, "album/abc")
+        assert client.connection_limit.limit == settings.smugmug_connection_limit // 4
+        assert client.stats.outcomes == {"429": 2, "200": 1}
+        assert client.stats.retries == 2  # noqa: PLR2004
+    assert data["Code"] == 200  # noqa: PLR2004
+    assert stub_api.request_count == 3  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_retries_server_errors(stub_api):
+    stub_api.responses = [(500, {}), (502, {}), (503, {})]
+    async with make_client() as client:
+        data = await get(client, "album/abc")
+    assert data["Code"] == 200  # noqa: PLR2004
+    assert stub_api.request_count == 4  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries(stub_api):
+    stub_api.responses = [(503, {})] * 10
+    with pytest.raises(SmugMugApiError):
+        async with make_client() as client:
+            await get(client, "album/abc")
+    assert stub_api.request_count == settings.smugmug_max_retries + 1
+
+
+@pytest.mark.asyncio
+async def test_does_not_retry_client_errors(stub_api):
+    stub_api.responses = [(400, {})]
+    with pytest.raises(SmugMugApiError):
+        async with make_client() as client:
+            await get(client, "album/abc")
+    assert stub_api.request_count == 1
+
+
+@pytest.mark.asyncio
+async def test_gives_up_on_connection_errors(stub_api, monkeypatch):
+    # Nothing listens here once the stub has been closed
+    stub_api.shutdown()
+    stub_api.server_close()
+    with pytest.raises(SmugMugApiError):
+        async with make_client() as client:
+            await get(client, "album/abc")
+
+
+def test_get_retry_after_seconds():
+    response = httpx.Response(429, headers={"Retry-After": "3"})
+    assert get_retry_after(response) == 3  # noqa: PLR2004
+
+
+def test_get_retry_after_date():
+    retry_at = datetime.datetime.now(tz=datetime.timezone.utc) + datetime.timedelta(
+        seconds=30
+    )
+    response = httpx.Response(
+        429, headers={"Retry-After": email.utils.format_datetime(retry_at)}
+    )
+    assert 25 < get_retry_after(response) <= 30  # noqa: PLR2004
+
+
+def test_get_retry_after_is_capped(monkeypatch):
+    monkeypatch.setattr(settings, "smugmug_retry_max_delay", 10)
+    response = httpx.Response(429, headers={"Retry-After": "3600"})
+    assert get_retry_after(response) == 10  # noqa: PLR2004
+
+
+@pytest.mark.parametrize("retry_after", [None, "soon"])
+def test_get_retry_after_missing(retry_after):
+    headers = {"Retry-After": retry_after} if retry_after else {}
+    assert get_retry_after(httpx.Response(429, headers=headers)) is None
+
+
+def test_get_backoff_delay(monkeypatch):
+    monkeypatch.setattr(settings, "smugmug_retry_base_delay", 1)
+    monkeypatch.setattr(settings, "smugmug_retry_max_delay", 5)
+    assert all(0 <= get_backoff_delay(1) <= 2 for _ in range(100))  # noqa: PLR2004
+    assert all(0 <= get_backoff_delay(10) <= 5 for _ in range(100))  # noqa: PLR2004
+
+
+def test_limiter_adapts():
+    limiter = AdaptiveLimiter(max_limit=8)
+    limiter.on_rate_limited()
+    limiter.on_rate_limited()
+    assert limiter.limit == 2  # noqa: PLR2004
+    limiter.on_success()
+    limiter.on_success()
+    assert limiter.limit == 3  # noqa: PLR2004
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.limit == 8  # noqa: PLR2004
+    for _ in range(10):
+        limiter.on_rate_limited()
+    assert limiter.limit == 1
+
+
+@pytest.mark.asyncio
+async def test_limiter_limits_concurrency():
+    limiter = AdaptiveLimiter(max_limit=2)
+    active = 0
+    most_active = 0
+
+    async def task():
+        nonlocal active, most_active
+        async with limiter:
+            active += 1
+            most_active = max(most_active, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(task() for _ in range(10)))
+    assert most_active == 2  # noqa: PLR2004
@@ -0,0 +1,211 @@
+import datetime
+import time
+
+import peewee
+import pytest
+
+from nthp_api.smugmugger import album, database, smugmug
+from nthp_api.smugmugger.config import settings
+from nthp_api.smugmugger.schema import (
+    SmugMugAlbum,
+    SmugMugImage,
+    SmugMugImageCollection,
+)
+
+IMAGES_LAST_UPDATED = datetime.datetime(
+    2015, 11, 6, 16, 55, 22, tzinfo=datetime.timezone.utc
+)
+
+
+def make_album(images_last_updated: datetime.datetime) -> SmugMugAlbum:
+    return SmugMugAlbum(
+        Uri="/api/v2/album/dvVPZh",
+        AlbumKey="dvVPZh",
+        ImagesLastUpdated=images_last_updated,
+        LastUpdated=images_last_updated,
+        Name="East 2013",
+        NiceName="East-2013",
+    )
+
+
+def make_images(image_key: str) -> SmugMugImageCollection:
+    return SmugMugImageCollection(
+        [
+            SmugMugImage(
+                Uri=f"/api/v2/album/dvVPZh/image/{image_key}-0",
+                Date=IMAGES_LAST_UPDATED,
+                FileName=f"{image_key}.jpg",
+                Format="JPG",
+                ImageKey=image_key,
+                IsVideo=False,
+                OriginalHeight=100,
+                OriginalWidth=100,
+                Processing=False,
+                ThumbnailUrl=f"https://photos.smugmug.com/{image_key}-Th.jpg",
+                Title="",
+                WebUri=f"https://photos.newtheatre.org.uk/{image_key}",
+            )
+        ]
+    )
+
+
+class FakeSmugMug:
+    def __init__(self, images_last_updated: datetime.datetime):
+        self.album = make_album(images_last_updated)
+        self.requests: list[str] = []
+
+    async def get_album(self, client, album_id):
+        self.requests.append("album")
+        return self.album
+
+    async def get_album_images(self, client, album_id):
+        self.requests.append("images")
+        return make_images("new")
+
+
+@pytest.fixture()
+def cache_db(monkeypatch):
+    test_db = peewee.SqliteDatabase(":memory:")
+    monkeypatch.setattr(database, "db", test_db)
+    with test_db.bind_ctx(database.MODELS):
+        test_db.create_tables(database.MODELS)
+        yield test_db
+
+
+@pytest.fixture()
+def fake_smugmug(monkeypatch):
+    fake = FakeSmugMug(IMAGES_LAST_UPDATED)
+    monkeypatch.setattr(album, "get_album", fake.get_album)
+    monkeypatch.setattr(album, "get_album_images", fake.get_album_images)
+    monkeypatch.setattr(settings, "smugmug_fetch", True)
+    return fake
+
+
+def cache_album(last_fetched: datetime.datetime) -> None:
+    database.SmugMugResponse.create(
+        id="dvVPZh",
+        last_updated=IMAGES_LAST_UPDATED,
+        last_fetched=last_fetched,
+        data=make_images("old").json(),
+    )
+
+
+async def get_image_keys() -> list[str]:
+    images = await smugmug.get_album_images(None, "dvVPZh")
+    return [image.ImageKey for image in images]
+
+
+@pytest.mark.asyncio
+async def test_fetches_uncached(cache_db, fake_smugmug):
+    assert await get_image_keys() == ["new"]
+    assert fake_smugmug.requests == ["album", "images"]
+    assert await get_image_keys() == ["new"]
+    assert fake_smugmug.requests == ["album", "images"]
+
+
+@pytest.mark.asyncio
+async def test_uses_cache_without_max_age(cache_db, fake_smugmug, monkeypatch):
+    monkeypatch.setattr(settings, "smugmug_max_age_hours", None)
+    cache_album(datetime.datetime(2000, 1, 1))
+    assert await get_image_keys() == ["old"]
+    assert fake_smugmug.requests == []
+
+
+@pytest.mark.asyncio
+async def test_uses_fresh_cache(cache_db, fake_smugmug, monkeypatch):
+    monkeypatch.setattr(settings, "smugmug_max_age_hours", 24)
+    cache_album(datetime.datetime.now(tz=datetime.timezone.utc))
+    assert await get_image_keys() == ["old"]
+    assert fake_smugmug.requests == []
+
+
+@pytest.mark.asyncio
+async def test_checks_stale_cache(cache_db, fake_smugmug, monkeypatch):
+    monkeypatch.setattr(settings, "smugmug_max_age_hours", 24)
+    cache_album(datetime.datetime(2000, 1, 1))
+    assert await get_image_keys() == ["old"]
+    assert fake_smugmug.requests == ["album"]
+    # Checking counts as fetching, so the album isn't checked again
+    assert await get_image_keys() == ["old"]
+    assert fake_smugmug.requests == ["album"]
+
+
+@pytest.mark.asyncio
+async def test_refetches_changed_album(cache_db, fake_smugmug, monkeypatch):
+    monkeypatch.setattr(settings, "smugmug_max_age_hours", 24)
+    cache_album(datetime.datetime(2000, 1, 1))
+    fake_smugmug.album = make_album(IMAGES_LAST_UPDATED + datetime.timedelta(days=1))
+    assert await get_image_keys() == ["new"]
+    assert fake_smugmug.requests == ["album", "images"]
+
+
+@pytest.mark.asyncio
+async def test_uses_stale_cache_without_fetch(cache_db, fake_smugmug, monkeypatch):
+    monkeypatch.setattr(settings, "smugmug_max_age_hours", 24)
+    monkeypatch.setattr(settings, "smugmug_fetch", False)
+    cache_album(datetime.datetime(2000, 1, 1))
+    assert await get_image_keys() == ["old"]
+    assert fake_smugmug.requests == []
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_is_saved_at_once(cache_db, fake_smugmug):
+    cache = smugmug.AlbumCache.load(["dvVPZh"])
+    images = await smugmug.get_album_images(None, "dvVPZh", cache)
+    assert [image.ImageKey for image in images] == ["new"]
+    assert database.SmugMugResponse.select().count() == 0
+    cache.save()
+    assert database.SmugMugResponse.select().count() == 1
+    assert cache.updated_ids == set()
+    assert await smugmug.get_album_images(None, "dvVPZh", cache) == images
+    assert fake_smugmug.requests == ["album", "images"]
+
+
+def test_album_cache_saves_in_batches(cache_db, monkeypatch):
+    monkeypatch.setattr(smugmug, "WRITE_BATCH_SIZE", 2)
+    cache = smugmug.AlbumCache.load([])
+    for album_id in ["a", "b", "c"]:
+        cache.put(
+            smugmug.make_cached_response(
+                album_id, make_album(IMAGES_LAST_UPDATED), make_images("new")
+            )
+        )
+    cache.save()
+    assert smugmug.AlbumCache.load(["a", "b", "c", "d"]).responses.keys() == {
+        "a",
+        "b",
+        "c",
+    }
+
+
+@pytest.mark.asyncio
+async def test_refetches_fresh_cache_when_recording(
+    cache_db, fake_smugmug, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(settings, "smugmug_max_age_hours", None)
+    monkeypatch.setattr(settings, "smugmug_record_path", tmp_path / "smugmug.json.gz")
+    cache_album(datetime.datetime.now(tz=datetime.timezone.utc))
+    assert await get_image_keys() == ["new"]
+    assert fake_smugmug.requests == ["album", "images"]
+
+
+@pytest.fixture()
+def local_timezone(monkeypatch):
+    # Five hours ahead of UTC, the sign is inverted in POSIX timezone names
+    monkeypatch.setenv("TZ", "Etc/GMT-5")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_parse_cached_datetime_naive_is_local(local_timezone):
+    assert smugmug.parse_cached_datetime(
+        datetime.datetime(2020, 1, 1, 12)
+    ) == datetime.datetime(2020, 1, 1, 7, tzinfo=datetime.timezone.utc)
+
+
+def test_parse_cached_datetime_with_timezone(local_timezone):
+    assert smugmug.parse_cached_datetime(
+        "2020-01-01 12:00:00+00:00"
+    ) == datetime.datetime(2020, 1, 1, 12, tzinfo=datetime.timezone.utc)
@@ -0,0 +1,34 @@
+import logging
+
+import pytest
+
+from nthp_api.smugmugger.stats import RequestStats, get_percentile
+
+
+@pytest.mark.parametrize(
+    "percentile,expected", [(0, 1), (50, 5), (90, 9), (95, 10), (100, 10)]
+)
+def test_get_percentile(percentile: float, expected: float):
+    values = [float(value) for value in range(1, 11)]
+    assert get_percentile(values, percentile) == expected
+
+
+def test_log_summary(caplog):
+    stats = RequestStats()
+    stats.record(0.1, "200", "HTTP/1.1")
+    stats.record(0.3, "429", "HTTP/1.1")
+    stats.record(0.2, "ConnectError")
+    stats.record_retry()
+    with caplog.at_level(logging.INFO):
+        stats.log_summary()
+    assert "Made 3 SmugMug requests with 1 retries" in caplog.text
+    assert "p50 0.200s" in caplog.text
+    assert "max 0.300s" in caplog.text
+    assert "ConnectError x1" in caplog.text
+    assert "HTTP/1.1 x2" in caplog.text
+
+
+def test_log_summary_without_requests(caplog):
+    with caplog.at_level(logging.INFO):
+        RequestStats().log_summary()
+    assert "No SmugMug requests made" in caplog.text